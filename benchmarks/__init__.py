@@ -0,0 +1,8 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Benchmarks of writableopenapi, to run from the root of the repository, e.g.
+`python -m benchmarks.sharing`.
+"""
@@ -0,0 +1,86 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Compares serializing a generated specification from `dump()` and from
+`cached_dump()`, on a new tree, and again after editing one path item.
+
+    python -m benchmarks.caching [--shape NAME] [--repeat N]
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+from benchmarks.generator import SHAPES, generate
+from writableopenapi.openapi.v3_1 import *
+
+DUMPS: Dict[str, Callable[[OpenAPI], Dict[str, Any]]] = {
+    "dump()": lambda api: api.dump(),
+    "cached_dump()": lambda api: api.cached_dump(),
+}
+
+
+def compact(dumped: Dict[str, Any]) -> str:
+    return json.dumps(dumped, sort_keys=True, separators=(",", ":"))
+
+
+def edit(api: OpenAPI) -> None:
+    """Edits the first path item, as a regenerate loop would."""
+    item = next(iter(api.paths.values()))
+    item.summary = (item.summary or "") + "."
+
+
+def measure(
+    build: Callable[[], OpenAPI],
+    dump: Callable[[OpenAPI], Dict[str, Any]],
+    edited: bool,
+    serialize: bool,
+    repeat: int,
+) -> float:
+    """
+    Returns the best time of a dump, serialized to compact JSON or not, on
+    newly built trees, or on a tree dumped once before and then edited.
+    """
+    best = float("inf")
+    api = build()
+    for _ in range(repeat):
+        if edited:
+            dump(api)
+            edit(api)
+        else:
+            api = build()
+        start = time.perf_counter()
+        dumped = dump(api)
+        if serialize:
+            compact(dumped)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shape", choices=SHAPES, default="medium")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    build = lambda: generate(SHAPES[args.shape])
+    runs = {
+        "new tree": (False, False),
+        "new tree, JSON": (False, True),
+        "edited": (True, False),
+        "edited, JSON": (True, True),
+    }
+    print(f"shape {args.shape}, best of {args.repeat}")
+    print(f"{'':<16}" + "".join(f"{name:>16}" for name in DUMPS))
+    for name, (edited, serialize) in runs.items():
+        times = [
+            measure(build, dump, edited, serialize, args.repeat)
+            for dump in DUMPS.values()
+        ]
+        print(f"{name:<16}" + "".join(f"{t * 1000:>14.2f}ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Compares benchmark results with a baseline, as written by `benchmarks.suite`,
+and exits with 1 when a metric regressed, or 2 when the results cannot be
+read.
+
+    python -m benchmarks.compare BASELINE CURRENT [--threshold RATIO]
+        [--memory-threshold RATIO] [--noise-factor N]
+
+The best time of each phase is compared, and a phase regressed when it got
+slower by more than the threshold, and by more than the noise of the runs:
+the median absolute deviation of the runs, relative to their median, times
+the noise factor. Memory peaks are deterministic enough to be compared with
+their own threshold only.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+REGRESSED = "regressed"
+IMPROVED = "improved"
+UNCHANGED = "ok"
+
+
+@dataclass
+class Comparison:
+    """The comparison of a metric of a phase of a shape."""
+
+    shape: str
+    phase: str
+    metric: str
+    """Either "time", the best run in seconds, or "memory", in bytes."""
+    baseline: float
+    current: float
+    tolerance: float
+    """The relative change above which the metric regressed."""
+    status: str
+
+    @property
+    def change(self) -> float:
+        """The relative change, positive when the metric got worse."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+def noise(runs: Sequence[float]) -> float:
+    """
+    Returns the median absolute deviation of runs, relative to their
+    median, which outliers barely move.
+    """
+    if len(runs) < 2:
+        return 0.0
+    median = statistics.median(runs)
+    if not median:
+        return 0.0
+    return statistics.median(abs(run - median) for run in runs) / median
+
+
+def _status(change: float, tolerance: float) -> str:
+    if change > tolerance:
+        return REGRESSED
+    if change < -tolerance:
+        return IMPROVED
+    return UNCHANGED
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1,
+    memory_threshold: float = 0.1,
+    noise_factor: float = 3.0,
+) -> List[Comparison]:
+    """Compares the phases of the shapes benchmarked in both results."""
+    comparisons = []
+    for shape, before in baseline["shapes"].items():
+        after = current["shapes"].get(shape)
+        if after is None:
+            continue
+        for phase, old in before["phases"].items():
+            new = after["phases"].get(phase)
+            if new is None:
+                continue
+            tolerance = max(
+                threshold,
+                noise_factor * max(noise(old["runs"]), noise(new["runs"])),
+            )
+            comparison = Comparison(
+                shape, phase, "time", old["best"], new["best"], tolerance, ""
+            )
+            comparison.status = _status(comparison.change, tolerance)
+            comparisons.append(comparison)
+
+            comparison = Comparison(
+                shape,
+                phase,
+                "memory",
+                old["peak_bytes"],
+                new["peak_bytes"],
+                memory_threshold,
+                "",
+            )
+            comparison.status = _status(comparison.change, memory_threshold)
+            comparisons.append(comparison)
+    return comparisons
+
+
+def report(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    comparisons: List[Comparison],
+) -> bool:
+    """Prints the comparisons, and returns whether none regressed."""
+    for key in ("python", "implementation", "machine"):
+        if baseline.get(key) != current.get(key):
+            print(
+                f"warning: the baseline was run on {key} "
+                f"{baseline.get(key)}, not {current.get(key)}"
+            )
+    missing = set(baseline["shapes"]) - set(current["shapes"])
+    for shape in sorted(missing):
+        print(f"warning: {shape} is missing from the current results")
+
+    print(
+        f"{'':<28}{'baseline':>12}{'current':>12}{'change':>9}"
+        f"{'tolerance':>11}  status"
+    )
+    for c in comparisons:
+        if c.metric == "time":
+            values = f"{c.baseline * 1000:>10.1f}ms{c.current * 1000:>10.1f}ms"
+        else:
+            values = (
+                f"{c.baseline / 2**20:>9.1f}MiB{c.current / 2**20:>9.1f}MiB"
+            )
+        print(
+            f"{c.shape + ' ' + c.phase + ' ' + c.metric:<28}{values}"
+            f"{c.change:>+9.1%}{c.tolerance:>11.1%}  {c.status}"
+        )
+    regressed = [c for c in comparisons if c.status == REGRESSED]
+    if regressed:
+        print(f"{len(regressed)} regressions")
+    return not regressed
+
+
+def load(path: str) -> Optional[Dict[str, Any]]:
+    """Reads stored results, or prints why they cannot be and returns None."""
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except OSError as error:
+        print(f"cannot read {path}: {error.strerror}")
+    except ValueError as error:
+        print(f"cannot read {path}: {error}")
+    return None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of the comparison to a parser."""
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--memory-threshold", type=float, default=0.1)
+    parser.add_argument("--noise-factor", type=float, default=3.0)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+    if baseline is None or current is None:
+        return 2
+    comparisons = compare(
+        baseline,
+        current,
+        args.threshold,
+        args.memory_threshold,
+        args.noise_factor,
+    )
+    return 0 if report(baseline, current, comparisons) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Seeded generator of synthetic specifications, to benchmark specifications
+larger than the petstore.
+
+The same shape gives the same specification, built with the macros of
+`macros.types` so that their validation is part of the construction.
+"""
+
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Union
+from writableopenapi.macros import types
+from writableopenapi.openapi.v3_1 import *
+
+_METHODS = ("get", "put", "post", "delete", "patch")
+
+
+@dataclass(frozen=True)
+class Shape:
+    """What a generated specification looks like."""
+
+    paths: int = 100
+    """The number of paths, each with one to three operations."""
+    depth: int = 3
+    """How deeply the object schemas are nested."""
+    fan_out: int = 4
+    """The number of properties of the object schemas."""
+    reuse: float = 0.3
+    """The probability that a schema is a reference to a component."""
+    extensions: float = 0.1
+    """The probability that an object carries specification extensions."""
+    seed: int = 0
+
+    def asdict(self) -> Dict[str, Any]:
+        """Returns the fields of the shape."""
+        return asdict(self)
+
+
+SHAPES: Dict[str, Shape] = {
+    "small": Shape(paths=20),
+    "medium": Shape(paths=200),
+    "large": Shape(paths=1000, depth=4),
+    "deep": Shape(paths=50, depth=8, fan_out=2),
+    "wide": Shape(paths=50, depth=2, fan_out=32),
+    "shared": Shape(paths=200, reuse=0.8),
+}
+"""The shapes of the benchmark suite, by name."""
+
+
+class _Generator:
+    """Builds a specification, drawing its choices from a seeded random."""
+
+    def __init__(self, shape: Shape) -> None:
+        self.shape = shape
+        self.random = random.Random(shape.seed)
+        self.components: List[str] = []
+        self.counter = 0
+
+    def extend(self, node: SpecificationExtension) -> SpecificationExtension:
+        """Adds extensions to an object, with some probability."""
+        if self.random.random() < self.shape.extensions:
+            self.counter += 1
+            node.extensions = {
+                "x-generated": self.counter,
+                "x-owner": self.random.choice(("billing", "search", "users")),
+            }
+        return node
+
+    def leaf(self) -> Schema:
+        r = self.random
+        leaves: List[Callable[[], Schema]] = [
+            lambda: types.string(
+                minimum_length=1,
+                maximum_length=r.randint(8, 255),
+                description=f"Field {r.randrange(10_000)}",
+            ),
+            lambda: types.integer(minimum=0, maximum=r.randint(1, 10**6)),
+            lambda: types.int64(description="An identifier"),
+            lambda: types.number(minimum=0, maximum=r.random() * 100),
+            lambda: types.boolean(),
+            lambda: types.uuid(),
+            lambda: types.datetime(),
+            lambda: types.email(),
+        ]
+        return r.choice(leaves)()
+
+    def schema(self, depth: int) -> Union[Schema, Reference]:
+        r = self.random
+        if self.components and r.random() < self.shape.reuse:
+            name = r.choice(self.components)
+            return Reference(ref=f"#/components/schemas/{name}")
+        if depth <= 0:
+            return self.extend(self.leaf())
+        if r.random() < 0.2:
+            return self.extend(types.array(items=self.schema(depth - 1)))
+        properties = {
+            f"field{i}": self.schema(depth - 1)
+            for i in range(self.shape.fan_out)
+        }
+        return self.extend(
+            Schema(
+                type="object",
+                required=sorted(r.sample(list(properties), k=1)),
+                properties=properties,
+            )
+        )
+
+    def content(self, depth: int) -> Dict[str, MediaType]:
+        return {"application/json": MediaType(schema=self.schema(depth))}
+
+    def operation(self, path: int, method: str) -> Operation:
+        r = self.random
+        parameters = [
+            self.extend(
+                Parameter(
+                    name="limit",
+                    in_="query",
+                    description="How many items to return",
+                    schema=types.integer(
+                        minimum=1, maximum=100, format="int32"
+                    ),
+                )
+            ),
+            Parameter(
+                name="id", in_="path", required=True, schema=types.uuid()
+            ),
+        ]
+        responses = {
+            "200": self.extend(
+                Response(
+                    description="Success",
+                    content=self.content(self.shape.depth),
+                )
+            ),
+            "default": Response(description="Unexpected error"),
+        }
+        return self.extend(
+            Operation(
+                operation_id=f"{method}Resource{path}",
+                summary=f"{method.capitalize()} resource {path}",
+                tags=[f"tag{r.randrange(10)}"],
+                parameters=parameters,
+                request_body=(
+                    RequestBody(content=self.content(self.shape.depth))
+                    if method in ("put", "post", "patch")
+                    else None
+                ),
+                responses=responses,
+            )
+        )
+
+    def generate(self) -> OpenAPI:
+        r = self.random
+        schemas: Dict[str, Union[Schema, Reference]] = {}
+        for i in range(max(self.shape.paths // 10, 1)):
+            schemas[f"Model{i}"] = self.schema(self.shape.depth)
+            self.components.append(f"Model{i}")
+
+        paths = {}
+        for i in range(self.shape.paths):
+            methods = r.sample(_METHODS, k=r.randint(1, 3))
+            paths[f"/resources{i}/{{id}}"] = self.extend(
+                PathItem(
+                    **{method: self.operation(i, method) for method in methods}
+                )
+            )
+        return self.extend(
+            OpenAPI(
+                info=Info(title="Generated", version="1.0.0"),
+                paths=paths,
+                components=Components(schemas=schemas),
+            )
+        )
+
+
+def generate(shape: Shape = Shape()) -> OpenAPI:
+    """Builds the specification of a shape."""
+    return _Generator(shape).generate()
@@ -0,0 +1,71 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Measures the throughput of loading generated specifications from parsed
+JSON, in objects per second, and checks that they load back unchanged. The
+loading is timed again with the garbage collector paused, as callers may
+do around `from_dict`, and the lazy loading of the path items and the
+components is timed as well.
+
+    python -m benchmarks.loading [--shapes NAME ...] [--repeat N]
+"""
+
+import argparse
+import gc
+import json
+import time
+from typing import List, Optional
+from benchmarks.generator import SHAPES, generate
+from writableopenapi.loader import from_dict
+from writableopenapi.utils import into_json
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"best of {args.repeat}")
+    print(
+        f"{'':<10}{'objects':>10}{'json.loads':>14}{'from_dict':>14}"
+        f"{'objects/s':>14}{'gc paused':>14}{'lazy':>12}"
+    )
+    for name in args.shapes:
+        api = generate(SHAPES[name])
+        text = into_json(api)
+        objects = sum(1 for _ in api.walk())
+        assert from_dict(json.loads(text)) == api
+        assert from_dict(json.loads(text), lazy=True) == api
+
+        parse = load = paused = lazy = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            data = json.loads(text)
+            parse = min(parse, time.perf_counter() - start)
+            start = time.perf_counter()
+            from_dict(data)
+            load = min(load, time.perf_counter() - start)
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                from_dict(data)
+                paused = min(paused, time.perf_counter() - start)
+            finally:
+                gc.enable()
+            start = time.perf_counter()
+            from_dict(data, lazy=True)
+            lazy = min(lazy, time.perf_counter() - start)
+        print(
+            f"{name:<10}{objects:>10}{parse * 1000:>12.1f}ms"
+            f"{load * 1000:>12.1f}ms{objects / load:>14,.0f}"
+            f"{paused * 1000:>12.1f}ms{lazy * 1000:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
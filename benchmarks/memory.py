@@ -0,0 +1,81 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Measures the memory taken by a single object of common kinds, compared with
+the same fields in a regular dataclass and in a slotted one, as the classes
+were before they were slotted and before some were made sparse.
+
+    python -m benchmarks.memory [--count N]
+"""
+
+import argparse
+import copy
+import tracemalloc
+from dataclasses import field, fields, make_dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from benchmarks.nodes import SAMPLES
+from writableopenapi.openapi.v3_1 import SpecificationExtension
+
+_REPLICAS: Dict[Tuple[type, bool], type] = {}
+
+
+def replica(node: SpecificationExtension, slots: bool) -> Any:
+    """Copies an object into a dataclass with the same fields."""
+    cls = type(node)
+    if (cls, slots) not in _REPLICAS:
+        _REPLICAS[(cls, slots)] = make_dataclass(
+            cls.__name__,
+            [
+                (
+                    f.name,
+                    Any,
+                    field(default=f.default, default_factory=f.default_factory),
+                )
+                for f in fields(cls)
+                if f.init
+            ],
+            slots=slots,
+        )
+    values = {f.name: getattr(node, f.name) for f in fields(node) if f.init}
+    # Like the built objects, each replica owns its lists and dictionaries.
+    for name, value in values.items():
+        if isinstance(value, (list, dict)):
+            values[name] = copy.copy(value)
+    return _REPLICAS[(cls, slots)](**values)
+
+
+def measure(build: Callable[[], Any], count: int) -> float:
+    """Returns the memory allocated per object when building `count` ones."""
+    nodes: List[Any] = [None] * count
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            nodes[i] = build()
+        return (tracemalloc.get_traced_memory()[0] - start) / count
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(f"{args.count} objects")
+    print(f"{'':<20}{'dict':>10}{'slots':>10}{'current':>10}{'saved':>8}")
+    for name, build in SAMPLES.items():
+        sample = build()
+        before = measure(lambda: replica(sample, slots=False), args.count)
+        slotted = measure(lambda: replica(sample, slots=True), args.count)
+        after = measure(build, args.count)
+        print(
+            f"{name:<20}{before:>9.0f}B{slotted:>9.0f}B{after:>9.0f}B"
+            f"{1 - after / before:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Measures the time taken to dump a single object of common kinds, from a cold
+cache.
+
+    python -m benchmarks.nodes [--count N] [--repeat N]
+"""
+
+import argparse
+import time
+from typing import Callable, List, Optional
+from writableopenapi.openapi.v3_1 import *
+
+SAMPLES = {
+    "Schema (2 fields)": lambda: Schema(type="string", format="uuid"),
+    "Schema (6 fields)": lambda: Schema(
+        type="integer",
+        format="int32",
+        minimum=0,
+        maximum=100,
+        description="A percentage",
+        nullable=False,
+    ),
+    "Parameter": lambda: Parameter(
+        name="limit", in_="query", required=False, description="Page size"
+    ),
+    "Response": lambda: Response(description="Not found"),
+    "Operation": lambda: Operation(
+        operation_id="getPet", tags=["pets"], summary="Get a pet"
+    ),
+    "Reference": lambda: Reference(ref="#/components/schemas/Pet"),
+}
+
+
+def measure(build: Callable[[], SpecificationExtension], count: int) -> float:
+    """Returns the time taken to dump `count` newly built objects."""
+    nodes = [build() for _ in range(count)]
+    start = time.perf_counter()
+    for node in nodes:
+        node.dump()
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"best of {args.repeat}, {args.count} objects")
+    for name, build in SAMPLES.items():
+        best = min(measure(build, args.count) for _ in range(args.repeat))
+        print(f"{name:<20}{best / args.count * 1e9:>8.0f}ns/object")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Compares encoding a large petstore-derived specification as JSON in the
+calling process, and in pools of processes of increasing sizes.
+
+    python -m benchmarks.parallel [--resources N] [--repeat N] [--workers N]
+        [--start-method METHOD]
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from typing import List, Optional
+from benchmarks.sharing import petstore
+from writableopenapi import parallel
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--resources", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--start-method", choices=multiprocessing.get_all_start_methods()
+    )
+    args = parser.parse_args(argv)
+    context = multiprocessing.get_context(args.start_method)
+
+    api = petstore(args.resources, share=False)
+    expected = "".join(api.iter_json())
+    print(
+        f"{args.resources * 4} operations, best of {args.repeat}, "
+        f"{context.get_start_method()} start method"
+    )
+    serial = None
+    workers = 1
+    while True:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            encoded = "".join(
+                parallel.iter_json(api, max_workers=workers, mp_context=context)
+            )
+            best = min(best, time.perf_counter() - start)
+        assert encoded == expected
+        serial = serial or best
+        print(
+            f"{workers:>3} workers{best * 1000:>10.1f}ms{serial / best:>7.1f}x"
+        )
+        if workers >= args.workers:
+            break
+        workers = min(workers * 2, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Compares reading a single operation of a generated specification file by
+parsing the whole file, and through a memory-mapped index.
+
+    python -m benchmarks.reader [--shape NAME] [--repeat N]
+
+The memory peaks are measured in separate runs, as tracing the allocations
+slows the code down.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional
+from benchmarks.generator import SHAPES, generate
+from writableopenapi.loader import from_dict
+from writableopenapi.openapi.v3_1 import Operation
+from writableopenapi.reader import MappedSpecification
+from writableopenapi.references import pointer
+
+
+def _best(function: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak(function: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shape", choices=list(SHAPES), default="large")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    api = generate(SHAPES[args.shape])
+    path, item = next(iter(api.paths.items()))
+    method = next(key for key, _ in item.members())
+    ref = pointer(("paths", path, method))
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "openapi.json")
+        with open(filename, "w") as fp:
+            api.write_json(fp)
+        size = os.path.getsize(filename)
+        del api, item
+
+        def parsed() -> Operation:
+            with open(filename) as fp:
+                return from_dict(
+                    json.load(fp)["paths"][path][method], Operation
+                )
+
+        def mapped() -> Operation:
+            with MappedSpecification(filename) as spec:
+                return spec.load(ref, Operation)
+
+        assert parsed() == mapped()
+        print(f"{ref} of {size / 2**20:.1f}MiB, best of {args.repeat}")
+        for name, read in (("json.load", parsed), ("mapped", mapped)):
+            best = _best(read, args.repeat)
+            peak = _peak(read) / 2**20
+            print(f"{name:<12}{best * 1000:>10.1f}ms{peak:>10.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Times indexing the components of a specification, resolving references to
+each of them, and checking all the references, as the number of components
+grows.
+
+    python -m benchmarks.references [--components N ...] [--repeat N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable, List, Optional
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.references import Resolver
+
+
+def build(components: int) -> OpenAPI:
+    """
+    Builds a specification whose schemas refer to the next one, and whose
+    path items refer to ten schemas each.
+    """
+    schemas = {
+        f"Model{i}": Schema(
+            type="object",
+            properties={
+                "next": Reference(
+                    ref=f"#/components/schemas/Model{(i + 1) % components}"
+                )
+            },
+        )
+        for i in range(components)
+    }
+    paths = {
+        f"/resources{i}": PathItem(
+            get=Operation(
+                responses={
+                    "200": Response(
+                        description="Success",
+                        content={
+                            "application/json": MediaType(
+                                schema=Schema(
+                                    type="array",
+                                    items=Reference(
+                                        ref=f"#/components/schemas/Model{i}"
+                                    ),
+                                )
+                            )
+                        },
+                    )
+                }
+            )
+        )
+        for i in range(0, components, 10)
+    }
+    return OpenAPI(
+        info=Info(title="References", version="1.0.0"),
+        paths=paths,
+        components=Components(schemas=schemas),
+    )
+
+
+def _best(function: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--components", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"best of {args.repeat}")
+    print(f"{'components':>12}{'index':>12}{'resolve':>12}{'check':>12}")
+    for components in args.components:
+        api = build(components)
+        refs = [f"#/components/schemas/Model{i}" for i in range(components)]
+        resolver = Resolver(api)
+        assert resolver.check().ok
+        index = _best(lambda: Resolver(api), args.repeat)
+        resolve = _best(
+            lambda: [resolver.resolve(r) for r in refs], args.repeat
+        )
+        check = _best(resolver.check, args.repeat)
+        print(
+            f"{components:>12}{index * 1000:>10.1f}ms"
+            f"{resolve * 1000:>10.1f}ms{check * 1000:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
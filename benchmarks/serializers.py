@@ -0,0 +1,60 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Compares the serializer back-ends of each format on petstore-derived
+specifications of increasing sizes, from newly built trees.
+
+    python -m benchmarks.serializers [--nodes N ...] [--repeat N]
+"""
+
+import argparse
+import time
+from typing import Callable, List, Optional
+from benchmarks.sharing import petstore
+from writableopenapi import serializers
+from writableopenapi.openapi.v3_1 import OpenAPI
+
+# The objects of a resource of `petstore`, as yielded by `walk()`.
+_NODES_PER_RESOURCE = 92
+
+
+def measure(
+    build: Callable[[], OpenAPI],
+    serializer: serializers.Serializer,
+    repeat: int,
+) -> float:
+    """Returns the best time of a back-end, on a newly built tree each time."""
+    best = float("inf")
+    for _ in range(repeat):
+        api = build()
+        start = time.perf_counter()
+        serializer.serialize(api)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--nodes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"best of {args.repeat}, the default back-end first")
+    print(f"{'':<28}" + "".join(f"{n:>10} nodes" for n in args.nodes))
+    for format in serializers.formats():
+        for serializer in serializers.serializers(format):
+            row = f"{format + ' ' + serializer.name:<28}"
+            for nodes in args.nodes:
+                resources = max(nodes // _NODES_PER_RESOURCE, 1)
+                build = lambda: petstore(resources, share=False)
+                best = measure(build, serializer, args.repeat)
+                row += f"{best * 1000:>14.1f}ms"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
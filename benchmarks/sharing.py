@@ -0,0 +1,191 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Compares serializing a petstore-derived specification whose schemas,
+responses and parameters are shared Python objects, with the same
+specification where every occurrence is a distinct object.
+
+    python -m benchmarks.sharing [--resources N] [--repeat N]
+"""
+
+import argparse
+import io
+import time
+from typing import Any, Callable, Dict, List, Optional
+from writableopenapi.openapi.v3_1 import *
+
+
+def petstore(resources: int, share: bool) -> OpenAPI:
+    """
+    Builds a petstore with `resources` copies of the pet endpoints. When
+    `share` is set, the schemas, responses and parameters are built once and
+    reused everywhere.
+    """
+
+    def pet() -> Schema:
+        return Schema(
+            type="object",
+            required=["id", "name"],
+            properties={
+                "id": Schema(type="integer", format="int64"),
+                "name": Schema(type="string", min_length=1, max_length=100),
+                "tag": Schema(type="string"),
+                "status": Schema(
+                    type="string",
+                    enum=["available", "pending", "sold"],
+                    description="pet status in the store",
+                ),
+                "category": Schema(
+                    type="object",
+                    properties={
+                        "id": Schema(type="integer", format="int64"),
+                        "name": Schema(type="string"),
+                    },
+                ),
+                "photoUrls": Schema(
+                    type="array",
+                    items=Schema(type="string", format="uri"),
+                ),
+            },
+        )
+
+    def error() -> Response:
+        return Response(
+            description="unexpected error",
+            content={
+                "application/json": MediaType(
+                    schema=Schema(
+                        type="object",
+                        required=["code", "message"],
+                        properties={
+                            "code": Schema(type="integer", format="int32"),
+                            "message": Schema(type="string"),
+                        },
+                    )
+                ),
+            },
+        )
+
+    def limit() -> Parameter:
+        return Parameter(
+            name="limit",
+            in_="query",
+            description="How many items to return at one time (max 100)",
+            schema=Schema(type="integer", format="int32", maximum=100),
+        )
+
+    def pet_id() -> Parameter:
+        return Parameter(
+            name="petId",
+            in_="path",
+            required=True,
+            schema=Schema(type="integer", format="int64"),
+        )
+
+    def once(factory: Callable[[], Any]) -> Callable[[], Any]:
+        value = factory()
+        return lambda: value
+
+    if share:
+        pet, error, limit, pet_id = map(once, (pet, error, limit, pet_id))
+
+    def content(schema: Schema) -> Dict[str, MediaType]:
+        return {"application/json": MediaType(schema=schema)}
+
+    paths = {}
+    for i in range(resources):
+        paths[f"/pets{i}"] = PathItem(
+            get=Operation(
+                operation_id=f"listPets{i}",
+                parameters=[limit()],
+                responses={
+                    "200": Response(
+                        description="A paged array of pets",
+                        content=content(Schema(type="array", items=pet())),
+                    ),
+                    "default": error(),
+                },
+            ),
+            post=Operation(
+                operation_id=f"createPets{i}",
+                request_body=RequestBody(content=content(pet())),
+                responses={
+                    "201": Response(description="Null response"),
+                    "default": error(),
+                },
+            ),
+        )
+        paths[f"/pets{i}/{{petId}}"] = PathItem(
+            parameters=[pet_id()],
+            get=Operation(
+                operation_id=f"showPetById{i}",
+                responses={
+                    "200": Response(
+                        description="Expected response to a valid request",
+                        content=content(pet()),
+                    ),
+                    "default": error(),
+                },
+            ),
+            put=Operation(
+                operation_id=f"updatePet{i}",
+                request_body=RequestBody(content=content(pet())),
+                responses={
+                    "200": Response(
+                        description="The updated pet",
+                        content=content(pet()),
+                    ),
+                    "default": error(),
+                },
+            ),
+        )
+
+    return OpenAPI(
+        info=Info(title="Swagger Petstore", version="1.0.0"),
+        paths=paths,
+    )
+
+
+def measure(
+    build: Callable[[], OpenAPI], run: Callable[[OpenAPI], object], repeat: int
+) -> float:
+    """Returns the best time of `run`, on a newly built tree each time."""
+    best = float("inf")
+    for _ in range(repeat):
+        api = build()
+        start = time.perf_counter()
+        run(api)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--resources", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = {
+        "cached_dump()": lambda api: api.cached_dump(),
+        "iter_json()": lambda api: "".join(api.iter_json()),
+        "write_yaml()": lambda api: api.write_yaml(io.StringIO()),
+    }
+    print(f"{args.resources * 4} operations, best of {args.repeat}")
+    print(f"{'':<14}{'distinct':>12}{'shared':>12}{'speedup':>10}")
+    for name, run in runs.items():
+        distinct = measure(
+            lambda: petstore(args.resources, share=False), run, args.repeat
+        )
+        shared = measure(
+            lambda: petstore(args.resources, share=True), run, args.repeat
+        )
+        print(
+            f"{name:<14}{distinct * 1000:>10.1f}ms{shared * 1000:>10.1f}ms"
+            f"{distinct / shared:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
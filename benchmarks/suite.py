@@ -0,0 +1,215 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Times the construction, dump and serializations of generated specifications,
+records their memory peaks, and writes the results as JSON.
+
+    python -m benchmarks.suite [--shapes NAME ...] [--repeat N]
+        [--output PATH] [--baseline PATH [--threshold RATIO] ...]
+
+The construction includes the validation of `macros.types`. Each phase is
+timed on a newly built specification, so no phase benefits from the caches
+of the previous one, and the memory peaks are measured in separate runs, as
+tracing the allocations slows the code down.
+
+With `--baseline`, the shapes of stored results are benchmarked, and the
+results are compared with them: the exit status is 1 when a phase regressed,
+see `benchmarks.compare`. The shapes that got slower are run again, up to
+`--retries` times, before a regression is reported. The results are then
+only written with `--output`, which cannot be the baseline: updating it is
+left to a run without `--baseline`.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from benchmarks import compare
+from benchmarks.generator import SHAPES, Shape, generate
+from writableopenapi.openapi.v3_1 import OpenAPI
+from writableopenapi.utils import into_json, into_yaml
+
+FORMAT = 1
+"""The version of the format of the results."""
+
+PHASES: Dict[str, Callable[[OpenAPI], Any]] = {
+    "dump": lambda api: api.dump(),
+    "into_json": into_json,
+    "into_yaml": into_yaml,
+}
+"""The phases timed on a built specification, besides the construction."""
+
+DEFAULT_SHAPES = [name for name in SHAPES if name != "large"]
+"""The shapes benchmarked by default, the large one taking minutes."""
+
+DEFAULT_OUTPUT = "benchmark-results.json"
+"""Where the results are written without `--baseline` or `--output`."""
+
+
+def _time(function: Callable[[], Any]) -> float:
+    # The garbage of the previous runs is not collected during this one.
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _peak(function: Callable[[], Any]) -> int:
+    """Returns the peak of the memory allocated while calling a function."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def time_phases(shape: Shape, repeat: int) -> Dict[str, List[float]]:
+    """Returns the times of the runs of each phase of a shape."""
+    runs = {"build": [_time(lambda: generate(shape)) for _ in range(repeat)]}
+    for name, phase in PHASES.items():
+        runs[name] = []
+        for _ in range(repeat):
+            api = generate(shape)
+            runs[name].append(_time(lambda: phase(api)))
+    return runs
+
+
+def run(shape: Shape, repeat: int) -> Dict[str, Any]:
+    """Benchmarks a shape, and returns its results."""
+    api = generate(shape)
+    result: Dict[str, Any] = {
+        "shape": shape.asdict(),
+        "nodes": sum(1 for _ in api.walk()),
+        "json_bytes": len(into_json(api)),
+        "phases": {},
+    }
+
+    runs = time_phases(shape, repeat)
+    peaks = {"build": _peak(lambda: generate(shape))}
+    for name, phase in PHASES.items():
+        api = generate(shape)
+        peaks[name] = _peak(lambda: phase(api))
+
+    for name, times in runs.items():
+        result["phases"][name] = {
+            "best": min(times),
+            "runs": times,
+            "peak_bytes": peaks[name],
+        }
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--shapes", nargs="+", choices=list(SHAPES), default=DEFAULT_SHAPES
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        help=f"where to write the results, {DEFAULT_OUTPUT} by default "
+        "without --baseline",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="benchmark the shapes of stored results, and compare with them",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="how many times the shapes that got slower are run again",
+    )
+    compare.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    shapes = {name: SHAPES[name] for name in args.shapes}
+    output = args.output
+    if output is None and not args.baseline:
+        output = DEFAULT_OUTPUT
+    baseline = None
+    if args.baseline:
+        if output is not None and os.path.realpath(output) == os.path.realpath(
+            args.baseline
+        ):
+            print(f"{output} is the baseline, it would be overwritten")
+            return 2
+        baseline = compare.load(args.baseline)
+        if baseline is None:
+            return 2
+        if baseline.get("format") != FORMAT:
+            print(f"{args.baseline} is not in format {FORMAT}")
+            return 2
+        shapes = {
+            name: Shape(**result["shape"])
+            for name, result in baseline["shapes"].items()
+        }
+
+    results: Dict[str, Any] = {
+        "format": FORMAT,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "shapes": {},
+    }
+    print(f"best of {args.repeat}, peak memory")
+    header = "".join(f"{name:>22}" for name in ["build", *PHASES])
+    print(f"{'':<20}{'nodes':>8}{header}")
+    for name, shape in shapes.items():
+        result = results["shapes"][name] = run(shape, args.repeat)
+        row = f"{name:<20}{result['nodes']:>8}"
+        for phase in result["phases"].values():
+            best = phase["best"] * 1000
+            peak = phase["peak_bytes"] / 2**20
+            row += f"{best:>10.1f}ms{peak:>8.1f}MiB"
+        print(row)
+
+    comparisons: List[compare.Comparison] = []
+    for attempt in range(args.retries + 1 if baseline else 0):
+        comparisons = compare.compare(
+            baseline,
+            results,
+            args.threshold,
+            args.memory_threshold,
+            args.noise_factor,
+        )
+        slower = {
+            c.shape
+            for c in comparisons
+            if c.status == compare.REGRESSED and c.metric == "time"
+        }
+        if not slower or attempt == args.retries:
+            break
+        # A slowdown is confirmed by running the phases again: the best run
+        # of a shape that is really slower does not get faster.
+        print(f"running {', '.join(sorted(slower))} again")
+        for name in sorted(slower):
+            phases = results["shapes"][name]["phases"]
+            for phase, times in time_phases(shapes[name], args.repeat).items():
+                phases[phase]["runs"].extend(times)
+                phases[phase]["best"] = min(phases[phase]["runs"])
+
+    if output is not None:
+        with open(output, "w") as fp:
+            json.dump(results, fp, indent=2)
+            fp.write("\n")
+        print(f"results written to {output}")
+
+    if baseline is None:
+        return 0
+    return 0 if compare.report(baseline, results, comparisons) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Times validating a specification in a single walk, serially and on a pool of
+processes, against the separate walks of `walk()` and of the reference check
+it replaces, as the number of path items grows.
+
+    python -m benchmarks.validation [--paths N ...] [--workers N] [--repeat N]
+        [--start-method METHOD]
+"""
+
+import argparse
+import multiprocessing
+import time
+from typing import Any, Callable, List, Optional
+from benchmarks.sharing import petstore
+from writableopenapi.references import Resolver
+from writableopenapi.validation import Validator
+
+
+def _best(function: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--paths", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--start-method", choices=multiprocessing.get_all_start_methods()
+    )
+    args = parser.parse_args(argv)
+    context = multiprocessing.get_context(args.start_method)
+
+    validator = Validator()
+    print(
+        f"best of {args.repeat}, {args.workers} workers, "
+        f"{context.get_start_method()} start method"
+    )
+    print(f"{'paths':>8}{'walk':>12}{'check':>12}{'serial':>12}{'pool':>12}")
+    for paths in args.paths:
+        api = petstore(paths, share=False)
+        walk = _best(lambda: sum(1 for _ in api.walk()), args.repeat)
+        check = _best(lambda: Resolver(api).check(), args.repeat)
+        serial = _best(lambda: validator.validate(api), args.repeat)
+        pool = _best(
+            lambda: validator.validate(api, args.workers, context),
+            args.repeat,
+        )
+        print(
+            f"{paths:>8}{walk * 1000:>10.1f}ms{check * 1000:>10.1f}ms"
+            f"{serial * 1000:>10.1f}ms{pool * 1000:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
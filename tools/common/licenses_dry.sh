@@ -6,4 +6,4 @@
 
 # Requires Google's addlicense: https://github.com/google/addlicense
 
-addlicense -c="Nicolas Paul" -check -l=bsd -v writableopenapi writableopenapitests tools .github
\ No newline at end of file
+addlicense -c="Nicolas Paul" -check -l=bsd -v writableopenapi writableopenapitests benchmarks tools .github
\ No newline at end of file
@@ -1,3 +1,455 @@
 # Copyright (c) 2023 Nicolas Paul All rights reserved.
 # Use of this source code is governed by a BSD-style
 # license that can be found in the LICENSE file.
+
+"""
+Writes the OpenAPI specifications defined in a Python module or file.
+
+    python -m writableopenapi TARGET [--json PATH] [--yaml PATH]
+        [--compact-json PATH] [--watch [--interval SECONDS]]
+        [--cache DIRECTORY] [--profile PATH]
+
+TARGET is a module name or the path of a Python file, optionally followed by
+`:NAME` to select a single specification, or a function returning one. The
+specifications are otherwise the `OpenAPI` objects found in the module. The
+paths may contain `{name}`, replaced by the name of each specification, and
+`-` writes to the standard output.
+
+The time taken by each phase is printed on the standard error: `import` runs
+the module, building the specifications it defines, `build` calls the
+function of the target if any, `serialize` walks the trees once and encodes
+them in each format as they are walked, and `write` writes the files.
+
+Files already holding their content are left untouched, and the others are
+replaced atomically. With `--watch`, the modules are polled, and when some
+change, they are reloaded with the modules importing them, and the
+specifications are written again.
+
+With `--cache`, the build is stored in the directory, and when the sources of
+the modules imported and writableopenapi are unchanged, the outputs are
+written from the cache without importing anything. Otherwise, the JSON
+encodings of the path items that did not change are reused.
+
+With `--profile`, the first build is profiled with cProfile, and the
+statistics are written to the path, to be read with `pstats`. The time spent
+dumping each class of objects and each path item is printed as well, see
+`writableopenapi.profiling`.
+"""
+
+import argparse
+import cProfile
+import hashlib
+import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import io
+import os
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from types import ModuleType
+from typing import (
+    Dict,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from writableopenapi.cache import (
+    Build,
+    BuildCache,
+    source_digests,
+    value_digest,
+    version,
+)
+from writableopenapi.openapi.v3_1 import OpenAPI, SpecificationExtension
+from writableopenapi.profiling import profile_dump
+from writableopenapi.stream import FRAGMENTED_FORMATS, write_formats
+from writableopenapi.utils import write_files
+from writableopenapi.watch import Watcher
+
+PHASES = ("import", "build", "serialize", "write")
+
+_OPTIONS = {
+    "json": "--json",
+    "json-compact": "--compact-json",
+    "yaml": "--yaml",
+}
+
+
+class Timings:
+    """The time spent in each phase, in seconds."""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the time spent in the block to a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def report(self, fp: IO[str]) -> None:
+        """Prints the phases and their total."""
+        for name, spent in self.phases.items():
+            print(f"{name:<10}{spent * 1000:>10.1f}ms", file=fp)
+        total = sum(self.phases.values())
+        print(f"{'total':<10}{total * 1000:>10.1f}ms", file=fp)
+
+
+def _is_file(target: str) -> bool:
+    return target.endswith(".py") or os.path.isfile(target)
+
+
+class _FileFinder(importlib.abc.MetaPathFinder):
+    """Finds the files imported by `load_module`, so they can be reloaded."""
+
+    def __init__(self) -> None:
+        self.paths: Dict[str, str] = {}
+        """The paths of the files, by module name."""
+
+    def find_spec(
+        self,
+        name: str,
+        path: Optional[Sequence[str]],
+        target: Optional[ModuleType] = None,
+    ) -> Optional[importlib.machinery.ModuleSpec]:
+        location = self.paths.get(name)
+        if location is None:
+            return None
+        return importlib.util.spec_from_file_location(name, location)
+
+
+_FINDER = _FileFinder()
+
+
+def load_module_name(target: str) -> str:
+    """
+    Returns the name of the module of a target, see `load_module`. Files get
+    a private name derived from their path, so they do not shadow the
+    modules named after them, such as `json.py` would.
+    """
+    if not _is_file(target):
+        return target
+    digest = hashlib.sha256(os.path.abspath(target).encode()).hexdigest()
+    return f"_writableopenapi_spec_{digest[:16]}"
+
+
+def load_module(target: str) -> ModuleType:
+    """
+    Imports a module by name, or a Python file by path. The directory of a
+    file is added at the end of the module search path, so it can import its
+    siblings that are not shadowed by other modules.
+    """
+    if not _is_file(target):
+        return importlib.import_module(target)
+
+    path = os.path.abspath(target)
+    directory = os.path.dirname(path)
+    name = load_module_name(target)
+    if directory not in sys.path:
+        sys.path.append(directory)
+    if _FINDER not in sys.meta_path:
+        sys.meta_path.append(_FINDER)
+    _FINDER.paths[name] = path
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"cannot import {target}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def find_specifications(
+    module: ModuleType, name: Optional[str] = None
+) -> Dict[str, OpenAPI]:
+    """
+    Returns the specifications of a module by name: the one named `name`,
+    called first if it is a function, or all the `OpenAPI` objects of the
+    module.
+    """
+    if name is not None:
+        value = getattr(module, name)
+        if not isinstance(value, OpenAPI) and callable(value):
+            value = value()
+        if not isinstance(value, OpenAPI):
+            kind = type(value).__name__
+            raise TypeError(f"{name} is a {kind}, not an OpenAPI object")
+        return {name: value}
+
+    found: Dict[str, OpenAPI] = {}
+    seen = set()
+    for key, value in vars(module).items():
+        if isinstance(value, OpenAPI) and id(value) not in seen:
+            seen.add(id(value))
+            found[key] = value
+    return found
+
+
+def _parse_target(target: str) -> Tuple[str, Optional[str]]:
+    """Splits `module:name`, leaving Windows drive letters alone."""
+    head, sep, tail = target.rpartition(":")
+    if sep and tail and tail.isidentifier() and len(head) > 1:
+        return head, tail
+    return target, None
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m writableopenapi",
+        description=__doc__.split("\n\n")[1],
+    )
+    parser.add_argument("target", help="module name or Python file")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="write the specifications again when their modules change",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="how often the modules are polled in watch mode",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIRECTORY",
+        help="reuse the previous builds stored in the directory",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="write the cProfile statistics of the build to the path",
+    )
+    for name, option in _OPTIONS.items():
+        parser.add_argument(
+            option,
+            dest=name,
+            metavar="PATH",
+            help=f"write the specifications as {name.replace('-', ' ')}",
+        )
+    return parser
+
+
+def _build(
+    target: str, name: Optional[str], timings: Timings
+) -> Dict[str, OpenAPI]:
+    """Imports the target, and returns its specifications."""
+    with timings.phase("import"):
+        module = load_module(target)
+    with timings.phase("build"):
+        return find_specifications(module, name)
+
+
+def _serialize(
+    specifications: Dict[str, OpenAPI],
+    outputs: Dict[str, str],
+    timings: Timings,
+    fragments: Optional[Dict[str, Dict[str, str]]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Encodes the specifications, and returns the (path, content) of each
+    output.
+
+    `fragments` maps the JSON formats to the encodings of path items, by
+    digest of their dump, which are reused, and it is replaced with the
+    encodings of the current path items.
+    """
+    contents: List[Tuple[str, str]] = []
+    with timings.phase("serialize"):
+        encoded: Dict[str, Dict[int, str]] = {}
+        digests: Dict[int, str] = {}
+        for key, api in specifications.items():
+            items = []
+            if fragments is not None:
+                items = [
+                    item
+                    for item in api.paths.values()
+                    if isinstance(item, SpecificationExtension)
+                ]
+                for item in items:
+                    digests[id(item)] = value_digest(item.cached_dump())
+                for fmt in FRAGMENTED_FORMATS:
+                    cached = fragments.get(fmt, {})
+                    reused = encoded.setdefault(fmt, {})
+                    for item in items:
+                        if digests[id(item)] in cached:
+                            reused[id(item)] = cached[digests[id(item)]]
+            # The tree is walked once, and the walk is written in each format.
+            files = [(fmt, io.StringIO()) for fmt in outputs]
+            write_formats(api, files, deferred=items, fragments=encoded)
+            for fmt, fp in files:
+                path = outputs[fmt].replace("{name}", key)
+                contents.append((path, fp.getvalue()))
+
+    if fragments is not None:
+        fragments.clear()
+        for fmt in FRAGMENTED_FORMATS:
+            if fmt in encoded:
+                fragments[fmt] = {
+                    digest: encoded[fmt][identity]
+                    for identity, digest in digests.items()
+                    if identity in encoded[fmt]
+                }
+    return contents
+
+
+def _write(contents: List[Tuple[str, str]], timings: Timings) -> List[str]:
+    """
+    Writes the outputs, and returns the paths of the files written: files
+    whose content did not change are not written again.
+    """
+    files = [(path, content) for path, content in contents if path != "-"]
+    with timings.phase("write"):
+        for path, content in contents:
+            if path == "-":
+                sys.stdout.write(content)
+                if not content.endswith("\n"):
+                    sys.stdout.write("\n")
+                sys.stdout.flush()
+        report = write_files(files, max_workers=min(len(files), 8))
+    return report.changed
+
+
+def _watch(
+    target: str,
+    name: Optional[str],
+    outputs: Dict[str, str],
+    interval: float,
+    imported: Iterable[str],
+) -> None:
+    """
+    Polls the target and the `imported` modules, and writes the
+    specifications again when they change, until interrupted.
+    """
+    module = sys.modules[load_module_name(target)]
+    watcher = Watcher([module])
+    watcher.track_new(imported)
+    print(
+        f"watching {len(watcher.modules)} modules, press Ctrl+C to stop",
+        file=sys.stderr,
+    )
+    while True:
+        time.sleep(interval)
+        timings = Timings()
+        try:
+            with timings.phase("import"):
+                reloaded = watcher.poll()
+            if module.__name__ not in reloaded:
+                continue
+            with timings.phase("build"):
+                specifications = find_specifications(module, name)
+            contents = _serialize(specifications, outputs, timings)
+            paths = _write(contents, timings)
+        except Exception:
+            traceback.print_exc()
+            continue
+        print(f"reloaded {', '.join(reloaded)}", file=sys.stderr)
+        for path in paths:
+            print(f"wrote {path}", file=sys.stderr)
+        timings.report(sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return _main(args, profiler)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+
+
+def _main(
+    args: argparse.Namespace, profiler: Optional[cProfile.Profile]
+) -> int:
+    outputs = {name: getattr(args, name) for name in _OPTIONS}
+    outputs = {name: path for name, path in outputs.items() if path}
+    if not outputs:
+        outputs = {"json": "-"}
+
+    timings = Timings()
+    target, name = _parse_target(args.target)
+    cache = key = build = None
+    if args.cache:
+        cache = BuildCache(args.cache)
+        location = os.path.abspath(target) if _is_file(target) else target
+        key = cache.key(location, name, outputs)
+        build = cache.load(key)
+        if build is not None and build.fresh() and not args.watch:
+            _write([tuple(output) for output in build.outputs], timings)
+            print("cache hit", file=sys.stderr)
+            timings.report(sys.stderr)
+            return 0
+
+    before = set(sys.modules)
+    specifications = _build(target, name, timings)
+    imported = set(sys.modules) - before
+    if not specifications:
+        print(f"no OpenAPI object found in {target}", file=sys.stderr)
+        return 1
+    if len(specifications) > 1:
+        for path in outputs.values():
+            if path != "-" and "{name}" not in path:
+                print(
+                    f"{len(specifications)} specifications found in "
+                    f"{target}, {path} should contain {{name}}",
+                    file=sys.stderr,
+                )
+                return 2
+
+    if cache is None:
+        contents = _serialize(specifications, outputs, timings)
+    else:
+        fragments = {} if build is None else build.fragments
+        contents = _serialize(specifications, outputs, timings, fragments)
+        modules = [
+            sys.modules[name] for name in imported if name in sys.modules
+        ]
+        modules.append(sys.modules[load_module_name(target)])
+        with timings.phase("write"):
+            cache.save(
+                key,
+                Build(
+                    version=version(),
+                    sources=source_digests(modules),
+                    outputs=contents,
+                    fragments=fragments,
+                ),
+            )
+    _write(contents, timings)
+    timings.report(sys.stderr)
+    if profiler is not None:
+        # Only the first build is profiled, not the dumps below or watching.
+        profiler.disable()
+        for key, api in specifications.items():
+            print(f"\n{key}", file=sys.stderr)
+            profile_dump(api).report(sys.stderr)
+    if args.watch:
+        try:
+            _watch(target, name, outputs, args.interval, imported)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
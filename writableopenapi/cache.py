@@ -0,0 +1,136 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+On-disk cache of the builds of the command line.
+
+A build is stored with the digests of the sources of the modules it
+imported, and of writableopenapi itself. When none of them changed, the
+outputs are written from the cache without importing anything. Otherwise,
+the JSON encodings of the path items are reused, keyed by the digest of
+their dumps, so only the path items that changed are encoded again.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from importlib import metadata
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from writableopenapi.utils import module_source
+
+_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+_VERSION: Optional[str] = None
+
+
+def version() -> str:
+    """
+    Returns the version of writableopenapi, along with the digest of its
+    sources, so that a modified checkout does not reuse builds either.
+    """
+    global _VERSION
+    if _VERSION is None:
+        try:
+            release = metadata.version("writableopenapi")
+        except metadata.PackageNotFoundError:
+            release = "unknown"
+        digest = hashlib.sha256()
+        pattern = os.path.join(_PACKAGE, "**", "*.py")
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            digest.update(os.path.relpath(path, _PACKAGE).encode())
+            digest.update(file_digest(path).encode())
+        _VERSION = f"{release}+{digest.hexdigest()[:16]}"
+    return _VERSION
+
+
+def file_digest(path: str) -> str:
+    """Returns the SHA-256 digest of a file, or "" if it cannot be read."""
+    try:
+        with open(path, "rb") as fp:
+            return hashlib.file_digest(fp, "sha256").hexdigest()
+    except OSError:
+        return ""
+
+
+def source_digests(modules: Iterable[ModuleType]) -> Dict[str, str]:
+    """
+    Returns the digests of the sources of the modules, by path, leaving out
+    the modules of the standard library, of the installed packages and of
+    writableopenapi, which the version covers.
+    """
+    digests = {}
+    for module in modules:
+        path = module_source(module)
+        if path is not None:
+            digests[path] = file_digest(path)
+    return digests
+
+
+def value_digest(value: Any) -> str:
+    """Returns the digest of a dumped value."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+@dataclass
+class Build:
+    """A build stored in the cache."""
+
+    version: str
+    """The version of writableopenapi that made the build."""
+    sources: Dict[str, str] = field(default_factory=dict)
+    """The digests of the sources of the modules imported, by path."""
+    outputs: List[Tuple[str, str]] = field(default_factory=list)
+    """The (path, content) of the outputs, "-" being the standard output."""
+    fragments: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    """
+    The encodings of the path items, by format and by digest of their dump.
+    """
+
+    def fresh(self) -> bool:
+        """Returns whether writableopenapi and the sources are unchanged."""
+        if self.version != version() or not self.sources:
+            return False
+        return all(
+            file_digest(path) == digest for path, digest in self.sources.items()
+        )
+
+
+class BuildCache:
+    """A directory of builds, each stored as a JSON file."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Returns the key of a build from what identifies it."""
+        encoded = json.dumps(parts, sort_keys=True)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Build]:
+        """Returns a build, or None if it is missing or unreadable."""
+        try:
+            with open(self._path(key), encoding="utf-8") as fp:
+                return Build(**json.load(fp))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, key: str, build: Build) -> None:
+        """Stores a build, replacing the previous one atomically."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(asdict(build), fp)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
@@ -0,0 +1,352 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Hoisting of the objects inlined several times into the components.
+
+Each object and value gets a structural identifier, the same for equal
+dumps, in a single bottom-up pass over the tree: an object, a mapping or a
+list is identified by the identifiers of its items, which are interned, so
+the cost is linear in the size of the tree. The objects are not dumped, and
+their cached dumps are neither used nor filled.
+
+The structures are then decided from the largest to the smallest: the
+objects inside an occurrence that is replaced by a reference are not
+counted, and the ones inside the occurrences left inline are.
+"""
+
+import heapq
+import json
+import re
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from writableopenapi.openapi.v3_1 import (
+    Components,
+    Header,
+    OpenAPI,
+    Parameter,
+    Reference,
+    Response,
+    Schema,
+    SpecificationExtension,
+)
+
+SECTIONS: Dict[type, str] = {
+    Schema: "schemas",
+    Parameter: "parameters",
+    Response: "responses",
+    Header: "headers",
+}
+"""The classes that can be hoisted, and their section of the components."""
+
+_INVALID_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+@dataclass
+class HoistReport:
+    """What `hoist_components` did to a specification."""
+
+    hoisted: List[str] = field(default_factory=list)
+    """The references of the components that were added."""
+    replaced: int = 0
+    """The number of inline objects replaced by references."""
+    size_before: int = 0
+    """The size of the specification as compact JSON before, in bytes."""
+    size_after: int = 0
+    """The size of the specification as compact JSON after, in bytes."""
+
+    @property
+    def saved(self) -> int:
+        """The number of bytes saved."""
+        return self.size_before - self.size_after
+
+
+class _Structures:
+    """
+    Identifies objects and values by the structure of their dumps, and
+    computes the size of their encoding as compact JSON, i.e.
+    `json.dumps(value.dump())`.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[Hashable, int] = {}
+        self.sizes: List[int] = []
+        """The sizes of the structures, by identifier."""
+        # The identifiers of the objects, mappings and lists, by identity, so
+        # the ones met several times are identified once.
+        self._containers: Dict[int, int] = {}
+        # The members of the objects, extensions first, by identity.
+        self._members: Dict[int, Dict[str, Any]] = {}
+
+    def _intern(self, key: Hashable, size: int) -> int:
+        sid = self._ids.get(key)
+        if sid is None:
+            sid = self._ids[key] = len(self.sizes)
+            self.sizes.append(size)
+        return sid
+
+    def _scalar(self, value: Any) -> int:
+        try:
+            key = (type(value), value)
+            sid = self._ids.get(key)
+        except TypeError:
+            key = (type(value), repr(value))
+            sid = self._ids.get(key)
+        if sid is None:
+            sid = self._intern(key, len(json.dumps(value)))
+        return sid
+
+    def _item(self, value: Any) -> int:
+        if isinstance(value, (dict, list, tuple, SpecificationExtension)):
+            return self._containers[id(value)]
+        return self._scalar(value)
+
+    def _contents(self, value: Any) -> Any:
+        """Returns the mapping of the members of an object, or the value."""
+        if not isinstance(value, SpecificationExtension):
+            return value
+        members = self._members.get(id(value))
+        if members is None:
+            members = self._members[id(value)] = dict(value.extensions)
+            members.update(value.members())
+        return members
+
+    def identify(self, root: Any) -> int:
+        """Returns the identifier of an object or a value, and of its items."""
+        stack = [(root, False)]
+        while stack:
+            container, ready = stack.pop()
+            if not isinstance(
+                container, (dict, list, tuple, SpecificationExtension)
+            ):
+                continue
+            if id(container) in self._containers:
+                continue
+            value = self._contents(container)
+            items = value.values() if isinstance(value, dict) else value
+            if not ready:
+                stack.append((container, True))
+                stack.extend((item, False) for item in items)
+                continue
+
+            # Items are separated by ", " and keys by ": ".
+            size = 2 + 2 * max(len(value) - 1, 0)
+            if isinstance(value, dict):
+                members = []
+                for k, v in value.items():
+                    sid = self._item(v)
+                    members.append((k, sid))
+                    if not isinstance(k, str):
+                        k = json.dumps(k)
+                    size += len(json.dumps(k)) + 2 + self.sizes[sid]
+                key = (dict, frozenset(members))
+            else:
+                sids = tuple(self._item(v) for v in value)
+                size += sum(self.sizes[sid] for sid in sids)
+                key = (list, sids)
+            self._containers[id(container)] = self._intern(key, size)
+
+        return self._item(root)
+
+
+@dataclass
+class _Occurrences:
+    """The places where a structure appears in the tree."""
+
+    first: SpecificationExtension
+    """The first object met with the structure."""
+    slots: List[Tuple[SpecificationExtension, Any, Any, Any]] = field(
+        default_factory=list
+    )
+    """The (owner, holder, key, object) of each occurrence, see `_children`."""
+    definition: Optional[str] = None
+    """The name of the existing component with the structure."""
+    walked: int = 0
+    """The number of leading occurrences whose objects were walked."""
+
+
+def _children(
+    node: SpecificationExtension,
+) -> Iterable[Tuple[Any, Any, SpecificationExtension]]:
+    """
+    Yields the objects held by an object as (holder, key, child), where the
+    holder is the object itself for its fields, or the list or dictionary
+    holding the child.
+    """
+    for f in fields(node):
+        if not f.init or not f.metadata.get("dumped", True):
+            continue
+        stack = [(node, f.name, getattr(node, f.name))]
+        while stack:
+            holder, key, value = stack.pop()
+            if isinstance(value, SpecificationExtension):
+                yield holder, key, value
+            elif isinstance(value, list):
+                items = [(value, i, v) for i, v in enumerate(value)]
+                stack.extend(reversed(items))
+            elif isinstance(value, dict):
+                items = [(value, k, v) for k, v in value.items()]
+                stack.extend(reversed(items))
+
+
+def _name(node: SpecificationExtension, used: Dict[str, Any]) -> str:
+    """Returns an unused component name for an object."""
+    if isinstance(node, Schema) and node.title:
+        base = _INVALID_NAME_CHARACTERS.sub("", node.title)
+    elif isinstance(node, Parameter) and node.name:
+        base = _INVALID_NAME_CHARACTERS.sub("", node.name)
+    else:
+        base = ""
+    if base and base not in used:
+        return base
+    base = base or type(node).__name__
+    n = 1
+    while f"{base}{n}" in used:
+        n += 1
+    return f"{base}{n}"
+
+
+def _reference_size(section: str, name: str) -> int:
+    """Returns the size of a reference to a component, as compact JSON."""
+    return len(json.dumps({"$ref": f"#/components/{section}/{name}"}))
+
+
+def hoist_components(
+    api: OpenAPI, classes: Iterable[type] = tuple(SECTIONS)
+) -> HoistReport:
+    """
+    Moves the objects of the given classes that appear several times in the
+    specification into its components, and replaces them with references.
+
+    Objects are compared by their dumps, so distinct but equal objects are
+    hoisted together, and inline objects equal to an existing component are
+    replaced with references to it. An object is only hoisted when the
+    references take fewer bytes than its copies, so small schemas such as
+    `{"type": "string"}` stay inline. The components are named after the
+    titles of the schemas and the names of the parameters, or after their
+    class.
+
+    Frozen objects, such as the ones returned by the macros under
+    `interning()`, are not modified: they may be replaced by references, but
+    the objects they hold are left inline.
+    """
+    classes = tuple(classes)
+    structures = _Structures()
+    report = HoistReport()
+    report.size_before = structures.sizes[structures.identify(api)]
+
+    components = api.components
+    occurrences: Dict[Tuple[type, int], _Occurrences] = {}
+    # The structures to decide, the largest first, see `_Structures`.
+    queue: List[Tuple[int, int, Tuple[type, int]]] = []
+
+    def occurrences_of(node: SpecificationExtension) -> _Occurrences:
+        key = (type(node), structures.identify(node))
+        found = occurrences.get(key)
+        if found is None:
+            found = occurrences[key] = _Occurrences(node)
+            size = structures.sizes[key[1]]
+            heapq.heappush(queue, (-size, len(occurrences), key))
+        return found
+
+    # The existing components are the definitions of their structures.
+    sections = set()
+    if components is not None:
+        for cls in classes:
+            section = getattr(components, SECTIONS[cls]) or {}
+            sections.add(id(section))
+            for name, node in section.items():
+                if isinstance(node, cls):
+                    found = occurrences_of(node)
+                    if found.definition is None:
+                        found.definition = name
+
+    # Only the first occurrence of a structure is walked at first: what the
+    # other ones hold is walked once the structure is left inline, and
+    # disappears otherwise. Frozen objects, such as the ones interned by the
+    # macros, may be shared with other trees and cannot be modified: they are
+    # hoisted as a whole, or not at all.
+    walked: Set[int] = set()
+
+    def walk(node: SpecificationExtension) -> None:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node._hash is not None or id(node) in walked:
+                continue
+            walked.add(id(node))
+            children = list(_children(node))
+            for holder, key, child in reversed(children):
+                if not isinstance(child, classes) or id(holder) in sections:
+                    stack.append(child)
+                    continue
+                found = occurrences_of(child)
+                if not found.slots and found.definition is None:
+                    stack.append(child)
+                    found.walked = 1
+                found.slots.append((node, holder, key, child))
+
+    walk(api)
+
+    # The components are set before any reference to them is, and copied
+    # when they are frozen.
+    if components is None:
+        components = Components()
+    elif components._hash is not None:
+        components = replace(components)
+    # The sections of the components are copied once each, as they may be
+    # shared with other specifications, and set once they are added to.
+    copies: Dict[str, Dict[str, Any]] = {}
+    added: Set[str] = set()
+
+    while queue:
+        _, _, (cls, sid) = heapq.heappop(queue)
+        found = occurrences[(cls, sid)]
+        section = SECTIONS[cls]
+        size = structures.sizes[sid]
+        name = found.definition
+        if name is not None:
+            hoisted = (
+                bool(found.slots) and _reference_size(section, name) < size
+            )
+        elif len(found.slots) < 2:
+            hoisted = False
+        else:
+            used = copies.get(section)
+            if used is None:
+                used = dict(getattr(components, section) or {})
+                copies[section] = used
+            name = _name(found.first, used)
+            # The component is worth it when the references and the
+            # component entry take less space than the copies.
+            saved = len(found.slots) * (size - _reference_size(section, name))
+            hoisted = saved > len(json.dumps(name)) + 2 + size
+            if hoisted:
+                if section not in added:
+                    added.add(section)
+                    setattr(components, section, used)
+                used[name] = found.first
+                if api.components is not components:
+                    api.components = components
+                report.hoisted.append(f"#/components/{section}/{name}")
+        if not hoisted:
+            # The occurrences are left inline, with what they hold.
+            for _, _, _, child in found.slots[found.walked :]:
+                walk(child)
+            continue
+
+        reference = Reference(ref=f"#/components/{section}/{name}")
+        for owner, holder, key, _ in found.slots:
+            if holder is owner:
+                setattr(owner, key, reference)
+            else:
+                holder[key] = reference
+                owner.invalidate()
+            report.replaced += 1
+
+    if added:
+        components.invalidate()
+    after = _Structures()
+    report.size_after = after.sizes[after.identify(api)]
+    return report
@@ -0,0 +1,373 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Loading of parsed JSON or YAML documents back into objects, the reverse of
+`dump()`.
+
+Each class gets a table mapping the OpenAPI names of its fields to their
+attributes and to the functions decoding their values, computed once from
+the type hints of the fields. Loading an object is then a lookup per member.
+Members that are not fields are loaded as `extensions`, so loading a dump and
+dumping it again gives the same document. The fields dumped as their string
+representation, such as `MediaType.example`, load the values that are not
+strings as `Verbatim`, so they are dumped back as they were.
+"""
+
+import json
+import yaml
+from functools import partial
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Self,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from writableopenapi.openapi import v3_1
+from writableopenapi.openapi.v3_1 import (
+    Components,
+    LazyDict,
+    OpenAPI,
+    Reference,
+    SpecificationExtension,
+    Verbatim,
+)
+from writableopenapi.references import pointer
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+
+class _Loader(_SafeLoader):
+    """Loads YAML with the keys of the mappings as strings, like JSON."""
+
+    def construct_mapping(self, node: Any, deep: bool = False) -> Any:
+        mapping = super().construct_mapping(node, deep)
+        if all(isinstance(key, str) for key in mapping):
+            return mapping
+        return {_key(key): value for key, value in mapping.items()}
+
+
+T = TypeVar("T", bound=SpecificationExtension)
+
+Decoder = Callable[[Any], Any]
+"""Turns a parsed value into the value of a field."""
+
+
+class LoadError(ValueError):
+    """A document that does not describe the objects it is loaded into."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+        # The keys leading to the value, innermost first while the error
+        # goes up the loaders.
+        self._keys: List[Union[str, int]] = []
+
+    @property
+    def path(self) -> v3_1.DumpPath:
+        """The keys and indices leading to the value, like `walk()`."""
+        return tuple(reversed(self._keys))
+
+    def __str__(self) -> str:
+        if not self._keys:
+            return self.message
+        return f"{pointer(self.path)}: {self.message}"
+
+
+class _Table:
+    """How the members of the dumps of a class are loaded."""
+
+    __slots__ = ("cls", "fields", "inline")
+
+    def __init__(self, cls: type) -> None:
+        self.cls = cls
+        self.fields: Dict[str, Tuple[str, Optional[Decoder]]] = {}
+        """The attribute and the decoder of the fields, by OpenAPI name."""
+        self.inline: Optional[Tuple[str, Optional[Decoder]]] = None
+        """The attribute and the decoder of the items of an inline field."""
+
+
+_TABLES: Dict[type, _Table] = {}
+
+
+def _key(key: Any) -> str:
+    """Returns a key of a mapping as a string, the way JSON encodes it."""
+    if isinstance(key, str):
+        return key
+    if isinstance(key, (bool, type(None))):
+        return json.dumps(key)
+    return str(key)
+
+
+def _load_object(table: _Table, data: Any) -> Any:
+    if not isinstance(data, dict):
+        name = table.cls.__name__
+        raise LoadError(f"{name} must be a mapping, not {type(data).__name__}")
+    arguments: Dict[str, Any] = {}
+    extensions: Dict[str, Any] = {}
+    inline: Dict[str, Any] = {}
+    table_fields = table.fields
+    for key, value in data.items():
+        if type(key) is not str:
+            key = _key(key)
+        entry = table_fields.get(key)
+        if entry is not None:
+            attribute, decode = entry
+            target, name = arguments, attribute
+        elif table.inline is not None and not key.startswith("x-"):
+            decode = table.inline[1]
+            target, name = inline, key
+        else:
+            extensions[key] = value
+            continue
+        if decode is not None and value is not None:
+            try:
+                value = decode(value)
+            except LoadError as error:
+                error._keys.append(key)
+                raise
+        target[name] = value
+    if table.inline is not None:
+        arguments[table.inline[0]] = inline
+    if extensions:
+        arguments["extensions"] = extensions
+    try:
+        return table.cls(**arguments)
+    except (TypeError, ValueError) as error:
+        raise LoadError(f"invalid {table.cls.__name__}: {error}") from error
+
+
+def _text(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    return Verbatim(value)
+
+
+def _object_decoder(cls: type) -> Decoder:
+    # The tables refer to each other, so they are looked up when loading.
+    def decode(value: Any) -> Any:
+        return _load_object(_TABLES[cls], value)
+
+    return decode
+
+
+def _list_decoder(decode_item: Decoder) -> Decoder:
+    def decode(value: Any) -> Any:
+        if not isinstance(value, list):
+            raise LoadError(f"expected a list, not {type(value).__name__}")
+        items = []
+        for index, item in enumerate(value):
+            try:
+                items.append(decode_item(item))
+            except LoadError as error:
+                error._keys.append(index)
+                raise
+        return items
+
+    return decode
+
+
+def _dict_decoder(decode_item: Decoder) -> Decoder:
+    def decode(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise LoadError(f"expected a mapping, not {type(value).__name__}")
+        items = {}
+        for key, item in value.items():
+            if type(key) is not str:
+                key = _key(key)
+            try:
+                items[key] = decode_item(item)
+            except LoadError as error:
+                error._keys.append(key)
+                raise
+        return items
+
+    return decode
+
+
+def _union_decoder(
+    reference: bool,
+    mapping: Optional[Decoder],
+    sequence: Optional[Decoder],
+    plain: bool,
+) -> Decoder:
+    """
+    Decodes the values of a union by their type: mappings holding a `$ref`
+    are references, other mappings and lists are decoded by the decoders of
+    the alternatives, and other values are kept as is when the union has
+    alternatives holding no objects.
+    """
+    decode_reference = _object_decoder(Reference)
+
+    def decode(value: Any) -> Any:
+        if isinstance(value, dict):
+            if reference and "$ref" in value:
+                return decode_reference(value)
+            if mapping is not None:
+                return mapping(value)
+        elif isinstance(value, list) and sequence is not None:
+            return sequence(value)
+        if not plain:
+            name = type(value).__name__
+            raise LoadError(f"expected an object, not {name}")
+        return value
+
+    return decode
+
+
+def _decoder(hint: Any, cls: type) -> Optional[Decoder]:
+    """
+    Returns the decoder of the values of a type hint, or None when they are
+    kept as is. `Self` stands for `cls`.
+    """
+    if hint is Self:
+        hint = cls
+    if isinstance(hint, type) and issubclass(hint, SpecificationExtension):
+        return _object_decoder(hint)
+    origin = get_origin(hint)
+    args = get_args(hint)
+    if origin is list:
+        item = _decoder(args[0], cls)
+        return None if item is None else _list_decoder(item)
+    if origin is dict:
+        item = _decoder(args[1], cls)
+        return None if item is None else _dict_decoder(item)
+    if origin is not Union:
+        return None
+
+    alternatives = [arg for arg in args if arg is not type(None)]
+    if len(alternatives) == 1:
+        return _decoder(alternatives[0], cls)
+    reference = Reference in alternatives
+    mapping = sequence = None
+    plain = False
+    for alternative in alternatives:
+        if alternative is Reference:
+            continue
+        decode = _decoder(alternative, cls)
+        if decode is None:
+            plain = True
+        elif get_origin(alternative) is list:
+            sequence = decode
+        else:
+            mapping = decode
+    if not reference and mapping is None and sequence is None:
+        return None
+    return _union_decoder(reference, mapping, sequence, plain)
+
+
+def _compile_table(cls: type) -> _Table:
+    """Computes the table of a class from its dump plan and type hints."""
+    table = _Table(cls)
+    hints = get_type_hints(cls)
+    for attribute, key, kind, _ in cls._plan:
+        hint = hints[attribute]
+        if kind == v3_1._INLINE:
+            # The items of the mapping are the members of the object.
+            table.inline = (attribute, _decoder(get_args(hint)[1], cls))
+        elif kind == v3_1._NESTED:
+            table.fields[key] = (attribute, _decoder(hint, cls))
+        elif kind == v3_1._TEXT:
+            table.fields[key] = (attribute, _text)
+        else:
+            table.fields[key] = (attribute, None)
+    return table
+
+
+for _cls in vars(v3_1).values():
+    if isinstance(_cls, type) and issubclass(_cls, SpecificationExtension):
+        _TABLES[_cls] = _compile_table(_cls)
+
+
+def _lazy_decoder(decode_item: Decoder) -> Decoder:
+    def decode(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise LoadError(f"expected a mapping, not {type(value).__name__}")
+        if not all(type(key) is str for key in value):
+            value = {_key(key): item for key, item in value.items()}
+        return LazyDict(value, decode_item)
+
+    return decode
+
+
+def _compile_lazy_table(cls: type) -> _Table:
+    """
+    Computes the table of a class whose mappings of objects are loaded as
+    `LazyDict`, and whose objects are loaded with the lazy tables.
+    """
+    table = _compile_table(cls)
+    hints = get_type_hints(cls)
+    for key, (attribute, decode) in table.fields.items():
+        if decode is None:
+            continue
+        hint = hints[attribute]
+        args = get_args(hint)
+        if get_origin(hint) is Union and len(args) == 2 and type(None) in args:
+            hint = args[0] if args[1] is type(None) else args[1]
+        if get_origin(hint) is dict:
+            item = _decoder(get_args(hint)[1], cls)
+            table.fields[key] = (attribute, _lazy_decoder(item))
+        elif hint in _LAZY_TABLES:
+            lazy = _LAZY_TABLES[hint]
+            table.fields[key] = (attribute, partial(_load_object, lazy))
+    return table
+
+
+_LAZY_TABLES: Dict[type, _Table] = {}
+"""The tables loading the path items and the components on first access."""
+_LAZY_TABLES[Components] = _compile_lazy_table(Components)
+_LAZY_TABLES[OpenAPI] = _compile_lazy_table(OpenAPI)
+
+
+def from_dict(
+    data: Dict[str, Any], cls: Type[T] = OpenAPI, lazy: bool = False
+) -> T:
+    """
+    Builds an object, by default a specification, and its descendants from
+    its dump, such as parsed JSON or YAML. Raises `LoadError` when the
+    document does not fit the objects.
+
+    The lists and dictionaries of plain values are shared with `data`.
+
+    With `lazy`, the path items and the entries of the components are kept
+    as raw data in `LazyDict` mappings, and only loaded when they are first
+    read: the errors they hold are raised then. The ones that are never read
+    are dumped and serialized from their raw data.
+
+    Loading allocates a lot of objects and frees none, so the collections of
+    the garbage collector it triggers scan the new objects over and over: on
+    large documents, they take about half of the time. Callers loading such
+    documents may pause it around the call with `gc.disable()`, see
+    `python -m benchmarks.loading`.
+    """
+    if lazy and cls in _LAZY_TABLES:
+        return _load_object(_LAZY_TABLES[cls], data)
+    return _load_object(_TABLES[cls], data)
+
+
+def load_json(fp: IO[str], cls: Type[T] = OpenAPI, lazy: bool = False) -> T:
+    """Loads an object from a JSON text file object, see `from_dict`."""
+    return from_dict(json.load(fp), cls, lazy)
+
+
+def load_yaml(fp: IO[str], cls: Type[T] = OpenAPI, lazy: bool = False) -> T:
+    """
+    Loads an object from a YAML text file object, using LibYAML when PyYAML
+    has been built with it, see `from_dict`. The keys of the mappings are
+    loaded as strings, such as the unquoted status codes of the responses.
+    """
+    return from_dict(yaml.load(fp, Loader=_Loader), cls, lazy)
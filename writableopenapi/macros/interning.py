@@ -0,0 +1,86 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, TypeVar
+from writableopenapi.openapi.v3_1 import SpecificationExtension
+
+_T = TypeVar("_T", bound=Callable[..., SpecificationExtension])
+
+_TABLE: ContextVar[Optional[Dict[Hashable, Any]]] = ContextVar(
+    "writableopenapi.macros.interning", default=None
+)
+
+
+@contextmanager
+def interning() -> Iterator[None]:
+    """
+    Makes the macros return frozen objects, shared between the calls with the
+    same arguments, and between the calls returning equal objects.
+
+    Macros called again with the same arguments return the object built the
+    first time, without validating the arguments again, and equal objects
+    built from different arguments are deduplicated, provided their values
+    have the same types, so equality checks and hashes of the returned
+    objects are cheap. The objects passed to the macros are frozen too.
+
+    Interning lasts until the outermost `interning()` block exits.
+    """
+    table = _TABLE.get()
+    token = _TABLE.set({} if table is None else table)
+    try:
+        yield
+    finally:
+        _TABLE.reset(token)
+
+
+def _key(value: Any) -> Hashable:
+    """
+    Returns a hashable key for an argument or an object, freezing the
+    objects. Unlike equality, the key tells the types of the values apart, so
+    `True`, `1` and `1.0` have different keys.
+    """
+    if isinstance(value, SpecificationExtension):
+        value.freeze()
+        members = tuple((k, _key(v)) for k, v in value.members())
+        return (type(value), _key(value.extensions), members)
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_key(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, tuple((k, _key(v)) for k, v in value.items()))
+    hash(value)
+    return (type(value), value)
+
+
+def interned(macro: _T) -> _T:
+    """Lets a macro intern the objects it returns, see `interning`."""
+
+    @wraps(macro)
+    def wrapper(*args: Any, **kwargs: Any) -> SpecificationExtension:
+        table = _TABLE.get()
+        if table is None:
+            return macro(*args, **kwargs)
+
+        try:
+            key = (macro, _key(args), _key(kwargs))
+        except TypeError:
+            # Some argument is not hashable: the call cannot be cached.
+            key = None
+        else:
+            value = table.get(key)
+            if value is not None:
+                return value
+
+        value = macro(*args, **kwargs).freeze()
+        # Equal objects are deduplicated by their key rather than by
+        # equality, which would merge `Schema(example=1)` and
+        # `Schema(example=True)`.
+        value = table.setdefault(_key(value), value)
+        if key is not None:
+            table[key] = value
+        return value
+
+    return wrapper
@@ -2,9 +2,11 @@
 # Use of this source code is governed by a BSD-style
 # license that can be found in the LICENSE file.
 
+from writableopenapi.macros.interning import interned
 from writableopenapi.openapi.v3_1 import Schema
 
 
+@interned
 def one_of(*one_of: Schema) -> Schema:
     """
     A one of.
@@ -12,6 +14,7 @@ def one_of(*one_of: Schema) -> Schema:
     return Schema(one_of=[s for s in one_of])
 
 
+@interned
 def any_of(*any_of: Schema) -> Schema:
     """
     An any of.
@@ -19,6 +22,7 @@ def any_of(*any_of: Schema) -> Schema:
     return Schema(any_of=[s for s in any_of])
 
 
+@interned
 def all_of(*all_of: Schema) -> Schema:
     """
     An all of.
@@ -26,6 +30,7 @@ def all_of(*all_of: Schema) -> Schema:
     return Schema(all_of=[s for s in all_of])
 
 
+@interned
 def not_(not_: Schema) -> Schema:
     """
     A not.
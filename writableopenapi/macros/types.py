@@ -4,6 +4,7 @@
 
 import re
 from typing import Any, Dict, List, Optional, Union
+from writableopenapi.macros.interning import interned
 from writableopenapi.openapi.v3_1 import ExternalDocumentation, Reference, Schema
 
 _INT8_MIN = -128
@@ -41,6 +42,7 @@ _IPV4_REGEX = r"^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$"
 _IPV6_REGEX = r"^(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$"
 
 
+@interned
 def integer(
     minimum: Optional[int] = None,
     maximum: Optional[int] = None,
@@ -111,6 +113,7 @@ def integer(
     )
 
 
+@interned
 def int8(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -147,6 +150,7 @@ def int8(
     )
 
 
+@interned
 def int16(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -190,6 +194,7 @@ def int16(
     )
 
 
+@interned
 def int32(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -233,6 +238,7 @@ def int32(
     )
 
 
+@interned
 def int64(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -276,6 +282,7 @@ def int64(
     )
 
 
+@interned
 def int128(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -319,6 +326,7 @@ def int128(
     )
 
 
+@interned
 def uint8(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -362,6 +370,7 @@ def uint8(
     )
 
 
+@interned
 def uint16(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -405,6 +414,7 @@ def uint16(
     )
 
 
+@interned
 def uint32(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -448,6 +458,7 @@ def uint32(
     )
 
 
+@interned
 def uint64(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -491,6 +502,7 @@ def uint64(
     )
 
 
+@interned
 def uint128(
     example: Optional[int] = None,
     description: Optional[str] = None,
@@ -538,6 +550,7 @@ def uint128(
     )
 
 
+@interned
 def number(
     minimum: Optional[Union[int, float]] = None,
     maximum: Optional[Union[int, float]] = None,
@@ -582,6 +595,7 @@ def number(
     )
 
 
+@interned
 def floating(
     example: Optional[float] = None,
     description: Optional[str] = None,
@@ -615,6 +629,7 @@ def floating(
     )
 
 
+@interned
 def double(
     example: Optional[float] = None,
     description: Optional[str] = None,
@@ -647,6 +662,7 @@ def double(
     )
 
 
+@interned
 def string(
     minimum_length: Optional[int] = None,
     maximum_length: Optional[int] = None,
@@ -739,6 +755,7 @@ def string(
     )
 
 
+@interned
 def date(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -778,6 +795,7 @@ def date(
     )
 
 
+@interned
 def datetime(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -817,6 +835,7 @@ def datetime(
     )
 
 
+@interned
 def time(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -856,6 +875,7 @@ def time(
     )
 
 
+@interned
 def password(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -885,6 +905,7 @@ def password(
     )
 
 
+@interned
 def byte(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -914,6 +935,7 @@ def byte(
     )
 
 
+@interned
 def binary(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -943,6 +965,7 @@ def binary(
     )
 
 
+@interned
 def email(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -971,6 +994,7 @@ def email(
     )
 
 
+@interned
 def uuid(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -1009,6 +1033,7 @@ def uuid(
     )
 
 
+@interned
 def uri(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -1037,6 +1062,7 @@ def uri(
     )
 
 
+@interned
 def hostname(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -1065,6 +1091,7 @@ def hostname(
     )
 
 
+@interned
 def ipv4(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -1103,6 +1130,7 @@ def ipv4(
     )
 
 
+@interned
 def ipv6(
     example: Optional[str] = None,
     description: Optional[str] = None,
@@ -1141,6 +1169,7 @@ def ipv6(
     )
 
 
+@interned
 def boolean(
     example: Optional[bool] = None,
     description: Optional[str] = None,
@@ -1170,6 +1199,7 @@ def boolean(
     )
 
 
+@interned
 def null(
     example: Optional[None] = None,
     description: Optional[str] = None,
@@ -1196,6 +1226,7 @@ def null(
     )
 
 
+@interned
 def array(
     items: Union[Schema, Reference],
     minimum_length: Optional[int] = None,
@@ -1280,6 +1311,7 @@ def array(
     )
 
 
+@interned
 def object(
     properties: Dict[str, Union[Schema, Reference]],
     required: Optional[List[str]] = None,
@@ -1332,6 +1364,7 @@ def object(
     )
 
 
+@interned
 def string_enum(
     variants: List[str],
     default: Optional[str] = None,
@@ -1362,6 +1395,7 @@ def string_enum(
     )
 
 
+@interned
 def number_enum(
     variants: List[Union[int, float]],
     default: Optional[Union[int, float]] = None,
@@ -1392,6 +1426,7 @@ def number_enum(
     )
 
 
+@interned
 def integer_enum(
     variants: List[int],
     default: Optional[int] = None,
@@ -1422,6 +1457,7 @@ def integer_enum(
     )
 
 
+@interned
 def boolean_enum(
     variants: List[bool],
     default: Optional[bool] = None,
@@ -1452,6 +1488,7 @@ def boolean_enum(
     )
 
 
+@interned
 def any(
     description: Optional[str] = None,
     nullable: bool = False,
@@ -2,34 +2,911 @@
 # Use of this source code is governed by a BSD-style
 # license that can be found in the LICENSE file.
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, Union, Optional, List, Union, Self
+import bisect
+import weakref
+from types import MemberDescriptorType
+from dataclasses import MISSING, FrozenInstanceError, dataclass, field, fields
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    IO,
+    Iterator,
+    Optional,
+    List,
+    Tuple,
+    Union,
+    Self,
+    get_args,
+    get_type_hints,
+)
+
+_SCALAR = 0
+"""Kind of the fields holding plain values, dumped as is."""
+_NESTED = 1
+"""Kind of the fields that may hold objects, dumped recursively."""
+_TEXT = 2
+"""Kind of the fields dumped as their string representation, see `Verbatim`."""
+_INLINE = 3
+"""Kind of the mappings whose items are dumped as members of the object."""
+
+_REQUIRED_FIELD = {"required": True}
+"""Metadata of the fields dumped even when they are None."""
+_TEXT_FIELD = {"kind": _TEXT}
+"""Metadata of the fields dumped as their string representation."""
+_INLINE_FIELD = {"kind": _INLINE}
+"""Metadata of the mappings whose items are dumped as members of the object."""
+_OMITTED_FIELD = {"dumped": False}
+"""Metadata of the fields that are not dumped."""
+
+DumpPlan = Tuple[Tuple[str, str, int, bool], ...]
+"""
+The (attribute, key, kind, required) entries of the fields of a class, in the
+order they are dumped.
+"""
+
+DumpPath = Tuple[Union[str, int], ...]
+"""
+The keys and indices leading from an object to a value in its dump, e.g.
+`("paths", "/pets", "get")`.
+"""
+
+
+def _dump_value(
+    value: Any,
+    parent: "SpecificationExtension",
+    pending: List["SpecificationExtension"],
+) -> Any:
+    """
+    Dumps a member value, recursing into lists, tuples and dictionaries.
+
+    An object without a cached dump is not dumped here: an empty dictionary
+    becomes its cached dump, to be filled once the object is popped from
+    `pending`.
+    """
+    if isinstance(value, SpecificationExtension):
+        value._adopt(parent)
+        data = value._dump_cache
+        if data is None:
+            data = {}
+            object.__setattr__(value, "_dump_cache", data)
+            pending.append(value)
+        return data
+    if isinstance(value, (list, tuple)):
+        return [_dump_value(v, parent, pending) for v in value]
+    if type(value) is LazyDict:
+        return value._dump(parent, pending)
+    if isinstance(value, dict):
+        return {k: _dump_value(v, parent, pending) for k, v in value.items()}
+    return value
+
+
+def _dump_new_value(
+    value: Any,
+    parent: "SpecificationExtension",
+    pending: List[Tuple["SpecificationExtension", Dict[str, Any]]],
+) -> Any:
+    """
+    Dumps a member value like `_dump_value`, without the cached dumps: a copy
+    of the extensions of each object is returned, filled right away when the
+    object holds no other objects, or else once the object and the
+    dictionary are popped from `pending`.
+    """
+    if isinstance(value, SpecificationExtension):
+        data: Dict[str, Any] = value.extensions.copy()
+        if value._shape.leaf if value._sparse else value._leaf:
+            value._dump_fields(data, pending, _dump_new_value)
+        else:
+            pending.append((value, data))
+        return data
+    # The objects held by dictionaries and lists, the most common values,
+    # are handled in the loops rather than by a call for each.
+    if type(value) is dict:
+        data = {}
+        for k, v in value.items():
+            if not isinstance(v, SpecificationExtension):
+                data[k] = _dump_new_value(v, parent, pending)
+                continue
+            data[k] = child = v.extensions.copy()
+            if v._shape.leaf if v._sparse else v._leaf:
+                v._dump_fields(child, pending, _dump_new_value)
+            else:
+                pending.append((v, child))
+        return data
+    if isinstance(value, (list, tuple)):
+        items = []
+        for v in value:
+            if not isinstance(v, SpecificationExtension):
+                items.append(_dump_new_value(v, parent, pending))
+                continue
+            child = v.extensions.copy()
+            if v._shape.leaf if v._sparse else v._leaf:
+                v._dump_fields(child, pending, _dump_new_value)
+            else:
+                pending.append((v, child))
+            items.append(child)
+        return items
+    if type(value) is LazyDict:
+        raw = value._raw
+        return {
+            k: v if k in raw else _dump_new_value(v, parent, pending)
+            for k, v in dict.items(value)
+        }
+    if isinstance(value, dict):
+        return {
+            k: _dump_new_value(v, parent, pending) for k, v in value.items()
+        }
+    return value
+
+
+def _objects(value: Any) -> Iterator["SpecificationExtension"]:
+    """Yields the objects held by a value, at any depth."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, SpecificationExtension):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+
+
+def _structural_hash(value: Any) -> int:
+    """
+    Hashes a value held by a frozen object, consistently with equality:
+    dictionaries are hashed regardless of the order of their items, and
+    objects by their cached hash.
+    """
+    if isinstance(value, (list, tuple)):
+        return hash(tuple(_structural_hash(v) for v in value))
+    if isinstance(value, dict):
+        return hash(
+            frozenset((k, _structural_hash(v)) for k, v in value.items())
+        )
+    try:
+        return hash(value)
+    except TypeError:
+        return hash(type(value))
+
+
+class LazyDict(dict):
+    """
+    A dictionary whose values are kept as raw data, e.g. parsed JSON, until
+    they are first read, and then loaded into objects, see `loader.from_dict`.
+
+    Reading a value, iterating over the values or the items, or comparing
+    the dictionary loads the values involved. Dumping it, or streaming it
+    with `writableopenapi.stream`, does not: the values not loaded yet are
+    written from their raw data, which the dumps share.
+    """
+
+    __slots__ = ("_load", "_raw", "_parents")
+
+    def __init__(self, raw: Dict[Any, Any], load: Callable[[Any], Any]) -> None:
+        super().__init__(raw)
+        self._load = load
+        self._raw = set(raw)
+        """The keys of the values not loaded yet."""
+        # Weak references to the objects whose cached dump embeds this one's.
+        self._parents: Optional[Dict[int, weakref.ref]] = None
+
+    def _loaded(self, key: Any, value: Any) -> Any:
+        """Returns a value read from the dictionary, loading it if needed."""
+        if key not in self._raw:
+            return value
+        value = self._load(value)
+        dict.__setitem__(self, key, value)
+        self._raw.discard(key)
+        # The dumps embedding the raw data would not follow the changes of
+        # the new object, so they are rebuilt.
+        if self._parents is not None:
+            for ref in self._parents.values():
+                parent = ref()
+                if parent is not None:
+                    parent.invalidate()
+            self._parents = None
+        return value
+
+    def _load_all(self) -> None:
+        for key in list(self._raw):
+            self._loaded(key, dict.__getitem__(self, key))
+
+    @property
+    def pending(self) -> int:
+        """The number of values not loaded yet."""
+        return len(self._raw)
+
+    def raw_items(self) -> Iterator[Tuple[Any, Any]]:
+        """Yields the items, with the raw data of the values not loaded yet."""
+        return iter(dict.items(self))
+
+    def _dump(
+        self, parent: "SpecificationExtension", pending: List[Any]
+    ) -> Any:
+        if self._parents is None:
+            self._parents = {}
+        self._parents[id(parent)] = weakref.ref(parent)
+        raw = self._raw
+        return {
+            k: v if k in raw else _dump_value(v, parent, pending)
+            for k, v in dict.items(self)
+        }
 
+    def __getitem__(self, key: Any) -> Any:
+        return self._loaded(key, dict.__getitem__(self, key))
 
-@dataclass
-class SpecificationExtension:
-    extensions: Dict[str, Any] = field(default_factory=dict)
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            return default
+        return self[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        # Defined so that `dict(lazy)` reads the values through `__getitem__`.
+        return dict.__iter__(self)
+
+    def values(self) -> Any:
+        self._load_all()
+        return dict.values(self)
+
+    def items(self) -> Any:
+        self._load_all()
+        return dict.items(self)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        dict.__setitem__(self, key, value)
+        self._raw.discard(key)
+
+    def __delitem__(self, key: Any) -> None:
+        dict.__delitem__(self, key)
+        self._raw.discard(key)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._raw.clear()
+
+    def __or__(self, other: Any) -> Any:
+        return self.copy() | other
+
+    def __ior__(self, other: Any) -> Self:
+        self.update(other)
+        return self
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other: Any) -> Any:
+        self._load_all()
+        if type(other) is LazyDict:
+            other._load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> Any:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __reduce__(self) -> Any:
+        return (dict, (self.copy(),))
+
+
+class Verbatim:
+    """
+    A value of a field dumped as its string representation, such as
+    `MediaType.example`, that is dumped as is instead. The loader wraps the
+    values of these fields that are not strings, so they are dumped back as
+    they were loaded.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not Verbatim:
+            return NotImplemented
+        return self.value == other.value
+
+    def __hash__(self) -> int:
+        return _structural_hash(self.value)
+
+    def __repr__(self) -> str:
+        return f"Verbatim({self.value!r})"
+
+
+def _text(value: Any) -> Any:
+    """Returns the dump of the value of a field dumped as a string."""
+    if type(value) is Verbatim:
+        return value.value
+    return str(value)
+
+
+def _compile_function(name: str, lines: List[str], **namespace: Any) -> Any:
+    """Compiles the lines of a function, its body indented by four spaces."""
+    exec("\n".join(lines), namespace)
+    return namespace[name]
+
+
+def _dump_pending(
+    pending: List[Tuple["SpecificationExtension", Dict[str, Any]]]
+) -> None:
+    """
+    Fills the dumps of the objects left pending by `dump()`, and of the
+    objects they hold.
+    """
+    # The tree is walked with an explicit stack rather than recursively,
+    # so deeply nested objects do not hit the recursion limit.
+    while pending:
+        node, data = pending.pop()
+        node._dump_fields(data, pending, _dump_new_value)
+
+
+class _Cached:
+    """
+    The internal state of the objects, kept out of their dataclass fields so
+    `fields()`, `asdict()` and `astuple()` only see the OpenAPI ones. The
+    constructors set it first, see `_compile_init`, and the copies in
+    `__setstate__`.
+    """
+
+    # The cached dump of the object, None while the object is dirty, weak
+    # references to the objects whose cached dump embeds this one's, keyed by
+    # their identity, and the structural hash of the object once it is
+    # frozen, see `freeze`.
+    __slots__ = ("_dump_cache", "_parents", "_hash", "__weakref__")
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # The slotted dataclasses subclassing sparse ones get slots for the
+        # inherited fields too, which would hide the sparse fields.
+        if getattr(cls, "_sparse", False):
+            for name, position in cls._positions.items():
+                if isinstance(cls.__dict__.get(name), MemberDescriptorType):
+                    setattr(cls, name, _SparseField(name, position))
+        # The constructors of the classes subclassing the model ones, such as
+        # the ones generated by dataclasses, do not set the state. A
+        # `__getattr__` reading it as None would do, but it slows down every
+        # attribute access of every object.
+        if _COMPILED:
+            cls.__new__ = _new
+
+
+def _new(cls: type, *args: Any, **kwargs: Any) -> Any:
+    """Creates an object of a class subclassing a model one, see `_Cached`."""
+    self = object.__new__(cls)
+    object.__setattr__(self, "_dump_cache", None)
+    object.__setattr__(self, "_parents", None)
+    object.__setattr__(self, "_hash", None)
+    # Sparse objects are built with no field stored, see `_sparse`.
+    if cls._sparse:
+        object.__setattr__(self, "_shape", _shape_of(cls, ()))
+        object.__setattr__(self, "_values", ())
+    return self
+
+
+_COMPILED = False
+"""Whether the classes of the module are compiled, see `_compile_plans`."""
+
+
+@dataclass(slots=True)
+class SpecificationExtension(_Cached):
+    extensions: Dict[str, Any] = field(
+        default_factory=dict, metadata=_OMITTED_FIELD
+    )
     """Additional properties, names should be prefixed with `x-`."""
 
+    # How the fields of the class are dumped, see `_compile_plans`.
+    _plan = ()
+    # Whether the objects of the class never hold other objects, so they are
+    # dumped in a single pass, see `_dump_new_value`. Sparse objects tell by
+    # their shape.
+    _leaf = False
+    # Whether the class stores its fields sparsely, see `_sparse`.
+    _sparse = False
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        if self._hash is not None:
+            raise FrozenInstanceError(f"cannot assign to field {name!r}")
+        object.__setattr__(self, name, value)
+        if self._dump_cache is not None:
+            self.invalidate()
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            name = type(self).__name__
+            raise TypeError(f"unhashable type: '{name}', it must be frozen")
+        return self._hash
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        object.__setattr__(self, "_dump_cache", None)
+        object.__setattr__(self, "_parents", None)
+        object.__setattr__(self, "_hash", None)
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def _adopt(self, parent: "SpecificationExtension") -> None:
+        """Records that the dump of `parent` embeds the dump of the object."""
+        # Frozen objects never invalidate their parents, and interned ones
+        # may have a lot of them.
+        if self._hash is not None:
+            return
+        if self._parents is None:
+            self._parents = {}
+        # The identity of a collected parent may be reused by a new one,
+        # which must replace its dead reference.
+        ref = self._parents.get(id(parent))
+        if ref is None or ref() is not parent:
+            self._parents[id(parent)] = weakref.ref(parent)
+
+    def invalidate(self) -> None:
+        """
+        Marks the object and its ancestors as dirty, so their next cached
+        dump is rebuilt, see `cached_dump`.
+
+        Assigning a field does this automatically. It must be called by hand
+        after modifying a list or a dictionary held by the object in place,
+        the `extensions` included.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            parents = node._parents
+            # Parents register again when they are dumped, and the references
+            # to the collected ones are dropped.
+            node._parents = None
+            # The ancestors of a dirty object are dirty too.
+            if node._dump_cache is None:
+                continue
+            node._dump_cache = None
+            if parents is not None:
+                for ref in parents.values():
+                    parent = ref()
+                    if parent is not None:
+                        stack.append(parent)
+
+    def freeze(self) -> Self:
+        """
+        Freezes the object and its descendants, and returns it.
+
+        Assigning a field of a frozen object raises `FrozenInstanceError`, and
+        the lists and dictionaries it holds must not be modified in place
+        either. In return, frozen objects are hashable: their structural
+        hash is computed once, so equal objects have the same hash and
+        objects with different hashes are told apart without comparing
+        their fields. Copies of frozen objects are not frozen.
+        """
+        # Children are hashed before their parents.
+        stack = [(self, False)]
+        while stack:
+            node, ready = stack.pop()
+            if node._hash is not None:
+                continue
+            members = list(node.members())
+            if ready:
+                extensions = _structural_hash(node.extensions)
+                values = _structural_hash(members)
+                node._hash = hash((type(node), extensions, values))
+                continue
+            stack.append((node, True))
+            for key, value in members:
+                stack.extend((child, False) for child in _objects(value))
+            stack.extend((child, False) for child in _objects(node.extensions))
+        return self
+
+    def members(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Yields the fields of the object as (key, value) pairs.
+
+        Keys are the OpenAPI names of the fields, and values are not dumped:
+        nested objects are yielded as is. Extensions are not included.
+        """
+        for attribute, key, kind, required in self._plan:
+            value = getattr(self, attribute)
+            if value is None and not required:
+                continue
+            if kind == _INLINE:
+                yield from value.items()
+            elif kind == _TEXT:
+                yield key, _text(value)
+            else:
+                yield key, value
+
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
+        """
+        Writes the dumped fields of the object into `data`, after its
+        extensions, in the order of its plan. The values holding objects are
+        dumped by `dump_value`, see `_dump_value` and `_dump_new_value`, which
+        leave the objects in `pending`.
+        """
+
     def dump(self) -> Dict[str, Any]:
-        return self.extensions
+        """
+        Dumps the object into a dictionary.
+
+        The dump is built anew, from the current lists and dictionaries held
+        by the objects, and belongs to the caller. The plain values, such as
+        the lists of an `enum` or the raw data of a `LazyDict`, are shared
+        with the objects. See `cached_dump` to dump again without rebuilding
+        the unmodified branches.
+        """
+        data = dict(self.extensions)
+        pending: List[Tuple[SpecificationExtension, Dict[str, Any]]] = []
+        self._dump_fields(data, pending, _dump_new_value)
+        if pending:
+            _dump_pending(pending)
+        return data
 
+    def cached_dump(self) -> Dict[str, Any]:
+        """
+        Dumps the object into a dictionary, like `dump()`, and caches it.
+
+        The dump is cached until the object, or one of its descendants, is
+        modified, so dumping again after a small change only rebuilds the
+        modified branch. Assigning a field is seen as a modification, but
+        modifying a list or a dictionary in place is not, see `invalidate`.
+        The returned dictionary is shared with the cache and the dumps of the
+        ancestors: it must not be modified.
+
+        Filling the cache takes up to three times as long as `dump()`, which
+        the serializers use as they usually dump a tree once. The cache pays
+        off from the first dump following an edit, see
+        `python -m benchmarks.caching`.
+        """
+        data = self._dump_cache
+        if data is not None:
+            return data
+
+        # The tree is walked with an explicit stack rather than recursively,
+        # so deeply nested objects do not hit the recursion limit. Parents
+        # embed the dumps of their children before they are filled.
+        data = dict(self.extensions)
+        object.__setattr__(self, "_dump_cache", data)
+        node = self
+        pending = []
+        try:
+            self._dump_fields(data, pending)
+            while pending:
+                node = pending.pop()
+                node_data = node._dump_cache
+                node_data.update(node.extensions)
+                node._dump_fields(node_data, pending)
+        except BaseException:
+            # Only the dumps that were filled are kept.
+            node.invalidate()
+            for node in pending:
+                node.invalidate()
+            raise
 
-@dataclass
+        return data
+
+    def walk(self) -> Iterator[Tuple[DumpPath, "SpecificationExtension"]]:
+        """
+        Yields the object and its descendants depth first, in the order of
+        their fields, with their paths from the object.
+
+        Objects that appear several times in the tree are yielded each time.
+        Like `dump()`, the tree is walked with an explicit stack.
+        """
+        stack: List[Tuple[DumpPath, Any]] = [((), self)]
+        while stack:
+            path, value = stack.pop()
+            if isinstance(value, SpecificationExtension):
+                yield path, value
+                items = list(value.members())
+            elif isinstance(value, (list, tuple)):
+                items = list(enumerate(value))
+            else:
+                items = list(value.items())
+            # Reversed, so the items are popped in order.
+            for key, item in reversed(items):
+                if isinstance(
+                    item, (SpecificationExtension, list, tuple, dict)
+                ):
+                    stack.append((path + (key,), item))
+
+    def iter_json(self, indent: Optional[int] = 2) -> Iterator[str]:
+        """
+        Encodes the object into JSON chunks, without dumping it first.
+
+        The output is the same as `json.dumps(self.dump(), indent=indent,
+        sort_keys=True)`.
+        """
+        from writableopenapi.stream import iter_json
+
+        return iter_json(self, indent=indent)
+
+    def write_json(self, fp: IO[str], indent: Optional[int] = 2) -> None:
+        """Writes the object as JSON into a text file object."""
+        from writableopenapi.stream import write_json
+
+        write_json(self, fp, indent=indent)
+
+    def write_yaml(self, fp: IO[str], indent: int = 2) -> None:
+        """
+        Writes the object as YAML into a text file object, without dumping it
+        first.
+        """
+        from writableopenapi.stream import write_yaml
+
+        write_yaml(self, fp, indent=indent)
+
+
+class _Shape:
+    """
+    The fields stored by sparse objects, shared by the objects of a class that
+    have the same fields set.
+    """
+
+    __slots__ = ("keys", "index", "positions", "plan", "leaf")
+
+    def __init__(self, cls: type, keys: Tuple[str, ...]) -> None:
+        self.keys = keys
+        """The names of the stored fields, in the order of the class fields."""
+        self.index = {key: i for i, key in enumerate(keys)}
+        """The index of the values of the stored fields."""
+        self.positions = tuple(cls._positions[key] for key in keys)
+        """The positions of the stored fields among the class fields."""
+        # The stored fields, and the required ones that are dumped as None,
+        # with the index of their value.
+        self.plan = tuple(
+            (self.index.get(attribute), key, kind)
+            for attribute, key, kind, required in cls._plan
+            if required or attribute in self.index
+        )
+        self.leaf = not any(
+            index is not None and kind in (_NESTED, _INLINE)
+            for index, key, kind in self.plan
+        )
+        """Whether the objects of the shape hold no other objects."""
+
+
+_SHAPES: Dict[Tuple[type, Tuple[str, ...]], _Shape] = {}
+
+
+def _shape_of(cls: type, keys: Tuple[str, ...]) -> _Shape:
+    """Returns the shape of the objects of a class storing some fields."""
+    shape = _SHAPES.get((cls, keys))
+    if shape is None:
+        shape = _SHAPES[(cls, keys)] = _Shape(cls, keys)
+    return shape
+
+
+class _SparseField:
+    """A field of sparse objects, None when it is not stored."""
+
+    __slots__ = ("name", "position")
+
+    def __init__(self, name: str, position: int) -> None:
+        self.name = name
+        self.position = position
+
+    def __get__(self, obj: Any, cls: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        index = obj._shape.index.get(self.name)
+        return None if index is None else obj._values[index]
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        shape = obj._shape
+        keys = shape.keys
+        values = obj._values
+        index = shape.index.get(self.name)
+        if index is not None:
+            if value is not None:
+                values = values[:index] + (value,) + values[index + 1 :]
+                object.__setattr__(obj, "_values", values)
+                return
+            keys = keys[:index] + keys[index + 1 :]
+            values = values[:index] + values[index + 1 :]
+        elif value is None:
+            return
+        else:
+            # Fields are stored in the order of the class fields, so the dump
+            # is the same whatever order they are set in.
+            index = bisect.bisect(shape.positions, self.position)
+            keys = keys[:index] + (self.name,) + keys[index:]
+            values = values[:index] + (value,) + values[index:]
+        object.__setattr__(obj, "_shape", _shape_of(type(obj), keys))
+        object.__setattr__(obj, "_values", values)
+
+
+class _Factory:
+    """The default of constructor arguments built by a default factory."""
+
+    def __repr__(self) -> str:
+        return "<factory>"
+
+
+_FACTORY = _Factory()
+
+
+def _sparse_members(self: Any) -> Iterator[Tuple[str, Any]]:
+    """Yields the members of a sparse object, from its stored fields."""
+    values = self._values
+    for index, key, kind in self._shape.plan:
+        value = None if index is None else values[index]
+        if kind == _INLINE:
+            yield from value.items()
+        elif kind == _TEXT:
+            yield key, _text(value)
+        else:
+            yield key, value
+
+
+def _sparse_dump_fields(
+    self: Any,
+    data: Dict[str, Any],
+    pending: List[Any],
+    dump_value: Callable[..., Any] = _dump_value,
+) -> None:
+    """Writes the dumped fields of a sparse object into a dictionary."""
+    # Only the stored fields are in the plan of the shape, and their values
+    # are never None.
+    values = self._values
+    for index, key, kind in self._shape.plan:
+        if index is None:
+            data[key] = None
+        elif kind == _SCALAR:
+            data[key] = values[index]
+        elif kind == _NESTED:
+            data[key] = dump_value(values[index], self, pending)
+        elif kind == _TEXT:
+            data[key] = _text(values[index])
+        else:
+            for k, v in values[index].items():
+                data[k] = dump_value(v, self, pending)
+
+
+def _sparse_setstate(self: Any, state: Dict[str, Any]) -> None:
+    """Restores a pickled or copied sparse object."""
+    object.__setattr__(self, "_shape", _shape_of(type(self), ()))
+    object.__setattr__(self, "_values", ())
+    SpecificationExtension.__setstate__(self, state)
+
+
+def _compile_init(cls: type, sparse: List[str]) -> Callable[..., None]:
+    """
+    Compiles the constructor of a class, which sets the internal state of
+    the object and then its fields, without going through `__setattr__`. The
+    `sparse` fields are stored in the shape and values of the object.
+    """
+    args = []
+    lines = [
+        "    _set(self, '_dump_cache', None)",
+        "    _set(self, '_parents', None)",
+        "    _set(self, '_hash', None)",
+    ]
+    if sparse:
+        lines += ["    keys = []", "    values = []"]
+    defaults = {}
+    for f in fields(cls):
+        default = f"_default_{f.name}"
+        if f.default_factory is not MISSING:
+            defaults[default] = f.default_factory
+            value = f"{default}() if {f.name} is _FACTORY else {f.name}"
+            args.append(f"{f.name}=_FACTORY")
+            lines.append(f"    {f.name} = {value}")
+        else:
+            defaults[default] = f.default
+            if f.init:
+                args.append(f"{f.name}={default}")
+            else:
+                lines.append(f"    {f.name} = {default}")
+        if f.name in sparse:
+            lines.append(f"    if {f.name} is not None:")
+            lines.append(f"        keys.append({f.name!r})")
+            lines.append(f"        values.append({f.name})")
+        else:
+            lines.append(f"    _set(self, {f.name!r}, {f.name})")
+    lines.insert(0, f"def __init__(self, {', '.join(args)}):")
+    if sparse:
+        lines.append(
+            "    _set(self, '_shape', _shape_of(self.__class__, tuple(keys)))"
+        )
+        lines.append("    _set(self, '_values', tuple(values))")
+    if hasattr(cls, "__post_init__"):
+        lines.append("    self.__post_init__()")
+    init = _compile_function(
+        "__init__",
+        lines,
+        _set=object.__setattr__,
+        _shape_of=_shape_of,
+        _FACTORY=_FACTORY,
+        **defaults,
+    )
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    # The signature of the dataclass constructor is kept, for the IDEs and
+    # the tools reading the type hints.
+    original = cls.__dict__.get("__init__")
+    if original is not None:
+        init.__annotations__ = dict(original.__annotations__)
+        init.__doc__ = original.__doc__
+    return init
+
+
+def _sparse(cls: type) -> type:
+    """
+    Rebuilds a dataclass so its objects only store the fields that are not
+    None, as a tuple of values and a shape naming them.
+
+    It suits the classes with many optional fields that are rarely set: an
+    object is as small as the fields it has, and dumping or walking it only
+    goes over them.
+    """
+    own = cls.__dict__.get("__annotations__", {})
+    names = [f.name for f in fields(cls) if f.name in own]
+    namespace = dict(cls.__dict__)
+    for name in names:
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace.update(
+        __slots__=("_shape", "_values"),
+        _sparse=True,
+        _positions={name: i for i, name in enumerate(names)},
+        members=_sparse_members,
+        _dump_fields=_sparse_dump_fields,
+        __setstate__=_sparse_setstate,
+    )
+    for i, name in enumerate(names):
+        namespace[name] = _SparseField(name, i)
+    cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+
+    # The constructor stores the fields that are not None all at once,
+    # instead of setting them one by one.
+    cls.__init__ = _compile_init(cls, names)
+
+    return cls
+
+
+@dataclass(slots=True)
 class Callback(SpecificationExtension):
     paths: Dict[str, Union["Reference", "PathItem"]] = field(
-        default_factory=dict
+        default_factory=dict, metadata=_INLINE_FIELD
     )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the callback into a dictionary."""
-        data = self.extensions
-        data.update({k: v.dump() for k, v in self.paths.items()})
-
-        return data
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
+        for key, value in self.paths.items():
+            data[key] = dump_value(value, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Components(SpecificationExtension):
     schemas: Optional[Dict[str, Union["Reference", "Schema"]]] = None
     responses: Optional[Dict[str, Union["Reference", "Response"]]] = None
@@ -45,45 +922,48 @@ class Components(SpecificationExtension):
     links: Optional[Dict[str, Union["Reference", "Link"]]] = None
     callbacks: Optional[Dict[str, Union["Reference", "Callback"]]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the components into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.schemas is not None:
-            data["schemas"] = {k: v.dump() for k, v in self.schemas.items()}
+            data["schemas"] = dump_value(self.schemas, self, pending)
         if self.responses is not None:
-            data["responses"] = {k: v.dump() for k, v in self.responses.items()}
+            data["responses"] = dump_value(self.responses, self, pending)
         if self.parameters is not None:
-            data["parameters"] = {
-                k: v.dump() for k, v in self.parameters.items()
-            }
+            data["parameters"] = dump_value(self.parameters, self, pending)
         if self.examples is not None:
-            data["examples"] = {k: v.dump() for k, v in self.examples.items()}
+            data["examples"] = dump_value(self.examples, self, pending)
         if self.request_bodies is not None:
-            data["requestBodies"] = {
-                k: v.dump() for k, v in self.request_bodies.items()
-            }
+            data["requestBodies"] = dump_value(
+                self.request_bodies, self, pending
+            )
         if self.headers is not None:
-            data["headers"] = {k: v.dump() for k, v in self.headers.items()}
+            data["headers"] = dump_value(self.headers, self, pending)
         if self.security_schemes is not None:
-            data["securitySchemes"] = {
-                k: v.dump() for k, v in self.security_schemes.items()
-            }
+            data["securitySchemes"] = dump_value(
+                self.security_schemes, self, pending
+            )
         if self.links is not None:
-            data["links"] = {k: v.dump() for k, v in self.links.items()}
+            data["links"] = dump_value(self.links, self, pending)
         if self.callbacks is not None:
-            data["callbacks"] = {k: v.dump() for k, v in self.callbacks.items()}
-
-        return data
+            data["callbacks"] = dump_value(self.callbacks, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Contact(SpecificationExtension):
     name: Optional[str] = None
     url: Optional[str] = None
     email: Optional[str] = None
 
-    def dump(self) -> Dict[str, str]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.name is not None:
             data["name"] = self.name
         if self.url is not None:
@@ -91,24 +971,24 @@ class Contact(SpecificationExtension):
         if self.email is not None:
             data["email"] = self.email
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Discriminator(SpecificationExtension):
-    property_name: str = ""
+    property_name: str = field(default="", metadata=_REQUIRED_FIELD)
     mapping: Optional[Dict[str, str]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["propertyName"] = self.property_name
         if self.mapping is not None:
             data["mapping"] = self.mapping
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Encoding(SpecificationExtension):
     content_type: Optional[str] = None
     headers: Optional[Dict[str, Union["Reference", "Header"]]] = None
@@ -116,13 +996,16 @@ class Encoding(SpecificationExtension):
     explode: Optional[bool] = None
     allow_reserved: Optional[bool] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the encoding into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.content_type is not None:
             data["contentType"] = self.content_type
         if self.headers is not None:
-            data["headers"] = {k: v.dump() for k, v in self.headers.items()}
+            data["headers"] = dump_value(self.headers, self, pending)
         if self.style is not None:
             data["style"] = self.style
         if self.explode is not None:
@@ -130,14 +1013,12 @@ class Encoding(SpecificationExtension):
         if self.allow_reserved is not None:
             data["allowReserved"] = self.allow_reserved
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Example(SpecificationExtension):
     summary: Optional[str] = None
     description: Optional[str] = None
-    value: Optional[Any] = None
+    value: Optional[Any] = field(default=None, metadata=_TEXT_FIELD)
     external_value: Optional[str] = None
 
     def __post_init__(self):
@@ -146,36 +1027,39 @@ class Example(SpecificationExtension):
                 "Example cannot have both a value and an external value."
             )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the example into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.summary is not None:
             data["summary"] = self.summary
         if self.description is not None:
             data["description"] = self.description
         if self.value is not None:
-            data["value"] = str(self.value)
+            data["value"] = _text(self.value)
         if self.external_value is not None:
             data["externalValue"] = self.external_value
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class ExternalDocumentation(SpecificationExtension):
     description: Optional[str] = None
-    url: str = ""
-
-    def dump(self) -> Dict[str, str]:
-        data = self.extensions
+    url: str = field(default="", metadata=_REQUIRED_FIELD)
+
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.description is not None:
             data["description"] = self.description
         data["url"] = self.url
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Header(SpecificationExtension):
     description: Optional[str] = None
     required: Optional[bool] = None
@@ -185,13 +1069,16 @@ class Header(SpecificationExtension):
     explode: Optional[bool] = None
     allow_reserved: Optional[bool] = None
     schema: Optional["Schema"] = None
-    example: Optional[Any] = None
+    example: Optional[Any] = field(default=None, metadata=_TEXT_FIELD)
     examples: Optional[Dict[str, "Example"]] = None
     content: Optional[Dict[str, "MediaType"]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the header into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.description is not None:
             data["description"] = self.description
         if self.required is not None:
@@ -207,45 +1094,45 @@ class Header(SpecificationExtension):
         if self.allow_reserved is not None:
             data["allowReserved"] = self.allow_reserved
         if self.schema is not None:
-            data["schema"] = self.schema.dump()
+            data["schema"] = dump_value(self.schema, self, pending)
         if self.example is not None:
-            data["example"] = self.example.__str__()
+            data["example"] = _text(self.example)
         if self.examples is not None:
-            data["examples"] = {k: v.dump() for k, v in self.examples.items()}
+            data["examples"] = dump_value(self.examples, self, pending)
         if self.content is not None:
-            data["content"] = {k: v.dump() for k, v in self.content.items()}
-
-        return data
+            data["content"] = dump_value(self.content, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Info(SpecificationExtension):
-    title: str = ""
+    title: str = field(default="", metadata=_REQUIRED_FIELD)
     description: Optional[str] = None
     terms_of_service: Optional[str] = None
     contact: Optional["Contact"] = None
     license: Optional["License"] = None
-    version: str = ""
-
-    def dump(self) -> Dict[str, str]:
-        data = self.extensions
+    version: str = field(default="", metadata=_REQUIRED_FIELD)
+
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["title"] = self.title
         if self.description is not None:
             data["description"] = self.description
         if self.terms_of_service is not None:
             data["termsOfService"] = self.terms_of_service
         if self.contact is not None:
-            data["contact"] = self.contact.dump()
+            data["contact"] = dump_value(self.contact, self, pending)
         if self.license is not None:
-            data["license"] = self.license.dump()
+            data["license"] = dump_value(self.license, self, pending)
         data["version"] = self.version
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class License(SpecificationExtension):
-    name: str = ""
+    name: str = field(default="", metadata=_REQUIRED_FIELD)
     url: Optional[str] = None
     identifier: Optional[str] = None
 
@@ -253,25 +1140,27 @@ class License(SpecificationExtension):
         if self.identifier is not None and self.url is not None:
             raise ValueError("License can't have both identifier and url.")
 
-    def dump(self) -> Dict[str, str]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["name"] = self.name
         if self.url is not None:
             data["url"] = self.url
         if self.identifier is not None:
             data["identifier"] = self.identifier
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Link(SpecificationExtension):
     operation_ref: Optional[str] = None
     operation_id: Optional[str] = None
     parameters: Optional[Dict[str, Any]] = None
     request_body: Optional[Any] = None
     description: Optional[str] = None
-    server: Optional["Server"] = None
+    server: Optional["Server"] = field(default=None, metadata=_OMITTED_FIELD)
 
     def __post_init__(self):
         if self.operation_ref is not None and self.operation_id is not None:
@@ -279,9 +1168,12 @@ class Link(SpecificationExtension):
                 "Link can't have both operation_ref and operation_id."
             )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the link into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.operation_ref is not None:
             data["operationRef"] = self.operation_ref
         if self.operation_id is not None:
@@ -293,13 +1185,11 @@ class Link(SpecificationExtension):
         if self.description is not None:
             data["description"] = self.description
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class MediaType(SpecificationExtension):
     schema: Optional[Union["Reference", "Schema"]] = None
-    example: Optional[Any] = None
+    example: Optional[Any] = field(default=None, metadata=_TEXT_FIELD)
     examples: Optional[Dict[str, Union["Reference", "Example"]]] = None
     encoding: Optional[Dict[str, "Encoding"]] = None
 
@@ -307,31 +1197,35 @@ class MediaType(SpecificationExtension):
         if self.examples is not None and self.example is not None:
             raise ValueError("MediaType can't have both examples and example.")
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the media type into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.schema is not None:
-            data["schema"] = self.schema.dump()
+            data["schema"] = dump_value(self.schema, self, pending)
         if self.example is not None:
-            data["example"] = self.example.__str__()
+            data["example"] = _text(self.example)
         if self.examples is not None:
-            data["examples"] = {k: v.dump() for k, v in self.examples.items()}
+            data["examples"] = dump_value(self.examples, self, pending)
         if self.encoding is not None:
-            data["encoding"] = {k: v.dump() for k, v in self.encoding.items()}
-
-        return data
+            data["encoding"] = dump_value(self.encoding, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class OAuthFlow(SpecificationExtension):
     authorization_url: Optional[str] = None
     token_url: Optional[str] = None
     refresh_url: Optional[str] = None
     scopes: Dict[str, str] = field(default_factory=dict)
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the OAuth flow into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.authorization_url is not None:
             data["authorizationUrl"] = self.authorization_url
         if self.token_url is not None:
@@ -341,64 +1235,69 @@ class OAuthFlow(SpecificationExtension):
         if self.scopes is not None:
             data["scopes"] = self.scopes
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class OAuthFlows(SpecificationExtension):
     implicit: Optional["OAuthFlow"] = None
     password: Optional["OAuthFlow"] = None
     client_credentials: Optional["OAuthFlow"] = None
     authorization_code: Optional["OAuthFlow"] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the OAuth flows into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.implicit is not None:
-            data["implicit"] = self.implicit.dump()
+            data["implicit"] = dump_value(self.implicit, self, pending)
         if self.password is not None:
-            data["password"] = self.password.dump()
+            data["password"] = dump_value(self.password, self, pending)
         if self.client_credentials is not None:
-            data["clientCredentials"] = self.client_credentials.dump()
+            data["clientCredentials"] = dump_value(
+                self.client_credentials, self, pending
+            )
         if self.authorization_code is not None:
-            data["authorizationCode"] = self.authorization_code.dump()
-
-        return data
+            data["authorizationCode"] = dump_value(
+                self.authorization_code, self, pending
+            )
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenAPI(SpecificationExtension):
-    openapi: str = "3.1.0"
-    info: "Info" = field(default_factory=Info)
+    openapi: str = field(default="3.1.0", metadata=_REQUIRED_FIELD)
+    info: "Info" = field(default_factory=Info, metadata=_REQUIRED_FIELD)
     servers: Optional[List["Server"]] = None
-    paths: Dict[str, "PathItem"] = field(default_factory=dict)
+    paths: Dict[str, "PathItem"] = field(
+        default_factory=dict, metadata=_REQUIRED_FIELD
+    )
     components: Optional["Components"] = None
     security: Optional[List["SecurityRequirement"]] = None
     tags: Optional[List["Tag"]] = None
     external_docs: Optional["ExternalDocumentation"] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the OpenAPI specification into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["openapi"] = self.openapi
-        data["info"] = self.info.dump()
+        data["info"] = dump_value(self.info, self, pending)
         if self.servers is not None:
-            data["servers"] = [server.dump() for server in self.servers]
-        data["paths"] = {
-            path: path_item.dump() for path, path_item in self.paths.items()
-        }
+            data["servers"] = dump_value(self.servers, self, pending)
+        data["paths"] = dump_value(self.paths, self, pending)
         if self.components is not None:
-            data["components"] = self.components.dump()
+            data["components"] = dump_value(self.components, self, pending)
         if self.security is not None:
-            data["security"] = [security.dump() for security in self.security]
+            data["security"] = dump_value(self.security, self, pending)
         if self.tags is not None:
-            data["tags"] = [tag.dump() for tag in self.tags]
+            data["tags"] = dump_value(self.tags, self, pending)
         if self.external_docs is not None:
-            data["externalDocs"] = self.external_docs.dump()
-
-        return data
+            data["externalDocs"] = dump_value(self.external_docs, self, pending)
 
 
+@_sparse
 @dataclass
 class Operation(SpecificationExtension):
     tags: Optional[List[str]] = None
@@ -409,45 +1308,15 @@ class Operation(SpecificationExtension):
     parameters: Optional[List[Union["Reference", "Parameter"]]] = None
     request_body: Optional[Union["Reference", "RequestBody"]] = None
     responses: Dict[str, Union["Reference", "Response"]] = field(
-        default_factory=dict
+        default_factory=dict, metadata=_REQUIRED_FIELD
     )
     callbacks: Optional[Dict[str, Union["Reference", "Callback"]]] = None
     deprecated: Optional[bool] = None
     security: Optional[List[Dict[str, List[str]]]] = None
     servers: Optional[List["Server"]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the operation into a dictionary."""
-        data = self.extensions
-        if self.tags is not None:
-            data["tags"] = self.tags
-        if self.summary is not None:
-            data["summary"] = self.summary
-        if self.description is not None:
-            data["description"] = self.description
-        if self.external_docs is not None:
-            data["externalDocs"] = self.external_docs.dump()
-        if self.operation_id is not None:
-            data["operationId"] = self.operation_id
-        if self.parameters is not None:
-            data["parameters"] = [
-                parameter.dump() for parameter in self.parameters
-            ]
-        if self.request_body is not None:
-            data["requestBody"] = self.request_body.dump()
-        data["responses"] = {k: v.dump() for k, v in self.responses.items()}
-        if self.callbacks is not None:
-            data["callbacks"] = {k: v.dump() for k, v in self.callbacks.items()}
-        if self.deprecated is not None:
-            data["deprecated"] = self.deprecated
-        if self.security is not None:
-            data["security"] = self.security
-        if self.servers is not None:
-            data["servers"] = [server.dump() for server in self.servers]
-
-        return data
-
 
+@_sparse
 @dataclass
 class Parameter(SpecificationExtension):
     name: str = ""
@@ -461,7 +1330,7 @@ class Parameter(SpecificationExtension):
     allow_reserved: Optional[bool] = None
     schema: Optional[Union["Reference", "Schema"]] = None
     examples: Optional[Dict[str, Union["Reference", "Example"]]] = None
-    example: Optional[Any] = None
+    example: Optional[Any] = field(default=None, metadata=_TEXT_FIELD)
     content: Optional[Dict[str, "MediaType"]] = None
 
     def __post_init__(self) -> None:
@@ -470,40 +1339,8 @@ class Parameter(SpecificationExtension):
                 "Parameter cannot have both example and examples defined."
             )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the parameter into a dictionary."""
-        data = self.extensions
-        if self.name is not None:
-            data["name"] = self.name
-        if self.in_ is not None:
-            data["in"] = self.in_
-        if self.description is not None:
-            data["description"] = self.description
-        if self.required is not None:
-            data["required"] = self.required
-        if self.deprecated is not None:
-            data["deprecated"] = self.deprecated
-        if self.allow_empty_value is not None:
-            data["allowEmptyValue"] = self.allow_empty_value
-        if self.style is not None:
-            data["style"] = self.style
-        if self.explode is not None:
-            data["explode"] = self.explode
-        if self.allow_reserved is not None:
-            data["allowReserved"] = self.allow_reserved
-        if self.schema is not None:
-            data["schema"] = self.schema.dump()
-        if self.examples is not None:
-            data["examples"] = {k: v.dump() for k, v in self.examples.items()}
-        if self.example is not None:
-            data["example"] = str(self.example)
-        if self.content is not None:
-            data["content"] = {k: v.dump() for k, v in self.content.items()}
-
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class PathItem(SpecificationExtension):
     summary: Optional[str] = None
     description: Optional[str] = None
@@ -518,113 +1355,125 @@ class PathItem(SpecificationExtension):
     servers: Optional[List["Server"]] = None
     parameters: Optional[List[Union["Reference", "Parameter"]]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the path item into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.summary is not None:
             data["summary"] = self.summary
         if self.description is not None:
             data["description"] = self.description
         if self.get is not None:
-            data["get"] = self.get.dump()
+            data["get"] = dump_value(self.get, self, pending)
         if self.put is not None:
-            data["put"] = self.put.dump()
+            data["put"] = dump_value(self.put, self, pending)
         if self.post is not None:
-            data["post"] = self.post.dump()
+            data["post"] = dump_value(self.post, self, pending)
         if self.delete is not None:
-            data["delete"] = self.delete.dump()
+            data["delete"] = dump_value(self.delete, self, pending)
         if self.options is not None:
-            data["options"] = self.options.dump()
+            data["options"] = dump_value(self.options, self, pending)
         if self.head is not None:
-            data["head"] = self.head.dump()
+            data["head"] = dump_value(self.head, self, pending)
         if self.patch is not None:
-            data["patch"] = self.patch.dump()
+            data["patch"] = dump_value(self.patch, self, pending)
         if self.trace is not None:
-            data["trace"] = self.trace.dump()
+            data["trace"] = dump_value(self.trace, self, pending)
         if self.servers is not None:
-            data["servers"] = [server.dump() for server in self.servers]
+            data["servers"] = dump_value(self.servers, self, pending)
         if self.parameters is not None:
-            data["parameters"] = [
-                parameter.dump() for parameter in self.parameters
-            ]
-
-        return data
+            data["parameters"] = dump_value(self.parameters, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Paths(SpecificationExtension):
-    paths: Dict[str, "PathItem"] = field(default_factory=dict)
+    paths: Dict[str, "PathItem"] = field(
+        default_factory=dict, metadata=_INLINE_FIELD
+    )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the paths into a dictionary."""
-        data = self.extensions
-        data.update({k: v.dump() for k, v in self.paths.items()})
-        return data
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
+        for key, value in self.paths.items():
+            data[key] = dump_value(value, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Reference(SpecificationExtension):
-    ref: str = ""
-
-    def dump(self) -> Dict[str, Any]:
-        data = self.extensions
+    ref: str = field(default="", metadata={"key": "$ref", "required": True})
+
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["$ref"] = self.ref
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class RequestBody(SpecificationExtension):
     description: Optional[str] = None
     content: Dict[str, "MediaType"] = field(default_factory=dict)
     required: Optional[bool] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the request body into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.description is not None:
             data["description"] = self.description
         if self.content is not None:
-            data["content"] = {k: v.dump() for k, v in self.content.items()}
+            data["content"] = dump_value(self.content, self, pending)
         if self.required is not None:
             data["required"] = self.required
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Response(SpecificationExtension):
-    description: str = ""
+    description: str = field(default="", metadata=_REQUIRED_FIELD)
     headers: Optional[Dict[str, Union["Reference", "Header"]]] = None
     content: Optional[Dict[str, "MediaType"]] = None
     links: Optional[Dict[str, Union["Reference", "Link"]]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the response into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["description"] = self.description
         if self.headers is not None:
-            data["headers"] = {k: v.dump() for k, v in self.headers.items()}
+            data["headers"] = dump_value(self.headers, self, pending)
         if self.content is not None:
-            data["content"] = {k: v.dump() for k, v in self.content.items()}
+            data["content"] = dump_value(self.content, self, pending)
         if self.links is not None:
-            data["links"] = {k: v.dump() for k, v in self.links.items()}
-        return data
+            data["links"] = dump_value(self.links, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Responses(SpecificationExtension):
     responses: Dict[str, Union["Reference", "Response"]] = field(
-        default_factory=dict
+        default_factory=dict, metadata=_REQUIRED_FIELD
     )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the responses into a dictionary."""
-        data = self.extensions
-        data["responses"] = {k: v.dump() for k, v in self.responses.items()}
-        return data
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
+        data["responses"] = dump_value(self.responses, self, pending)
 
 
+@_sparse
 @dataclass
 class Schema(SpecificationExtension):
     title: Optional[str] = None
@@ -667,105 +1516,29 @@ class Schema(SpecificationExtension):
 
     def __post_init__(self) -> None:
         """Post init hook."""
-        if self.read_only is not None and self.write_only is not None:
+        if self.read_only and self.write_only:
             raise ValueError("Cannot be both read-only and write-only.")
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the schema into a dictionary."""
-        data = self.extensions
-        if self.title is not None:
-            data["title"] = self.title
-        if self.multiple_of is not None:
-            data["multipleOf"] = self.multiple_of
-        if self.maximum is not None:
-            data["maximum"] = self.maximum
-        if self.exclusive_maximum is not None:
-            data["exclusiveMaximum"] = self.exclusive_maximum
-        if self.minimum is not None:
-            data["minimum"] = self.minimum
-        if self.exclusive_minimum is not None:
-            data["exclusiveMinimum"] = self.exclusive_minimum
-        if self.max_length is not None:
-            data["maxLength"] = self.max_length
-        if self.min_length is not None:
-            data["minLength"] = self.min_length
-        if self.pattern is not None:
-            data["pattern"] = self.pattern
-        if self.max_items is not None:
-            data["maxItems"] = self.max_items
-        if self.min_items is not None:
-            data["minItems"] = self.min_items
-        if self.unique_items is not None:
-            data["uniqueItems"] = self.unique_items
-        if self.max_properties is not None:
-            data["maxProperties"] = self.max_properties
-        if self.min_properties is not None:
-            data["minProperties"] = self.min_properties
-        if self.required is not None:
-            data["required"] = self.required
-        if self.enum is not None:
-            data["enum"] = self.enum
-        if self.type is not None:
-            data["type"] = self.type
-        if self.all_of is not None:
-            data["allOf"] = [v.dump() for v in self.all_of]
-        if self.one_of is not None:
-            data["oneOf"] = [v.dump() for v in self.one_of]
-        if self.any_of is not None:
-            data["anyOf"] = [v.dump() for v in self.any_of]
-        if self.not_ is not None:
-            data["not"] = self.not_.dump()
-        if self.items is not None:
-            if isinstance(self.items, list):
-                data["items"] = [v.dump() for v in self.items]
-            else:
-                data["items"] = self.items.dump()
-        if self.properties is not None:
-            data["properties"] = {
-                k: v.dump() for k, v in self.properties.items()
-            }
-        if self.additional_properties is not None:
-            if isinstance(self.additional_properties, bool):
-                data["additionalProperties"] = self.additional_properties
-            else:
-                data["additionalProperties"] = self.additional_properties.dump()
-        if self.description is not None:
-            data["description"] = self.description
-        if self.format is not None:
-            data["format"] = self.format
-        if self.default is not None:
-            data["default"] = self.default
-        if self.nullable is not None:
-            data["nullable"] = self.nullable
-        if self.discriminator is not None:
-            data["discriminator"] = self.discriminator.dump()
-        if self.read_only is not None:
-            data["readOnly"] = self.read_only
-        if self.write_only is not None:
-            data["writeOnly"] = self.write_only
-        if self.xml is not None:
-            data["xml"] = self.xml.dump()
-        if self.external_docs is not None:
-            data["externalDocs"] = self.external_docs.dump()
-        if self.example is not None:
-            data["example"] = self.example
-        if self.deprecated is not None:
-            data["deprecated"] = self.deprecated
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class SecurityRequirement(SpecificationExtension):
-    security_requirement: Dict[str, List[str]] = field(default_factory=dict)
+    security_requirement: Dict[str, List[str]] = field(
+        default_factory=dict, metadata=_INLINE_FIELD
+    )
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the security requirement into a dictionary."""
-        return {**self.extensions, **self.security_requirement}
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
+        for key, value in self.security_requirement.items():
+            data[key] = dump_value(value, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class SecurityScheme(SpecificationExtension):
-    type: str = ""
+    type: str = field(default="", metadata=_REQUIRED_FIELD)
     description: Optional[str] = None
     name: Optional[str] = None
     in_: Optional[str] = None
@@ -774,9 +1547,12 @@ class SecurityScheme(SpecificationExtension):
     flows: Optional["OAuthFlows"] = None
     open_id_connect_url: Optional[str] = None
 
-    def dump(self) -> Dict[str, Any]:
-        """Dumps the security scheme into a dictionary."""
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["type"] = self.type
         if self.description is not None:
             data["description"] = self.description
@@ -789,65 +1565,69 @@ class SecurityScheme(SpecificationExtension):
         if self.bearer_format is not None:
             data["bearerFormat"] = self.bearer_format
         if self.flows is not None:
-            data["flows"] = self.flows.dump()
+            data["flows"] = dump_value(self.flows, self, pending)
         if self.open_id_connect_url is not None:
             data["openIdConnectUrl"] = self.open_id_connect_url
 
-        return data
 
-
-@dataclass
+@dataclass(slots=True)
 class ServerVariable(SpecificationExtension):
     enum: Optional[List[str]] = None
-    default: str = ""
+    default: str = field(default="", metadata=_REQUIRED_FIELD)
     description: Optional[str] = None
 
-    def dump(self) -> Dict[str, Any]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.enum is not None:
             data["enum"] = self.enum
         data["default"] = self.default
         if self.description is not None:
             data["description"] = self.description
 
-        return data
-
 
-@dataclass
+@dataclass(slots=True)
 class Server(SpecificationExtension):
-    url: str = ""
+    url: str = field(default="", metadata=_REQUIRED_FIELD)
     description: Optional[str] = None
     variables: Optional[Dict[str, "ServerVariable"]] = None
 
-    def dump(self) -> Dict[str, Any]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["url"] = self.url
         if self.description is not None:
             data["description"] = self.description
         if self.variables is not None:
-            data["variables"] = {k: v.dump() for k, v in self.variables.items()}
-
-        return data
+            data["variables"] = dump_value(self.variables, self, pending)
 
 
-@dataclass
+@dataclass(slots=True)
 class Tag(SpecificationExtension):
-    name: str = ""
+    name: str = field(default="", metadata=_REQUIRED_FIELD)
     description: Optional[str] = None
     external_docs: Optional["ExternalDocumentation"] = None
 
-    def dump(self) -> Dict[str, Any]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         data["name"] = self.name
         if self.description is not None:
             data["description"] = self.description
         if self.external_docs is not None:
-            data["externalDocs"] = self.external_docs.dump()
+            data["externalDocs"] = dump_value(self.external_docs, self, pending)
 
-        return data
 
-
-@dataclass
+@dataclass(slots=True)
 class XML(SpecificationExtension):
     name: Optional[str] = None
     namespace: Optional[str] = None
@@ -855,8 +1635,12 @@ class XML(SpecificationExtension):
     attribute: Optional[bool] = None
     wrapped: Optional[bool] = None
 
-    def dump(self) -> Dict[str, Any]:
-        data = self.extensions
+    def _dump_fields(
+        self,
+        data: Dict[str, Any],
+        pending: List[Any],
+        dump_value: Callable[..., Any] = _dump_value,
+    ) -> None:
         if self.name is not None:
             data["name"] = self.name
         if self.namespace is not None:
@@ -868,4 +1652,93 @@ class XML(SpecificationExtension):
         if self.wrapped is not None:
             data["wrapped"] = self.wrapped
 
-        return data
+
+def _camel_case(name: str) -> str:
+    """Converts a field name to its OpenAPI name, e.g. `in_` to `in`."""
+    head, *tail = name.rstrip("_").split("_")
+    return head + "".join(word.capitalize() for word in tail)
+
+
+def _holds_objects(hint: Any) -> bool:
+    """Whether values of a type hint may contain objects."""
+    if hint is Self:
+        return True
+    if isinstance(hint, type) and issubclass(hint, SpecificationExtension):
+        return True
+    return any(_holds_objects(arg) for arg in get_args(hint))
+
+
+def _compile_plan(cls: type) -> DumpPlan:
+    """
+    Compiles the dump plan of a class from its fields.
+
+    The OpenAPI name and the kind of a field come from its metadata, when
+    given. Otherwise, the name is the field name in camel case, and the kind
+    is inferred from the type hint.
+    """
+    hints = get_type_hints(cls)
+    plan = []
+    for f in fields(cls):
+        if not f.metadata.get("dumped", True):
+            continue
+        key = f.metadata.get("key", _camel_case(f.name))
+        kind = f.metadata.get("kind")
+        if kind is None:
+            kind = _NESTED if _holds_objects(hints[f.name]) else _SCALAR
+        plan.append((f.name, key, kind, f.metadata.get("required", False)))
+
+    return tuple(plan)
+
+
+def _compare_frozen(eq: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """
+    Wraps the equality of a dataclass, so frozen objects with different
+    hashes are not compared field by field.
+    """
+
+    def __eq__(self: Any, other: Any) -> Any:
+        if self is other:
+            return True
+        if (
+            self._hash is not None
+            and type(other) is type(self)
+            and other._hash is not None
+            and self._hash != other._hash
+        ):
+            return False
+        return eq(self, other)
+
+    __eq__.__qualname__ = eq.__qualname__
+    return __eq__
+
+
+def _compile_plans() -> None:
+    """
+    Compiles the dump plans of all the classes of the module, and lets their
+    frozen objects be hashed.
+    """
+    classes = [SpecificationExtension]
+    while classes:
+        cls = classes.pop()
+        cls._plan = _compile_plan(cls)
+        # Sparse objects are built by their own constructor, and tell whether
+        # they hold objects by their shape.
+        if not cls._sparse:
+            cls.__init__ = _compile_init(cls, [])
+            cls._leaf = not any(
+                kind in (_NESTED, _INLINE) for _, _, kind, _ in cls._plan
+            )
+        # Dataclasses make their objects unhashable.
+        cls.__hash__ = SpecificationExtension.__hash__
+        cls.__eq__ = _compare_frozen(cls.__eq__)
+        # The slotted dataclasses replace the classes they are built from,
+        # which may still be alive.
+        classes.extend(
+            c for c in cls.__subclasses__() if globals().get(c.__name__) is c
+        )
+
+    global _COMPILED
+    _COMPILED = True
+
+
+_compile_plans()
@@ -0,0 +1,165 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Parallel JSON serialization of large specifications.
+
+The path items and the entries of the components are encoded by a pool of
+processes, in shards of consecutive entries, and the rest of the document is
+encoded by the calling process, which splices the encoded entries where they
+belong. The output does not depend on the number of processes nor on the
+order in which they finish: it is the same as `stream.iter_json`.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from multiprocessing.context import BaseContext
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from writableopenapi import stream
+from writableopenapi.openapi.v3_1 import (
+    LazyDict,
+    OpenAPI,
+    SpecificationExtension,
+)
+
+# The entries to encode, and how, in the worker processes. With the fork
+# start method, the pool initializer's arguments are inherited rather than
+# pickled, so the tree is not copied to the workers. With the other ones,
+# each shard is sent with its own entries instead, see `forks`.
+_ENTRIES: Sequence[SpecificationExtension] = ()
+_OPTIONS: Tuple[Optional[str], bool] = (None, True)
+
+
+def _entries(api: OpenAPI) -> List[SpecificationExtension]:
+    """
+    Returns the path items and the entries of the components, without
+    duplicates.
+    """
+    maps = [api.paths]
+    if api.components is not None:
+        for f in fields(api.components):
+            value = getattr(api.components, f.name)
+            if f.init and f.name != "extensions" and isinstance(value, dict):
+                maps.append(value)
+
+    # The values of a LazyDict that are not loaded yet are raw data, left to
+    # the calling process.
+    entries: Dict[int, SpecificationExtension] = {}
+    for entries_map in maps:
+        if isinstance(entries_map, LazyDict):
+            items = entries_map.raw_items()
+        else:
+            items = entries_map.items()
+        for _, value in items:
+            if isinstance(value, SpecificationExtension):
+                entries.setdefault(id(value), value)
+    return list(entries.values())
+
+
+def forks(mp_context: Optional[BaseContext]) -> bool:
+    """
+    Returns whether the processes of a context are forked, and inherit the
+    memory of the calling process instead of unpickling what they are given.
+    """
+    context = mp_context or multiprocessing.get_context()
+    return context.get_start_method() == "fork"
+
+
+def _initialize(
+    entries: Sequence[SpecificationExtension],
+    indent: Optional[str],
+    sort_keys: bool,
+) -> None:
+    global _ENTRIES, _OPTIONS
+    _ENTRIES = entries
+    _OPTIONS = (indent, sort_keys)
+
+
+def _encode(shard: Union[range, Sequence[SpecificationExtension]]) -> List[str]:
+    """
+    Encodes a shard of the entries, at the top level, given by their indices
+    or as is.
+    """
+    indent, sort_keys = _OPTIONS
+    if isinstance(shard, range):
+        shard = [_ENTRIES[i] for i in shard]
+    return [
+        "".join(stream.iter_json(entry, indent, sort_keys)) for entry in shard
+    ]
+
+
+def iter_json(
+    api: OpenAPI,
+    indent: Optional[Union[int, str]] = 2,
+    sort_keys: bool = True,
+    max_workers: Optional[int] = None,
+    mp_context: Optional[BaseContext] = None,
+) -> Iterator[str]:
+    """
+    Encodes a specification into JSON chunks, encoding its path items and
+    the entries of its components in `max_workers` processes.
+
+    Joining the chunks gives the same string as `stream.iter_json`. The
+    first chunk is only produced once all the entries are encoded. With a
+    single worker, or fewer than two entries, the specification is encoded
+    by the calling process, as are the entries of a `LazyDict` not loaded
+    yet. Unless the processes are forked, each shard is pickled with its own
+    entries, so the workers do not unpickle the whole specification.
+    """
+    if indent is not None and not isinstance(indent, str):
+        indent = " " * indent
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    entries = _entries(api)
+    if max_workers < 2 or len(entries) < 2:
+        return stream.iter_json(api, indent, sort_keys)
+
+    # A few shards per worker, so that a worker given the large entries
+    # does not leave the others idle.
+    size = -(-len(entries) // (max_workers * 4))
+    shards: List[Union[range, Sequence[SpecificationExtension]]] = [
+        range(i, min(i + size, len(entries)))
+        for i in range(0, len(entries), size)
+    ]
+    inherited: Sequence[SpecificationExtension] = entries
+    if not forks(mp_context):
+        shards = [entries[shard.start : shard.stop] for shard in shards]
+        inherited = ()
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(shards)),
+        mp_context=mp_context,
+        initializer=_initialize,
+        initargs=(inherited, indent, sort_keys),
+    ) as executor:
+        encoded = [
+            f for fragments in executor.map(_encode, shards) for f in fragments
+        ]
+
+    fragments = {id(entry): f for entry, f in zip(entries, encoded)}
+    # The entries are seen already, so the walk yields node events for them,
+    # which are encoded with their fragment.
+    events = stream.iter_events(api, sort_keys, seen=set(fragments))
+    return stream.encode_events(events, indent, sort_keys, fragments)
+
+
+def write_json(
+    api: OpenAPI,
+    fp: IO[str],
+    indent: Optional[Union[int, str]] = 2,
+    sort_keys: bool = True,
+    max_workers: Optional[int] = None,
+    mp_context: Optional[BaseContext] = None,
+) -> None:
+    """Writes a specification as JSON into a text file, see `iter_json`."""
+    write = fp.write
+    for chunk in iter_json(
+        api,
+        indent=indent,
+        sort_keys=sort_keys,
+        max_workers=max_workers,
+        mp_context=mp_context,
+    ):
+        write(chunk)
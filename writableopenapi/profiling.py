@@ -0,0 +1,237 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Opt-in instrumentation of `dump()`, to find which kinds of objects and which
+paths make a specification slow to dump.
+
+While a `DumpProfiler` is active, the functions dumping the fields of each
+class are wrapped to count the objects dumped, the time spent, and the
+members written. The wrappers are removed when it exits, so dumping is not
+slowed down otherwise. The classes are patched for every thread, and the
+sizes of the dumps are measured once they are complete.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+from writableopenapi.openapi import v3_1
+from writableopenapi.openapi.v3_1 import OpenAPI, SpecificationExtension
+
+
+@dataclass
+class NodeStats:
+    """What dumping the objects of a class took."""
+
+    calls: int = 0
+    """The number of objects dumped."""
+    time: float = 0.0
+    """
+    The time spent dumping the fields of the objects, in seconds. The objects
+    they hold are dumped separately, so it does not include theirs.
+    """
+    members: int = 0
+    """The number of members written, extensions included."""
+    size: int = 0
+    """
+    The size of the dumps as compact JSON, in bytes. Like the time, it does
+    not include the dumps of the objects they hold.
+    """
+
+
+@dataclass
+class PathStats:
+    """What dumping a path item took."""
+
+    time: float = 0.0
+    """The time spent dumping the path item and what it holds, in seconds."""
+    size: int = 0
+    """The size of the dump as compact JSON, in bytes."""
+
+
+@dataclass
+class DumpProfile:
+    """The statistics gathered by a `DumpProfiler`."""
+
+    classes: Dict[str, NodeStats] = field(default_factory=dict)
+    """The statistics of the objects dumped, by class name."""
+    paths: Dict[str, PathStats] = field(default_factory=dict)
+    """The statistics of the path items, see `profile_dump`."""
+
+    def report(self, fp: IO[str], limit: Optional[int] = 20) -> None:
+        """Prints the classes and the paths, the slowest first."""
+        classes = sorted(
+            self.classes.items(), key=lambda item: item[1].time, reverse=True
+        )
+        total = sum(stats.time for _, stats in classes) or 1.0
+        print(
+            f"{'class':<28}{'objects':>10}{'time':>12}{'share':>8}"
+            f"{'members':>10}{'size':>12}",
+            file=fp,
+        )
+        for name, stats in classes[:limit]:
+            print(
+                f"{name:<28}{stats.calls:>10}{stats.time * 1000:>10.2f}ms"
+                f"{stats.time / total:>8.1%}{stats.members:>10}"
+                f"{stats.size:>11}B",
+                file=fp,
+            )
+
+        if not self.paths:
+            return
+        paths = sorted(
+            self.paths.items(), key=lambda item: item[1].time, reverse=True
+        )
+        print(f"\n{'path':<40}{'time':>12}{'size':>12}", file=fp)
+        for path, stats in paths[:limit]:
+            print(
+                f"{path:<40}{stats.time * 1000:>10.2f}ms{stats.size:>11}B",
+                file=fp,
+            )
+
+
+def _classes() -> List[type]:
+    """Returns the classes of the model that dump fields."""
+    return [
+        value
+        for value in vars(v3_1).values()
+        if isinstance(value, type)
+        and issubclass(value, SpecificationExtension)
+        and value is not SpecificationExtension
+    ]
+
+
+def _own_sizes(dumps: Dict[int, Any]) -> Dict[int, int]:
+    """
+    Returns the sizes of the dumps of objects as compact JSON, by identity,
+    without the dumps of the objects they hold, which are counted apart. The
+    lists and dictionaries met are sized once, bottom-up.
+    """
+    sizes: Dict[int, int] = {}
+    for root in dumps.values():
+        stack = [(root, False)]
+        while stack:
+            value, ready = stack.pop()
+            if id(value) in sizes:
+                continue
+            items = value.values() if isinstance(value, dict) else value
+            children = [
+                item
+                for item in items
+                if isinstance(item, (dict, list, tuple))
+                and id(item) not in dumps
+            ]
+            if not ready:
+                stack.append((value, True))
+                stack.extend((child, False) for child in children)
+                continue
+            # Brackets, and separators between the items.
+            size = 2 + max(len(value) - 1, 0)
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    size += len(json.dumps(str(key))) + 1
+                    size += _item_size(item, dumps, sizes)
+            else:
+                size += sum(_item_size(item, dumps, sizes) for item in value)
+            sizes[id(value)] = size
+    return {key: sizes[key] for key in dumps}
+
+
+def _item_size(item: Any, dumps: Dict[int, Any], sizes: Dict[int, int]) -> int:
+    if id(item) in dumps:
+        return 0
+    if isinstance(item, (dict, list, tuple)):
+        return sizes[id(item)]
+    return len(json.dumps(item))
+
+
+def _instrument(
+    dump_fields: Callable[..., None],
+    stats: NodeStats,
+    dumps: Dict[int, Tuple[NodeStats, Dict[str, Any]]],
+) -> Callable[..., None]:
+    perf_counter = time.perf_counter
+
+    def instrumented(
+        node: SpecificationExtension,
+        data: Dict[str, Any],
+        pending: List[Any],
+        *args: Any,
+    ) -> None:
+        start = perf_counter()
+        dump_fields(node, data, pending, *args)
+        stats.time += perf_counter() - start
+        stats.calls += 1
+        stats.members += len(data)
+        # The dumps of the objects held are filled afterwards.
+        dumps[id(data)] = (stats, data)
+
+    return instrumented
+
+
+class DumpProfiler:
+    """
+    Instruments `dump()` while active, for the objects of every class:
+
+        with DumpProfiler() as profiler:
+            api.dump()
+        profiler.profile.report(sys.stdout)
+
+    The cached dumps, see `cached_dump()`, are reused as they are, so only
+    the objects dumped while it is active are counted.
+    """
+
+    def __init__(self) -> None:
+        self.profile = DumpProfile()
+        self._patched: List[Tuple[type, Callable[..., None]]] = []
+        # The dumps written while active, by identity, to be sized on exit.
+        self._dumps: Dict[int, Tuple[NodeStats, Dict[str, Any]]] = {}
+
+    def __enter__(self) -> "DumpProfiler":
+        if self._patched:
+            raise RuntimeError("the profiler is already active")
+        for cls in _classes():
+            stats = self.profile.classes.setdefault(cls.__name__, NodeStats())
+            dump_fields = cls._dump_fields
+            self._patched.append((cls, dump_fields))
+            cls._dump_fields = _instrument(dump_fields, stats, self._dumps)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        for cls, dump_fields in reversed(self._patched):
+            cls._dump_fields = dump_fields
+        self._patched.clear()
+        dumps = {key: data for key, (_, data) in self._dumps.items()}
+        for key, size in _own_sizes(dumps).items():
+            self._dumps[key][0].size += size
+        self._dumps.clear()
+        self.profile.classes = {
+            name: stats
+            for name, stats in self.profile.classes.items()
+            if stats.calls
+        }
+
+
+def profile_dump(api: OpenAPI) -> DumpProfile:
+    """
+    Dumps a specification with `dump()`, and returns what each class and each
+    path item took. The classes are profiled on a dump of the whole
+    specification, and the path items are then timed on their own dumps,
+    without the instrumentation. The cached dumps are neither used nor
+    filled.
+    """
+    with DumpProfiler() as profiler:
+        api.dump()
+
+    perf_counter = time.perf_counter
+    for path, item in api.paths.items():
+        if not isinstance(item, SpecificationExtension):
+            continue
+        start = perf_counter()
+        dumped = item.dump()
+        elapsed = perf_counter() - start
+        size = len(json.dumps(dumped, separators=(",", ":")))
+        profiler.profile.paths[path] = PathStats(elapsed, size)
+    return profiler.profile
@@ -0,0 +1,244 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Reading parts of large JSON specifications without parsing the whole file.
+
+The file is memory-mapped, and a single scan indexes the byte offsets of the
+top-level members, of the path items, and of the entries of the components.
+Values are then decoded on demand, by JSON pointer, from their bytes only.
+The scan does not decode anything below the indexed members: it only tracks
+the nesting of brackets, skipping the strings and the scalars in between
+with a regular expression.
+"""
+
+import json
+import mmap
+import re
+from typing import Any, Dict, Iterator, List, Tuple, Type, TypeVar
+from writableopenapi.loader import from_dict
+from writableopenapi.openapi.v3_1 import SpecificationExtension
+from writableopenapi.references import pointer, pointer_tokens
+
+T = TypeVar("T", bound=SpecificationExtension)
+
+Span = Tuple[int, int]
+"""The start and end offsets of a value in the file, in bytes."""
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(rb"[^,:\]}\s]+")
+
+
+def _content(levels: int) -> bytes:
+    """
+    Returns a pattern matching the content of a value up to the next
+    bracket, strings included, along with the arrays and objects nested up
+    to `levels` deep, which then cost no iteration of the scan. The
+    quantifiers are possessive, so nothing is kept to backtrack.
+    """
+    string = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    content = rb'(?:[^"\[\]{}]++|' + string + rb")*+"
+    for _ in range(levels):
+        content = (
+            rb'(?:[^"\[\]{}]++|'
+            + string
+            + rb"|\{"
+            + content
+            + rb"\}|\["
+            + content
+            + rb"\])*+"
+        )
+    return content
+
+
+_BRACKET = re.compile(_content(2) + rb"([\[\]{}])", re.DOTALL)
+_OPENING = frozenset(b"[{")
+
+
+class _Scanner:
+    """Finds the spans of values and members in a JSON document."""
+
+    def __init__(self, buffer: Any) -> None:
+        self.buffer = buffer
+
+    def error(self, message: str, offset: int) -> ValueError:
+        return ValueError(f"invalid JSON at byte {offset}: {message}")
+
+    def skip_whitespace(self, offset: int) -> int:
+        return _WHITESPACE.match(self.buffer, offset).end()
+
+    def value(self, offset: int) -> int:
+        """Returns the end of the value starting at an offset."""
+        buffer = self.buffer
+        if offset >= len(buffer):
+            raise self.error("expected a value", offset)
+        first = buffer[offset]
+        if first == 0x22:  # "
+            match = _STRING.match(buffer, offset)
+            if match is None:
+                raise self.error("unterminated string", offset)
+            return match.end()
+        if first not in _OPENING:
+            match = _SCALAR.match(buffer, offset)
+            if match is None:
+                raise self.error("expected a value", offset)
+            return match.end()
+        # Only the brackets are looked at, the strings holding some are
+        # skipped along with the rest of the content, in a single search.
+        depth = 1
+        offset += 1
+        for match in _BRACKET.finditer(buffer, offset):
+            if match.start() != offset:
+                raise self.error("unterminated string", offset)
+            offset = match.end()
+            if match.group(1) in b"[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return offset
+        raise self.error("unterminated value", offset)
+
+    def members(self, offset: int) -> Iterator[Tuple[str, Span]]:
+        """Yields the keys and the spans of the members of an object."""
+        buffer = self.buffer
+        offset = self.skip_whitespace(offset)
+        if buffer[offset : offset + 1] != b"{":
+            raise self.error("expected an object", offset)
+        offset = self.skip_whitespace(offset + 1)
+        if buffer[offset : offset + 1] == b"}":
+            return
+        while True:
+            match = _STRING.match(buffer, offset)
+            if match is None:
+                raise self.error("expected a key", offset)
+            key = json.loads(match.group())
+            offset = self.skip_whitespace(match.end())
+            if buffer[offset : offset + 1] != b":":
+                raise self.error("expected ':'", offset)
+            start = self.skip_whitespace(offset + 1)
+            end = self.value(start)
+            yield key, (start, end)
+            offset = self.skip_whitespace(end)
+            separator = buffer[offset : offset + 1]
+            if separator == b"}":
+                return
+            if separator != b",":
+                raise self.error("expected ',' or '}'", offset)
+            offset = self.skip_whitespace(offset + 1)
+
+
+class MappedSpecification:
+    """
+    A JSON specification file, memory-mapped and indexed:
+
+        with MappedSpecification("openapi.json") as spec:
+            operation = spec.load("#/paths/~1pets/get", Operation)
+
+    The values are decoded from the file each time they are read.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        # The keys of the indexed members of the indexed objects, in order,
+        # by JSON pointer, see `keys`.
+        self._children: Dict[str, List[str]] = {}
+        try:
+            self.index = self._scan()
+            """
+            The spans of the top-level members, of the path items and of
+            the entries of the components, by JSON pointer.
+            """
+        except BaseException:
+            self._map.close()
+            raise
+
+    def _scan(self) -> Dict[str, Span]:
+        scanner = _Scanner(self._map)
+        start = scanner.skip_whitespace(0)
+        # The object ends with the file, which is not scanned twice.
+        index = {"#": (start, self._map.rfind(b"}") + 1)}
+
+        def add(
+            parent: Tuple[str, ...], key: str, span: Span
+        ) -> Tuple[str, ...]:
+            path = parent + (key,)
+            ref = pointer(path)
+            # A key repeated in an object keeps its first place.
+            if ref not in index:
+                self._children.setdefault(pointer(parent), []).append(key)
+            index[ref] = span
+            return path
+
+        for key, span in scanner.members(start):
+            member = add((), key, span)
+            if key == "paths" and self._map[span[0]] == 0x7B:  # {
+                for path, item in scanner.members(span[0]):
+                    add(member, path, item)
+            elif key == "components" and self._map[span[0]] == 0x7B:
+                for section, entries in scanner.members(span[0]):
+                    name = add(member, section, entries)
+                    if self._map[entries[0]] != 0x7B:
+                        continue
+                    for entry, value in scanner.members(entries[0]):
+                        add(name, entry, value)
+        return index
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        self._map.close()
+
+    def __enter__(self) -> "MappedSpecification":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def keys(self, ref: str) -> List[str]:
+        """
+        Returns the keys of an indexed object, such as `#/paths` or
+        `#/components/schemas`, without decoding its members.
+        """
+        return list(self._children.get(ref, ()))
+
+    def raw(self, ref: str) -> bytes:
+        """Returns the bytes of an indexed value."""
+        if ref not in self.index:
+            raise KeyError(f"{ref} is not indexed")
+        start, end = self.index[ref]
+        return self._map[start:end]
+
+    def get(self, ref: str) -> Any:
+        """
+        Decodes the value a local reference points to, from the bytes of
+        the closest indexed value holding it. Raises `KeyError` when it does
+        not exist.
+        """
+        tokens = pointer_tokens(ref)
+        if tokens is None:
+            raise KeyError(f"{ref} does not refer to this specification")
+        for length in range(min(len(tokens), 3), -1, -1):
+            found = pointer(tokens[:length])
+            if found in self.index:
+                break
+        value = json.loads(self.raw(found))
+        for token in tokens[length:]:
+            if isinstance(value, dict) and token in value:
+                value = value[token]
+            elif (
+                isinstance(value, list)
+                and token.isdigit()
+                and int(token) < len(value)
+            ):
+                value = value[int(token)]
+            else:
+                raise KeyError(f"{ref} does not exist")
+        return value
+
+    def load(self, ref: str, cls: Type[T]) -> T:
+        """Decodes the value a reference points to into an object."""
+        return from_dict(self.get(ref), cls)
@@ -0,0 +1,226 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Resolution of the `$ref` of `Reference` objects within a specification.
+
+The components are indexed by their JSON pointers once, so a reference to a
+component, like the ones built by `macros.shared`, is resolved with a single
+lookup. Other local pointers are followed from the closest indexed object.
+References to other documents are not resolved.
+"""
+
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from writableopenapi.openapi.v3_1 import (
+    DumpPath,
+    OpenAPI,
+    Reference,
+    SpecificationExtension,
+)
+
+_MISSING = object()
+
+
+def pointer(path: DumpPath) -> str:
+    """Returns the local reference of a path, such as `walk()` yields."""
+    tokens = (
+        str(token).replace("~", "~0").replace("/", "~1") for token in path
+    )
+    return "#" + "".join("/" + token for token in tokens)
+
+
+def pointer_tokens(ref: str) -> Optional[List[str]]:
+    """Returns the tokens of a local reference, or None for other ones."""
+    if ref == "#":
+        return []
+    if not ref.startswith("#/"):
+        return None
+    return [
+        token.replace("~1", "/").replace("~0", "~")
+        for token in ref[2:].split("/")
+    ]
+
+
+def _child(value: Any, token: str) -> Any:
+    if isinstance(value, SpecificationExtension):
+        if token in value.extensions:
+            return value.extensions[token]
+        for key, item in value.members():
+            if key == token:
+                return item
+        return _MISSING
+    if isinstance(value, dict):
+        return value.get(token, _MISSING)
+    if isinstance(value, list) and token.isdigit():
+        index = int(token)
+        return value[index] if index < len(value) else _MISSING
+    return _MISSING
+
+
+Link = Optional[Tuple[Any, Union[str, int]]]
+"""
+A path as a linked list of (parent link, key) pairs, which walks extend
+without copying the path, see `link_path`.
+"""
+
+
+def link_path(link: Link) -> DumpPath:
+    """Returns the path of a link, as a tuple of keys and indices."""
+    keys = []
+    while link is not None:
+        link, key = link
+        keys.append(key)
+    return tuple(reversed(keys))
+
+
+def _references(root: OpenAPI) -> Iterator[Tuple[Link, str]]:
+    """
+    Yields the references of a specification with their links, in no
+    particular order. This is `walk()` without the paths and the ordering,
+    which take most of its time.
+    """
+    stack: List[Tuple[Any, Link]] = [(root, None)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        value, link = pop()
+        if isinstance(value, Reference):
+            yield link, value.ref
+            continue
+        if isinstance(value, SpecificationExtension):
+            items: Iterable[Tuple[Any, Any]] = value.members()
+        elif isinstance(value, list):
+            items = enumerate(value)
+        else:
+            items = value.items()
+        for key, item in items:
+            if isinstance(item, (SpecificationExtension, list, dict)):
+                push((item, (link, key)))
+
+
+@dataclass
+class ReferenceReport:
+    """The references of a specification that are broken or unneeded."""
+
+    dangling: List[Tuple[DumpPath, str]] = field(default_factory=list)
+    """The paths of the references whose target does not exist, with it."""
+    unused: List[str] = field(default_factory=list)
+    """The references of the components that nothing refers to."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether no reference is dangling."""
+        return not self.dangling
+
+
+class Resolver:
+    """
+    Resolves the references of a specification:
+
+        resolver = Resolver(api)
+        schema = resolver.resolve(ReferencableSchema("Pet", pet).ref())
+
+    The components are indexed when the resolver is created: the index is
+    not updated when they are modified afterwards.
+    """
+
+    def __init__(self, api: OpenAPI) -> None:
+        self.api = api
+        self.index: Dict[str, Any] = {"#": api}
+        """The components and the specification, by reference."""
+        if api.components is not None:
+            self.index["#/components"] = api.components
+            for section, entries in api.components.members():
+                if not isinstance(entries, dict):
+                    continue
+                prefix = pointer(("components", section))
+                self.index[prefix] = entries
+                for name, component in entries.items():
+                    self.index[
+                        pointer(("components", section, name))
+                    ] = component
+
+    def lookup(self, ref: str) -> Any:
+        """
+        Returns the value a reference points to, which may be a `Reference`
+        itself. Raises `KeyError` when it does not exist.
+        """
+        found = self.index.get(ref, _MISSING)
+        if found is not _MISSING:
+            return found
+        tokens = pointer_tokens(ref)
+        if tokens is None:
+            raise KeyError(f"{ref} does not refer to this specification")
+        # Pointers into a component start from it.
+        start = min(len(tokens), 3) if tokens[:1] == ["components"] else 0
+        value = self.index.get(pointer(tokens[:start]), _MISSING)
+        if value is _MISSING:
+            raise KeyError(f"{ref} does not exist")
+        for token in tokens[start:]:
+            value = _child(value, token)
+            if value is _MISSING:
+                raise KeyError(f"{ref} does not exist")
+        return value
+
+    def resolve(self, ref: Union[Reference, str]) -> Any:
+        """
+        Returns the value a reference points to, following the references
+        it leads to. Raises `KeyError` when one does not exist, and
+        `ValueError` when they form a cycle.
+        """
+        if isinstance(ref, Reference):
+            ref = ref.ref
+        seen: Set[str] = set()
+        while True:
+            if ref in seen:
+                raise ValueError(f"{ref} refers to itself")
+            seen.add(ref)
+            value = self.lookup(ref)
+            if not isinstance(value, Reference):
+                return value
+            ref = value.ref
+
+    def check(self) -> ReferenceReport:
+        """
+        Finds the references of the specification that do not exist, and
+        the components that are never referred to, in a single walk.
+
+        References to other documents are neither dangling nor uses. The
+        dangling references are sorted by path.
+        """
+        report = ReferenceReport()
+        used: Set[str] = set()
+        for link, ref in _references(self.api):
+            if ref in used:
+                continue
+            tokens = pointer_tokens(ref)
+            if tokens is None:
+                continue
+            try:
+                self.lookup(ref)
+            except KeyError:
+                report.dangling.append((link_path(link), ref))
+                continue
+            used.add(ref)
+            # A pointer into a component uses it.
+            if tokens[:1] == ["components"] and len(tokens) > 3:
+                used.add(pointer(tokens[:3]))
+        report.dangling.sort(key=lambda item: pointer(item[0]))
+
+        for ref in self.index:
+            if ref.count("/") == 3 and ref.startswith("#/components/"):
+                if ref not in used:
+                    report.unused.append(ref)
+        return report
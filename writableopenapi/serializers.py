@@ -0,0 +1,240 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Registry of the serializers turning specifications into text.
+
+Each format can be produced by several back-ends, which give the same text.
+The back-ends whose dependencies are missing are not registered, and the
+fastest one registered is used unless one is asked for by name. The back-ends
+are ranked by `python -m benchmarks.serializers`.
+"""
+
+import io
+import json
+import math
+import yaml
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from writableopenapi import stream
+from writableopenapi.openapi.v3_1 import SpecificationExtension
+
+try:
+    from yaml import CSafeDumper as _SafeDumper
+except ImportError:
+    _SafeDumper = None
+
+
+@dataclass(frozen=True)
+class Serializer:
+    """A back-end producing a format."""
+
+    format: str
+    """The format produced, such as "json" or "yaml"."""
+    name: str
+    """The name of the back-end, unique for the format."""
+    serialize: Callable[[Any], str]
+    """Turns a value, specification objects included, into text."""
+    rank: int
+    """Lower is faster, see `python -m benchmarks.serializers`."""
+
+
+_SERIALIZERS: Dict[str, Dict[str, Serializer]] = {}
+
+
+def register(
+    format: str, name: str, rank: int
+) -> Callable[[Callable[[Any], str]], Callable[[Any], str]]:
+    """Registers a function as the back-end `name` of a format."""
+
+    def decorator(serialize: Callable[[Any], str]) -> Callable[[Any], str]:
+        serializers = _SERIALIZERS.setdefault(format, {})
+        serializers[name] = Serializer(format, name, serialize, rank)
+        return serialize
+
+    return decorator
+
+
+def formats() -> List[str]:
+    """Returns the formats that can be produced."""
+    return list(_SERIALIZERS)
+
+
+def serializers(format: str) -> List[Serializer]:
+    """Returns the back-ends of a format, the fastest first."""
+    if format not in _SERIALIZERS:
+        raise ValueError(f"unknown format {format!r}")
+    return sorted(_SERIALIZERS[format].values(), key=lambda s: s.rank)
+
+
+def get(format: str, name: Optional[str] = None) -> Serializer:
+    """Returns the back-end `name` of a format, or its fastest one."""
+    if name is None:
+        return serializers(format)[0]
+    found = _SERIALIZERS.get(format, {}).get(name)
+    if found is None:
+        raise ValueError(f"unknown serializer {name!r} for {format!r}")
+    return found
+
+
+def serialize(value: Any, format: str, name: Optional[str] = None) -> str:
+    """Turns a value into text, see `get`."""
+    return get(format, name).serialize(value)
+
+
+def _dumped(value: Any) -> Any:
+    # Serializing is usually done once per tree, and filling the cache of
+    # `cached_dump()` takes up to three times as long as `dump()`, see
+    # `python -m benchmarks.caching`. Loops editing a tree in place can
+    # serialize `api.cached_dump()` instead.
+    if isinstance(value, SpecificationExtension):
+        return value.dump()
+    return value
+
+
+@register("json", "stream", rank=1)
+def _stream_json(value: Any) -> str:
+    return "".join(stream.iter_json(value, indent=2))
+
+
+@register("json", "stdlib", rank=2)
+def _stdlib_json(value: Any) -> str:
+    return json.dumps(_dumped(value), indent=2, sort_keys=True)
+
+
+@register("json-compact", "stdlib", rank=1)
+def _stdlib_compact_json(value: Any) -> str:
+    separators = (",", ":")
+    return json.dumps(_dumped(value), sort_keys=True, separators=separators)
+
+
+@register("json-compact", "stream", rank=2)
+def _stream_compact_json(value: Any) -> str:
+    separators = (",", ":")
+    return "".join(stream.iter_json(value, None, separators=separators))
+
+
+def _canonical_number(value: Any) -> str:
+    """Encodes a number the way ECMAScript does, as RFC 8785 requires."""
+    if isinstance(value, int):
+        return str(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{value!r} cannot be encoded in canonical JSON")
+    if value == 0:
+        return "0"
+    # The shortest digits giving back the value, with the exponent of the
+    # decimal point: value = 0.digits * 10**point.
+    sign = "-" if value < 0 else ""
+    mantissa, _, exponent = repr(abs(value)).partition("e")
+    whole, _, fraction = mantissa.partition(".")
+    digits = (whole + fraction).lstrip("0")
+    point = (
+        len(whole) + int(exponent or 0) - (len(whole + fraction) - len(digits))
+    )
+    digits = digits.rstrip("0")
+    count = len(digits)
+    if count <= point <= 21:
+        text = digits + "0" * (point - count)
+    elif 0 < point <= 21:
+        text = f"{digits[:point]}.{digits[point:]}"
+    elif -6 < point <= 0:
+        text = f"0.{'0' * -point}{digits}"
+    else:
+        power = point - 1
+        power_text = f"+{power}" if power >= 0 else str(power)
+        text = digits[0]
+        if count > 1:
+            text += f".{digits[1:]}"
+        text += f"e{power_text}"
+    return sign + text
+
+
+def _utf16_order(key: str) -> bytes:
+    return key.encode("utf-16-be")
+
+
+class _Token:
+    """Text written as is by the canonical encoder."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+_COMMA = _Token(",")
+_CLOSE_MAPPING = _Token("}")
+_CLOSE_SEQUENCE = _Token("]")
+
+
+@register("json-canonical", "jcs", rank=1)
+def _canonical_json(value: Any) -> str:
+    """
+    Encodes a value as canonical JSON, see RFC 8785: compact, with the keys
+    sorted by their UTF-16 code units, the numbers encoded like ECMAScript
+    does, and the strings left unescaped except where JSON requires it.
+    """
+    encode_string = json.JSONEncoder(ensure_ascii=False).encode
+    chunks: List[str] = []
+    stack: List[Any] = [_dumped(value)]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, _Token):
+            chunks.append(value.text)
+        elif isinstance(value, dict):
+            for key in value:
+                if not isinstance(key, str):
+                    name = type(key).__name__
+                    raise TypeError(f"keys must be str, not {name}")
+            keys = sorted(value, key=_utf16_order)
+            stack.append(_CLOSE_MAPPING)
+            for i, key in enumerate(reversed(keys)):
+                stack.append(value[key])
+                stack.append(_Token(encode_string(key) + ":"))
+                if i < len(keys) - 1:
+                    stack.append(_COMMA)
+            chunks.append("{")
+        elif isinstance(value, (list, tuple)):
+            stack.append(_CLOSE_SEQUENCE)
+            for i, item in enumerate(reversed(value)):
+                stack.append(item)
+                if i < len(value) - 1:
+                    stack.append(_COMMA)
+            chunks.append("[")
+        elif isinstance(value, str):
+            chunks.append(encode_string(value))
+        elif value is None or isinstance(value, bool):
+            chunks.append(json.dumps(value))
+        elif isinstance(value, (int, float)):
+            chunks.append(_canonical_number(value))
+        else:
+            name = type(value).__name__
+            raise TypeError(f"{name} values cannot be encoded in JSON")
+    return "".join(chunks)
+
+
+@register("yaml", "stream", rank=1)
+def _stream_yaml(value: Any) -> str:
+    fp = io.StringIO()
+    stream.write_yaml(value, fp, indent=2)
+    return fp.getvalue()
+
+
+if _SafeDumper is not None:
+
+    class _NoAliasDumper(_SafeDumper):
+        # Dumps share the dictionaries of the objects that appear several
+        # times, which must not be written as anchors and aliases.
+        def ignore_aliases(self, data: Any) -> bool:
+            return True
+
+    @register("yaml", "libyaml", rank=2)
+    def _libyaml_yaml(value: Any) -> str:
+        return yaml.dump(
+            _dumped(value),
+            Dumper=_NoAliasDumper,
+            indent=2,
+            default_flow_style=False,
+            sort_keys=True,
+        )
@@ -0,0 +1,703 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Streaming serialization of OpenAPI objects.
+
+The tree is walked without being dumped into a dictionary first: each object
+only builds the mapping of its own members, and the output is produced chunk
+by chunk.
+"""
+
+import json
+import yaml
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from json.encoder import encode_basestring_ascii
+from itertools import islice
+from operator import itemgetter
+from queue import Queue
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from writableopenapi.openapi import v3_1
+from writableopenapi.openapi.v3_1 import (
+    LazyDict,
+    SpecificationExtension,
+    Verbatim,
+)
+
+try:
+    from yaml import CDumper as _YAMLDumper
+except ImportError:
+    from yaml import Dumper as _YAMLDumper
+
+MAPPING_START = 0
+MAPPING_END = 1
+SEQUENCE_START = 2
+SEQUENCE_END = 3
+KEY = 4
+SCALAR = 5
+NODE = 6
+
+Event = Tuple[Any, ...]
+"""
+An event, whose first item is its kind. Start events carry the length of the
+collection, key and scalar events carry their value, and node events carry an
+object that has already been walked.
+"""
+
+Writer = Generator[None, Event, None]
+"""
+A generator writing the events it is sent, once started by `next()`, which
+returns when it is sent the end of the events, see `_finish`.
+"""
+
+_DONE = object()
+_END = 7
+"""The kind of the event sent to writers after the last one."""
+_END_EVENT: Event = (_END,)
+_BATCH_SIZE = 1024
+"""The number of events sent to the writers at once."""
+_QUEUED_BATCHES = 16
+"""The number of batches of events queued for a thread of `write_formats`."""
+_KEY = itemgetter(0)
+_SCALAR_ENCODER = json.JSONEncoder()
+_YAML_MAPPING_START = yaml.MappingStartEvent(
+    None, "tag:yaml.org,2002:map", True, flow_style=False
+)
+_YAML_MAPPING_END = yaml.MappingEndEvent()
+_YAML_SEQUENCE_START = yaml.SequenceStartEvent(
+    None, "tag:yaml.org,2002:seq", True, flow_style=False
+)
+_YAML_SEQUENCE_END = yaml.SequenceEndEvent()
+_YAML_CACHED_SCALARS = (str, int, float, bool, type(None))
+
+
+def _text(value: Any) -> Any:
+    """Returns the member written for the value of a string field."""
+    if type(value) is Verbatim:
+        return value.value
+    return str(value)
+
+
+def _items(value: Dict[Any, Any]) -> Iterable[Tuple[Any, Any]]:
+    """Returns the items of a mapping, the lazily loaded ones as raw data."""
+    return value.raw_items() if type(value) is LazyDict else value.items()
+
+
+def _member_statement(key: str, kind: int, value: str) -> str:
+    """Returns the code writing a member value into `data`."""
+    if kind == v3_1._INLINE:
+        return f"data.update(items({value}))"
+    if kind == v3_1._TEXT:
+        return f"data[{key!r}] = text({value})"
+    return f"data[{key!r}] = {value}"
+
+
+def _compile_members(
+    head: List[str], lines: List[str]
+) -> Callable[[Any], Dict[Any, Any]]:
+    """
+    Compiles the function returning the members of an object, extensions
+    included, from the `head` lines and the `lines` writing its fields.
+    """
+    source = [
+        "def members(node):",
+        *head,
+        "    data = dict(node.extensions)",
+        *lines,
+        "    return data",
+    ]
+    namespace = {"items": _items, "text": _text}
+    exec("\n".join(source), namespace)
+    return namespace["members"]
+
+
+def _class_members(cls: type) -> Callable[[Any], Dict[Any, Any]]:
+    """Compiles the members function of a class, from its dump plan."""
+    lines = []
+    for attribute, key, kind, required in cls._plan:
+        # Plain values and objects are written as they are, None included.
+        if required and kind in (v3_1._SCALAR, v3_1._NESTED):
+            lines.append(f"    data[{key!r}] = node.{attribute}")
+            continue
+        lines.append(f"    value = node.{attribute}")
+        lines.append("    if value is not None:")
+        lines.append(f"        {_member_statement(key, kind, 'value')}")
+        if required:
+            lines.append("    else:")
+            lines.append(f"        data[{key!r}] = None")
+    return _compile_members([], lines)
+
+
+def _shape_members(shape: Any) -> Callable[[Any], Dict[Any, Any]]:
+    """
+    Compiles the members function of a shape of sparse objects, whose stored
+    values are never None.
+    """
+    lines = []
+    for index, key, kind in shape.plan:
+        # The required fields that are not stored are written as None.
+        if index is None:
+            lines.append(f"    data[{key!r}] = None")
+        else:
+            value = f"values[{index}]"
+            lines.append(f"    {_member_statement(key, kind, value)}")
+    return _compile_members(["    values = node._values"], lines)
+
+
+_MEMBERS: Dict[Any, Callable[[Any], Dict[Any, Any]]] = {}
+"""The members functions of the classes, and of the shapes of sparse objects."""
+
+
+def _members(node: SpecificationExtension) -> Dict[Any, Any]:
+    """
+    Returns the members of an object, extensions included. Nested objects are
+    not walked, and lazily loaded mappings are not loaded.
+    """
+    owner = node._shape if node._sparse else type(node)
+    members = _MEMBERS.get(owner)
+    if members is None:
+        if node._sparse:
+            members = _MEMBERS[owner] = _shape_members(owner)
+        else:
+            members = _MEMBERS[owner] = _class_members(owner)
+    return members(node)
+
+
+def iter_events(
+    root: Any,
+    sort_keys: bool = True,
+    seen: Optional[Set[int]] = None,
+) -> Iterator[Event]:
+    """
+    Walks a value and yields its serialization events.
+
+    Objects are turned into mappings of their members, lists and tuples into
+    sequences, and anything else is a scalar. The walk uses an explicit stack
+    so deeply nested values do not hit the recursion limit.
+
+    When `seen` is given, the identities of the walked objects are added to
+    it, and an object that is met again is not walked: a node event carrying
+    it is yielded instead, so the consumer can reuse what it wrote the first
+    time.
+    """
+    stack: List[Tuple[int, Iterator[Any]]] = []
+    value = root
+    while True:
+        if isinstance(value, SpecificationExtension):
+            if seen is None or id(value) not in seen:
+                if seen is not None:
+                    seen.add(id(value))
+                value = _members(value)
+        if isinstance(value, SpecificationExtension):
+            yield (NODE, value)
+        elif isinstance(value, dict):
+            yield (MAPPING_START, len(value))
+            # Lazily loaded values are written from their raw data.
+            items = (
+                value.raw_items() if type(value) is LazyDict else value.items()
+            )
+            if sort_keys:
+                items = sorted(items, key=_KEY)
+            stack.append((MAPPING_END, iter(items)))
+        elif isinstance(value, (list, tuple)):
+            yield (SEQUENCE_START, len(value))
+            stack.append((SEQUENCE_END, iter(value)))
+        else:
+            yield (SCALAR, value)
+
+        while stack:
+            end, entries = stack[-1]
+            entry = next(entries, _DONE)
+            if entry is _DONE:
+                stack.pop()
+                yield (end,)
+            elif end == MAPPING_END:
+                yield (KEY, entry[0])
+                value = entry[1]
+                break
+            else:
+                value = entry
+                break
+        else:
+            return
+
+
+def _encode_key(key: Any) -> str:
+    """Encodes a mapping key the way `json.dumps` does."""
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    if isinstance(key, (bool, int, float)) or key is None:
+        return encode_basestring_ascii(_SCALAR_ENCODER.encode(key))
+    name = type(key).__name__
+    raise TypeError(f"keys must be str, int, float, bool or None, not {name}")
+
+
+def _encode_scalar(value: Any) -> str:
+    """Encodes a scalar value the way `json.dumps` does."""
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    return _SCALAR_ENCODER.encode(value)
+
+
+def iter_json(
+    root: Any,
+    indent: Optional[Union[int, str]] = 2,
+    sort_keys: bool = True,
+    separators: Optional[Tuple[str, str]] = None,
+) -> Iterator[str]:
+    """
+    Encodes a value into JSON chunks.
+
+    Joining the chunks gives the same string as `json.dumps(dumped,
+    indent=indent, sort_keys=sort_keys, separators=separators)`, where
+    `dumped` is the dumped value. Objects that appear several times in the
+    tree are only encoded once.
+    """
+    events = iter_events(root, sort_keys, seen=set())
+    return encode_events(events, indent, sort_keys, separators=separators)
+
+
+def encode_events(
+    events: Iterable[Event],
+    indent: Optional[Union[int, str]] = 2,
+    sort_keys: bool = True,
+    fragments: Optional[Dict[int, str]] = None,
+    separators: Optional[Tuple[str, str]] = None,
+    replay: Optional[Callable[[Any], Iterable[Event]]] = None,
+) -> Iterator[str]:
+    """
+    Encodes events, such as `iter_events` yields, into JSON chunks, like
+    `iter_json` does.
+
+    `fragments` maps the identities of the objects carried by node events to
+    their encoding, which is used rather than encoding them, and to which
+    the objects encoded are added. `replay` returns the events of those
+    objects, which are walked again by default.
+    """
+    if indent is not None and not isinstance(indent, str):
+        indent = " " * indent
+    if fragments is None:
+        fragments = {}
+    chunks: List[str] = []
+    writer = _json_writer(
+        chunks.append, indent, sort_keys, fragments, separators, replay
+    )
+    next(writer)
+    send = writer.send
+    for batch in _batches(events):
+        # The writer is driven by a C loop, rather than event by event.
+        deque(map(send, batch), maxlen=0)
+        yield from chunks
+        chunks.clear()
+
+
+def _json_writer(
+    write: Callable[[str], Any],
+    indent: Optional[str],
+    sort_keys: bool,
+    fragments: Dict[int, str],
+    separators: Optional[Tuple[str, str]] = None,
+    replay: Optional[Callable[[Any], Iterable[Event]]] = None,
+) -> Writer:
+    """
+    Returns a writer encoding the events it is sent into JSON chunks, given
+    to `write`, see `encode_events`.
+    """
+    if indent is None:
+        newline = ""
+        item_separator, key_separator = separators or (", ", ": ")
+    else:
+        newline = "\n"
+        item_separator, key_separator = separators or (",", ": ")
+    spaces = indent or ""
+    if replay is None:
+        replay = lambda node: iter_events(node, sort_keys)
+
+    level = 0
+    # One entry per open collection: whether its next item is the first one.
+    first: List[bool] = []
+    after_key = False
+    while True:
+        event = yield
+        kind = event[0]
+        if kind == MAPPING_END or kind == SEQUENCE_END:
+            if first.pop():
+                continue
+            level -= 1
+            closing = "}" if kind == MAPPING_END else "]"
+            write(newline + spaces * level + closing)
+            continue
+        if kind == _END:
+            return
+
+        prefix = ""
+        if after_key:
+            after_key = False
+        elif first:
+            if first[-1]:
+                first[-1] = False
+                prefix = newline + spaces * level
+            else:
+                prefix = item_separator + newline + spaces * level
+
+        if kind == KEY:
+            write(prefix + _encode_key(event[1]) + key_separator)
+            after_key = True
+        elif kind == SCALAR:
+            write(prefix + _encode_scalar(event[1]))
+        elif kind == NODE:
+            node = event[1]
+            fragment = fragments.get(id(node))
+            if fragment is None:
+                fragment = "".join(
+                    encode_events(
+                        replay(node),
+                        indent,
+                        sort_keys,
+                        fragments,
+                        separators,
+                        replay,
+                    )
+                )
+                fragments[id(node)] = fragment
+            # Fragments are encoded at the top level, and encoded strings
+            # cannot contain line breaks.
+            if newline and level:
+                fragment = fragment.replace(newline, newline + spaces * level)
+            write(prefix + fragment)
+        elif kind == MAPPING_START:
+            if event[1] == 0:
+                # The end event of an empty collection writes nothing.
+                write(prefix + "{}")
+            else:
+                write(prefix + "{")
+                level += 1
+            first.append(True)
+        else:
+            if event[1] == 0:
+                write(prefix + "[]")
+            else:
+                write(prefix + "[")
+                level += 1
+            first.append(True)
+
+
+def write_json(
+    root: Any,
+    fp: IO[str],
+    indent: Optional[Union[int, str]] = 2,
+    sort_keys: bool = True,
+    separators: Optional[Tuple[str, str]] = None,
+) -> None:
+    """Writes a value as JSON into a text file object, chunk by chunk."""
+    write = fp.write
+    for chunk in iter_json(root, indent, sort_keys, separators):
+        write(chunk)
+
+
+def write_yaml(
+    root: Any,
+    fp: IO[str],
+    indent: int = 2,
+    sort_keys: bool = True,
+) -> None:
+    """
+    Writes a value as YAML into a text file object, event by event.
+
+    The output is the same as `yaml.dump(dumped, indent=indent,
+    sort_keys=sort_keys)`, where `dumped` is the dumped value. LibYAML's
+    emitter is used when PyYAML has been built with it.
+    """
+    events = iter_events(root, sort_keys, seen=set())
+    _emit_yaml(events, fp, indent, sort_keys)
+
+
+def _emit_yaml(
+    events: Iterable[Event],
+    fp: IO[str],
+    indent: int,
+    sort_keys: bool,
+    replay: Optional[Callable[[Any], Iterable[Event]]] = None,
+) -> None:
+    """
+    Writes events as YAML into a text file object, see `_yaml_writer`.
+    `replay` returns the events of the objects carried by node events, which
+    are walked again by default.
+    """
+    writer = _yaml_writer(fp, indent, sort_keys, replay)
+    next(writer)
+    deque(map(writer.send, events), maxlen=0)
+    _finish(writer)
+
+
+def _yaml_writer(
+    fp: IO[str],
+    indent: int,
+    sort_keys: bool,
+    replay: Optional[Callable[[Any], Iterable[Event]]] = None,
+) -> Writer:
+    """
+    Returns a writer emitting the events it is sent as YAML into a text file
+    object, see `_emit_yaml`.
+    """
+    if replay is None:
+        replay = lambda node: iter_events(node, sort_keys)
+    dumper = _YAMLDumper(
+        fp,
+        indent=indent,
+        default_flow_style=False,
+        sort_keys=sort_keys,
+    )
+    emit = dumper.emit
+    # Scalar events only depend on the scalar, and specifications repeat the
+    # same few values (types, formats, booleans...) over and over.
+    scalars: Dict[Tuple[type, Any], yaml.ScalarEvent] = {}
+
+    def scalar(value: Any) -> yaml.ScalarEvent:
+        cacheable = type(value) in _YAML_CACHED_SCALARS
+        if cacheable:
+            event = scalars.get((type(value), value))
+            if event is not None:
+                return event
+
+        node = dumper.represent_data(value)
+        if not isinstance(node, yaml.ScalarNode):
+            name = type(value).__name__
+            raise TypeError(f"cannot stream {name} values as YAML scalars")
+        # Same as PyYAML's serializer: the tag is omitted when resolving the
+        # plain (or quoted) scalar gives it back.
+        plain = dumper.resolve(yaml.ScalarNode, node.value, (True, False))
+        quoted = dumper.resolve(yaml.ScalarNode, node.value, (False, True))
+        implicit = (node.tag == plain, node.tag == quoted)
+        event = yaml.ScalarEvent(
+            None, node.tag, implicit, node.value, style=node.style
+        )
+        if cacheable:
+            scalars[(type(value), value)] = event
+        return event
+
+    def convert(event: Event) -> yaml.Event:
+        kind = event[0]
+        if kind == KEY or kind == SCALAR:
+            return scalar(event[1])
+        if kind == MAPPING_START:
+            return _YAML_MAPPING_START
+        if kind == SEQUENCE_START:
+            return _YAML_SEQUENCE_START
+        if kind == MAPPING_END:
+            return _YAML_MAPPING_END
+        return _YAML_SEQUENCE_END
+
+    # The events of the objects that appear several times in the tree.
+    replays: Dict[int, List[yaml.Event]] = {}
+    try:
+        emit(yaml.StreamStartEvent())
+        emit(yaml.DocumentStartEvent(explicit=False))
+        while True:
+            event = yield
+            kind = event[0]
+            if kind == _END:
+                break
+            if kind != NODE:
+                emit(convert(event))
+                continue
+            node = event[1]
+            converted = replays.get(id(node))
+            if converted is None:
+                converted = [convert(e) for e in replay(node)]
+                replays[id(node)] = converted
+            for e in converted:
+                emit(e)
+        emit(yaml.DocumentEndEvent(explicit=False))
+        emit(yaml.StreamEndEvent())
+    finally:
+        dumper.dispose()
+
+
+def _batches(events: Iterable[Event]) -> Iterator[List[Event]]:
+    """Splits events into lists of at most `_BATCH_SIZE` events."""
+    events = iter(events)
+    while True:
+        batch = list(islice(events, _BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _finish(writer: Writer) -> None:
+    """Sends the end of the events to a writer, which then returns."""
+    try:
+        writer.send(_END_EVENT)
+    except StopIteration:
+        return
+    raise RuntimeError("the writer did not return at the end of the events")
+
+
+def _json_format(
+    fp: IO[str],
+    sort_keys: bool,
+    replay: Callable[[Any], Iterable[Event]],
+    fragments: Dict[int, str],
+) -> Writer:
+    return _json_writer(fp.write, "  ", sort_keys, fragments, None, replay)
+
+
+def _compact_json_format(
+    fp: IO[str],
+    sort_keys: bool,
+    replay: Callable[[Any], Iterable[Event]],
+    fragments: Dict[int, str],
+) -> Writer:
+    separators = (",", ":")
+    return _json_writer(
+        fp.write, None, sort_keys, fragments, separators, replay
+    )
+
+
+def _yaml_format(
+    fp: IO[str],
+    sort_keys: bool,
+    replay: Callable[[Any], Iterable[Event]],
+    fragments: Dict[int, str],
+) -> Writer:
+    # The line breaks of YAML depend on the column, so encoded objects
+    # cannot be moved to another level.
+    return _yaml_writer(fp, 2, sort_keys, replay)
+
+
+FORMATS: Dict[str, Callable[..., Writer]] = {
+    "json": _json_format,
+    "json-compact": _compact_json_format,
+    "yaml": _yaml_format,
+}
+"""
+The formats of `write_formats`: JSON indented by two spaces, JSON without
+any whitespace, and YAML indented by two spaces.
+"""
+
+FRAGMENTED_FORMATS = ("json", "json-compact")
+"""The formats that can reuse the encodings of objects, see `write_formats`."""
+
+
+def _tee(
+    batches: Iterable[List[Event]],
+    outputs: Sequence[Tuple[str, IO[str]]],
+    sort_keys: bool,
+    replay: Callable[[Any], Iterable[Event]],
+    fragments: Dict[str, Dict[int, str]],
+) -> None:
+    """Sends each event of the batches to the writer of each output."""
+    writers = []
+    for name, fp in outputs:
+        writer = FORMATS[name](fp, sort_keys, replay, fragments[name])
+        next(writer)
+        writers.append(writer)
+    sends = [writer.send for writer in writers]
+    for batch in batches:
+        for send in sends:
+            deque(map(send, batch), maxlen=0)
+    for writer in writers:
+        _finish(writer)
+
+
+def _write_queued(
+    queue: "Queue[Optional[List[Event]]]",
+    outputs: Sequence[Tuple[str, IO[str]]],
+    sort_keys: bool,
+    replay: Callable[[Any], Iterable[Event]],
+    fragments: Dict[str, Dict[int, str]],
+) -> None:
+    """
+    Writes the batches of events put in a queue into outputs, see `_tee`,
+    until None is put.
+    """
+    try:
+        _tee(iter(queue.get, None), outputs, sort_keys, replay, fragments)
+    except BaseException:
+        # The walk must not wait for a writer that failed.
+        for _ in iter(queue.get, None):
+            pass
+        raise
+
+
+def write_formats(
+    root: Any,
+    outputs: Sequence[Tuple[str, IO[str]]],
+    sort_keys: bool = True,
+    max_workers: Optional[int] = None,
+    deferred: Iterable[Any] = (),
+    fragments: Optional[Dict[str, Dict[int, str]]] = None,
+) -> None:
+    """
+    Writes a value in several formats into text file objects, walking the
+    tree once. `outputs` holds (format, file object) pairs, where the format
+    is a key of `FORMATS`.
+
+    Each event of the walk is sent to the writer of each output as soon as
+    it is produced, so the events are never all held at once. With
+    `max_workers`, the outputs are shared by a pool of threads, each reading
+    the batches of events from a bounded queue.
+
+    The objects in `deferred` are not walked, node events carry them
+    instead, and they are only walked again when a format needs them.
+    `fragments` maps the formats of `FRAGMENTED_FORMATS` to the encodings of
+    objects carried by node events, by identity, which are used rather than
+    encoding the objects, and to which the objects encoded are added.
+    """
+    for name, _ in outputs:
+        if name not in FORMATS:
+            raise ValueError(f"unknown format {name!r}")
+    if fragments is None:
+        fragments = {}
+    for name, _ in outputs:
+        fragments.setdefault(name, {})
+    replay = lambda node: iter_events(node, sort_keys)
+    events = iter_events(
+        root, sort_keys, seen={id(node) for node in deferred}
+    )
+
+    workers = min(max_workers or 1, len(outputs))
+    if workers < 2:
+        _tee(_batches(events), outputs, sort_keys, replay, fragments)
+        return
+    queues: List["Queue[Optional[List[Event]]]"] = [
+        Queue(_QUEUED_BATCHES) for _ in range(workers)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _write_queued,
+                queue,
+                outputs[i::workers],
+                sort_keys,
+                replay,
+                fragments,
+            )
+            for i, queue in enumerate(queues)
+        ]
+        try:
+            for batch in _batches(events):
+                for queue in queues:
+                    queue.put(batch)
+        finally:
+            for queue in queues:
+                queue.put(None)
+        # Raises the errors of the writers.
+        for future in futures:
+            future.result()
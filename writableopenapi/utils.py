@@ -2,22 +2,154 @@
 # Use of this source code is governed by a BSD-style
 # license that can be found in the LICENSE file.
 
-import json
-import yaml
+import hashlib
+import os
+import secrets
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Iterable, List, Mapping, Optional, Tuple, Union
 from writableopenapi.openapi.v3_1 import OpenAPI
+from writableopenapi.serializers import serialize
 
+_LIBRARIES = tuple(
+    os.path.join(os.path.abspath(path), "")
+    for key in ("stdlib", "platstdlib", "purelib", "platlib")
+    if (path := sysconfig.get_paths().get(key))
+)
+_PACKAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "")
 
-def into_json(api: OpenAPI) -> str:
+
+def into_json(api: OpenAPI, serializer: Optional[str] = None) -> str:
     """Convert OpenAPI object into JSON string."""
-    return json.dumps(api.dump(), indent=2, sort_keys=True)
+    return serialize(api, "json", serializer)
 
 
-def into_yaml(api: OpenAPI) -> str:
+def into_yaml(api: OpenAPI, serializer: Optional[str] = None) -> str:
     """Convert OpenAPI object into YAML string."""
-    return yaml.dump(api.dump(), indent=2, sort_keys=True)
+    return serialize(api, "yaml", serializer)
+
+
+@dataclass
+class WriteReport:
+    """What `write_files` did."""
+
+    changed: List[str] = field(default_factory=list)
+    """The files written, because their content changed or they were new."""
+    unchanged: List[str] = field(default_factory=list)
+    """The files left untouched, because they held the content already."""
+
+
+def _holds(filename: str, data: bytes) -> bool:
+    """Returns whether a file holds the given data."""
+    try:
+        if os.path.getsize(filename) != len(data):
+            return False
+        with open(filename, "rb") as file:
+            existing = hashlib.file_digest(file, "sha256").digest()
+    except OSError:
+        return False
+    return existing == hashlib.sha256(data).digest()
+
+
+def _create(filename: str) -> Tuple[int, str]:
+    """
+    Creates a temporary file next to a file, and returns its descriptor and
+    name. Like a file created by `open()`, it gets the default permissions
+    given the umask of the process, which `tempfile.mkstemp` would restrict
+    to the owner.
+    """
+    prefix = os.path.join(
+        os.path.dirname(os.path.abspath(filename)),
+        f".{os.path.basename(filename)}.",
+    )
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temporary = f"{prefix}{secrets.token_hex(8)}.tmp"
+        try:
+            return os.open(temporary, flags, 0o666), temporary
+        except FileExistsError:
+            continue
+
+
+def _replace(filename: str, data: bytes) -> None:
+    """
+    Writes a file through a temporary file renamed over it, so readers never
+    see it half written. The file keeps its permissions, and new files get
+    the default ones.
+    """
+    try:
+        mode: Optional[int] = os.stat(filename).st_mode & 0o7777
+    except OSError:
+        mode = None
+    fd, temporary = _create(filename)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        if mode is not None:
+            os.chmod(temporary, mode)
+        os.replace(temporary, filename)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def write_files(
+    outputs: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+    max_workers: Optional[int] = None,
+) -> WriteReport:
+    """
+    Writes contents into files, given by filename, encoded as UTF-8.
+
+    Files already holding their content are not touched, so their
+    modification time does not change. The others are replaced atomically.
+    With `max_workers`, the files are written by a pool of threads.
+    """
+    if isinstance(outputs, Mapping):
+        outputs = outputs.items()
+    outputs = list(outputs)
+
+    def write(output: Tuple[str, str]) -> bool:
+        filename, content = output
+        data = content.encode("utf-8")
+        if _holds(filename, data):
+            return False
+        _replace(filename, data)
+        return True
+
+    if max_workers is None or len(outputs) < 2:
+        results = [write(output) for output in outputs]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(write, outputs))
+
+    report = WriteReport()
+    for (filename, _), changed in zip(outputs, results):
+        if changed:
+            report.changed.append(filename)
+        else:
+            report.unchanged.append(filename)
+    return report
+
+
+def write_file(content: str, filename: str) -> bool:
+    """
+    Write OpenAPI object into file, unless the file holds it already.
+    Returns whether the file was written, see `write_files`.
+    """
+    return bool(write_files([(filename, content)]).changed)
 
 
-def write_file(content: str, filename: str) -> None:
-    """Write OpenAPI object into file."""
-    with open(filename, "w") as file:
-        file.write(content)
+def module_source(module: ModuleType) -> Optional[str]:
+    """
+    Returns the path of the source of a module, unless it has none or it
+    belongs to the standard library, an installed package or writableopenapi.
+    """
+    path = getattr(module, "__file__", None)
+    if not path or not path.endswith(".py"):
+        return None
+    path = os.path.abspath(path)
+    if path.startswith(_LIBRARIES) or path.startswith(_PACKAGE):
+        return None
+    return path
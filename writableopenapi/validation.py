@@ -0,0 +1,476 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Validation of whole specifications, for what the objects cannot check on
+their own: unique operation identifiers, path parameters matching the path
+templates, defined security schemes, existing references...
+
+The rules are registered by class. A `Validator` compiles the rules it runs
+into a table from classes to their checks once, and then checks a tree in a
+single walk, looking up the checks of each object by its class. The rules
+needing the whole specification collect what they need during the walk, and
+report once it is over.
+
+The path items and the entries of the components can be checked by a pool
+of processes, see `Validator.validate`.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from multiprocessing.context import BaseContext
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from writableopenapi.openapi.v3_1 import (
+    DumpPath,
+    OpenAPI,
+    Operation,
+    Parameter,
+    PathItem,
+    Reference,
+    SecurityRequirement,
+    SpecificationExtension,
+)
+from writableopenapi.parallel import forks
+from writableopenapi.references import (
+    Link,
+    Resolver,
+    link_path,
+    pointer,
+    pointer_tokens,
+)
+
+Findings = Iterable[Tuple[DumpPath, str]]
+"""The paths of the problems found, relative to the object, and messages."""
+
+NodeRule = Callable[[Any, "Context"], Findings]
+"""Checks an object."""
+
+FinalRule = Callable[["Context"], Findings]
+"""Checks what was collected during the walk, the paths being absolute."""
+
+
+@dataclass(frozen=True)
+class Problem:
+    """A problem found in a specification."""
+
+    path: DumpPath
+    """Where the problem is, like `walk()` yields."""
+    rule: str
+    """The name of the rule that found it."""
+    message: str
+
+    def __str__(self) -> str:
+        return f"{pointer(self.path)}: {self.message} ({self.rule})"
+
+
+class Context:
+    """What the rules share while a specification is checked."""
+
+    def __init__(self, api: OpenAPI) -> None:
+        self.api = api
+        self.resolver = Resolver(api)
+        self.link: Link = None
+        # The path of the object being checked, as a linked list.
+        self.operation_ids: Dict[str, List[DumpPath]] = {}
+        """The paths of the operations, by identifier."""
+        schemes = api.components and api.components.security_schemes
+        self.security_schemes: Set[str] = set(schemes or ())
+        """The names of the security schemes of the components."""
+        self.deferred: List[Tuple[int, Link, Any]] = []
+        """
+        The checks that resolved references out of the components in a
+        worker process, to be run again by the calling process, as the index
+        of the check among the ones of the class, the path and the object.
+        """
+
+    def path(self) -> DumpPath:
+        """Returns the path of the object being checked."""
+        return link_path(self.link)
+
+    def parameter(self, value: Any) -> Optional[Parameter]:
+        """Returns a parameter, or the one a reference points to if any."""
+        if isinstance(value, Reference):
+            try:
+                value = self.resolver.resolve(value)
+            except (KeyError, ValueError):
+                return None
+        return value if isinstance(value, Parameter) else None
+
+
+_NODE_RULES: List[Tuple[str, type, NodeRule]] = []
+_FINAL_RULES: List[Tuple[str, FinalRule]] = []
+
+
+def rule(name: str, cls: type) -> Callable[[NodeRule], NodeRule]:
+    """Registers a function checking the objects of a class."""
+
+    def decorator(check: NodeRule) -> NodeRule:
+        _NODE_RULES.append((name, cls, check))
+        return check
+
+    return decorator
+
+
+def final_rule(name: str) -> Callable[[FinalRule], FinalRule]:
+    """Registers a function checking what the rule collected."""
+
+    def decorator(check: FinalRule) -> FinalRule:
+        _FINAL_RULES.append((name, check))
+        return check
+
+    return decorator
+
+
+def rules() -> List[str]:
+    """Returns the names of the rules, in the order they were registered."""
+    names = [name for name, _, _ in _NODE_RULES]
+    names += [name for name, _ in _FINAL_RULES]
+    return list(dict.fromkeys(names))
+
+
+class _Deferred(Exception):
+    """A reference that cannot be resolved by a worker process."""
+
+
+class _ComponentsResolver(Resolver):
+    """
+    Resolves the references to the components of a specification given
+    without its paths, and defers the other ones.
+    """
+
+    def lookup(self, ref: str) -> Any:
+        tokens = pointer_tokens(ref)
+        if tokens and tokens[0] != "components":
+            raise _Deferred(ref)
+        return super().lookup(ref)
+
+
+# The entries checked in the worker processes, and how. With the fork start
+# method, the pool initializer's arguments are inherited rather than pickled.
+# With the other ones, the specification is given without its paths, and each
+# shard with its own entries.
+_STATE: Optional[Tuple["Validator", OpenAPI, Sequence[Tuple[Link, Any]]]]
+_STATE = None
+
+
+def _initialize(
+    validator: "Validator",
+    api: OpenAPI,
+    entries: Sequence[Tuple[Link, Any]],
+) -> None:
+    global _STATE
+    _STATE = (validator, api, entries)
+
+
+def _check_shard(
+    shard: Union[range, Sequence[Tuple[Link, Any]]],
+) -> Tuple[
+    List[Problem], Dict[str, List[DumpPath]], List[Tuple[int, Link, Any]]
+]:
+    """
+    Checks a shard of the entries, given by their indices or as is, and
+    returns what it collected and deferred too.
+    """
+    validator, api, entries = _STATE
+    context = Context(api)
+    if isinstance(shard, range):
+        shard = [entries[i] for i in shard]
+    else:
+        context.resolver = _ComponentsResolver(api)
+    problems: List[Problem] = []
+    for link, entry in shard:
+        validator._walk(entry, link, context, problems, frozenset())
+    return problems, context.operation_ids, context.deferred
+
+
+class Validator:
+    """
+    Checks specifications against a selection of the rules, all of them by
+    default:
+
+        for problem in Validator().validate(api):
+            print(problem)
+    """
+
+    def __init__(self, names: Optional[Iterable[str]] = None) -> None:
+        selected = set(rules() if names is None else names)
+        unknown = selected - set(rules())
+        if unknown:
+            raise ValueError(f"unknown rules {', '.join(sorted(unknown))}")
+        self.table: Dict[type, Tuple[Tuple[str, NodeRule], ...]] = {}
+        """The checks of each class, with the names of their rules."""
+        for name, cls, check in _NODE_RULES:
+            if name in selected:
+                self.table[cls] = self.table.get(cls, ()) + ((name, check),)
+        self.final = [(n, check) for n, check in _FINAL_RULES if n in selected]
+        """The checks run after the walk."""
+
+    def _walk(
+        self,
+        root: Any,
+        link: Link,
+        context: Context,
+        problems: List[Problem],
+        skipped: Set[int],
+    ) -> None:
+        """
+        Checks a value and its descendants, except the items of the
+        dictionaries whose identities are `skipped`.
+        """
+        table = self.table
+        stack: List[Tuple[Any, Link]] = [(root, link)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            value, link = pop()
+            if isinstance(value, SpecificationExtension):
+                checks = table.get(type(value))
+                if checks is not None:
+                    context.link = link
+                    for i, (name, check) in enumerate(checks):
+                        try:
+                            found = list(check(value, context))
+                        except _Deferred:
+                            context.deferred.append((i, link, value))
+                            continue
+                        for path, message in found:
+                            path = link_path(link) + path
+                            problems.append(Problem(path, name, message))
+                items: Iterable[Tuple[Any, Any]] = value.members()
+            elif isinstance(value, list):
+                items = enumerate(value)
+            elif isinstance(value, dict):
+                if id(value) in skipped:
+                    continue
+                items = value.items()
+            else:
+                continue
+            for key, item in items:
+                if isinstance(item, (SpecificationExtension, list, dict)):
+                    push((item, (link, key)))
+
+    def validate(
+        self,
+        api: OpenAPI,
+        max_workers: Optional[int] = 1,
+        mp_context: Optional[BaseContext] = None,
+    ) -> List[Problem]:
+        """
+        Checks a specification, and returns the problems found, sorted by
+        path.
+
+        With `max_workers` above one, or None for the number of CPUs, the
+        path items and the entries of the components are checked by a pool
+        of processes, in shards of consecutive entries, and the rest of the
+        specification by the calling process. The problems found are the
+        same. Unless the processes are forked, each shard is pickled with its
+        own entries, and the workers are given the specification without its
+        paths: the checks resolving references out of the components are run
+        again by the calling process.
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        context = Context(api)
+        problems: List[Problem] = []
+        maps = [((None, "paths"), api.paths)]
+        if api.components is not None:
+            link = (None, "components")
+            for section, value in api.components.members():
+                if isinstance(value, dict):
+                    maps.append(((link, section), value))
+        entries = [
+            ((link, key), entry)
+            for link, entries_map in maps
+            for key, entry in entries_map.items()
+        ]
+
+        if max_workers < 2 or len(entries) < 2:
+            self._walk(api, None, context, problems, frozenset())
+        else:
+            skipped = {id(entries_map) for _, entries_map in maps}
+            self._walk(api, None, context, problems, skipped)
+            size = -(-len(entries) // (max_workers * 4))
+            shards: List[Union[range, Sequence[Tuple[Link, Any]]]] = [
+                range(i, min(i + size, len(entries)))
+                for i in range(0, len(entries), size)
+            ]
+            initargs = (self, api, entries)
+            if not forks(mp_context):
+                shards = [entries[shard.start : shard.stop] for shard in shards]
+                initargs = (self, replace(api, paths={}), ())
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(shards)),
+                mp_context=mp_context,
+                initializer=_initialize,
+                initargs=initargs,
+            ) as executor:
+                results = executor.map(_check_shard, shards)
+                for found, operation_ids, deferred in results:
+                    problems.extend(found)
+                    for operation_id, paths in operation_ids.items():
+                        context.operation_ids.setdefault(
+                            operation_id, []
+                        ).extend(paths)
+                    for i, link, value in deferred:
+                        name, check = self.table[type(value)][i]
+                        context.link = link
+                        for path, message in check(value, context):
+                            path = link_path(link) + path
+                            problems.append(Problem(path, name, message))
+
+        for name, check in self.final:
+            for path, message in check(context):
+                problems.append(Problem(path, name, message))
+        problems.sort(key=lambda problem: (pointer(problem.path), problem.rule))
+        return problems
+
+
+_DEFAULT: Optional[Validator] = None
+
+
+def validate(
+    api: OpenAPI,
+    max_workers: Optional[int] = 1,
+    mp_context: Optional[BaseContext] = None,
+) -> List[Problem]:
+    """Checks a specification against all the rules, see `Validator`."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = Validator()
+    return _DEFAULT.validate(api, max_workers, mp_context)
+
+
+@rule("operation-ids", Operation)
+def _collect_operation_id(node: Operation, context: Context) -> Findings:
+    if node.operation_id is not None:
+        paths = context.operation_ids.setdefault(node.operation_id, [])
+        paths.append(context.path())
+    return ()
+
+
+@final_rule("operation-ids")
+def _check_operation_ids(context: Context) -> Findings:
+    for operation_id, paths in context.operation_ids.items():
+        if len(paths) > 1:
+            for path in paths:
+                yield path + ("operationId",), (
+                    f"operationId {operation_id!r} is used by "
+                    f"{len(paths)} operations"
+                )
+
+
+@rule("responses", Operation)
+def _check_responses(node: Operation, context: Context) -> Findings:
+    if not node.responses:
+        return [(("responses",), "an operation must have responses")]
+    return ()
+
+
+@rule("unique-parameters", Operation)
+@rule("unique-parameters", PathItem)
+def _check_unique_parameters(node: Any, context: Context) -> Findings:
+    seen: Set[Tuple[str, str]] = set()
+    for i, value in enumerate(node.parameters or ()):
+        parameter = context.parameter(value)
+        if parameter is None:
+            continue
+        key = (parameter.name, parameter.in_)
+        if key in seen:
+            yield ("parameters", i), (
+                f"{parameter.in_} parameter {parameter.name!r} is defined "
+                f"more than once"
+            )
+        seen.add(key)
+
+
+_TEMPLATE = re.compile(r"\{([^{}]+)\}")
+_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+
+@rule("path-parameters", PathItem)
+def _check_path_parameters(node: PathItem, context: Context) -> Findings:
+    # Only the path items of the paths have a template, not the ones of the
+    # callbacks or the components.
+    link = context.link
+    if link is None or link[0] != (None, "paths"):
+        return
+    template = _TEMPLATE.findall(link[1])
+
+    def path_parameters(
+        owner: DumpPath, values: Optional[List[Any]]
+    ) -> Dict[str, DumpPath]:
+        found = {}
+        for i, value in enumerate(values or ()):
+            parameter = context.parameter(value)
+            if parameter is not None and parameter.in_ == "path":
+                found[parameter.name] = owner + ("parameters", i)
+        return found
+
+    shared = path_parameters((), node.parameters)
+    for name, path in shared.items():
+        if name not in template:
+            yield path, f"path parameter {name!r} is not in the path"
+    for method in _METHODS:
+        operation = getattr(node, method)
+        if operation is None:
+            continue
+        own = path_parameters((method,), operation.parameters)
+        for name, path in own.items():
+            if name not in template:
+                yield path, f"path parameter {name!r} is not in the path"
+        for name in template:
+            if name not in own and name not in shared:
+                yield (method,), f"path parameter {name!r} is not defined"
+
+
+@rule("path-parameters", Parameter)
+def _check_required_path_parameter(
+    node: Parameter, context: Context
+) -> Findings:
+    if node.in_ == "path" and node.required is not True:
+        return [(("required",), "path parameters must be required")]
+    return ()
+
+
+@rule("security", SecurityRequirement)
+def _check_security_requirement(
+    node: SecurityRequirement, context: Context
+) -> Findings:
+    for name in node.security_requirement:
+        if name not in context.security_schemes:
+            yield (name,), f"security scheme {name!r} is not defined"
+
+
+@rule("security", Operation)
+def _check_operation_security(node: Operation, context: Context) -> Findings:
+    for i, requirement in enumerate(node.security or ()):
+        for name in requirement:
+            if name not in context.security_schemes:
+                yield ("security", i, name), (
+                    f"security scheme {name!r} is not defined"
+                )
+
+
+@rule("references", Reference)
+def _check_reference(node: Reference, context: Context) -> Findings:
+    if pointer_tokens(node.ref) is None:
+        return ()
+    try:
+        context.resolver.lookup(node.ref)
+    except KeyError:
+        return [(("$ref",), f"{node.ref} does not exist")]
+    return ()
@@ -0,0 +1,168 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""
+Polling of the Python modules defining specifications, for the watch mode of
+the command line.
+
+The imports of each watched module are read from its source, so that when a
+module changes, it is reloaded along with the modules importing it, directly
+or not, and nothing else.
+"""
+
+import ast
+import importlib
+import os
+import sys
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from writableopenapi.utils import module_source
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _imports(module: ModuleType, path: str) -> Set[str]:
+    """Returns the names of the modules a module may import."""
+    try:
+        with open(path, "rb") as fp:
+            tree = ast.parse(fp.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return set()
+
+    names = set()
+    package = getattr(module, "__package__", None) or ""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                parts = alias.name.split(".")
+                names.update(
+                    ".".join(parts[:i]) for i in range(1, len(parts) + 1)
+                )
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parent = package.rsplit(".", node.level - 1)[0]
+                base = f"{parent}.{base}" if base else parent
+            names.add(base)
+            # `from package import module` imports a submodule.
+            names.update(f"{base}.{alias.name}" for alias in node.names)
+    return names
+
+
+class Watcher:
+    """
+    Watches the source files of modules, and reloads the modules that
+    changed and their dependents.
+    """
+
+    def __init__(self, modules: Iterable[ModuleType] = ()) -> None:
+        self._paths: Dict[str, str] = {}
+        self._stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._imports: Dict[str, Set[str]] = {}
+        for module in modules:
+            self.track(module)
+
+    @property
+    def modules(self) -> List[str]:
+        """The names of the watched modules."""
+        return list(self._paths)
+
+    def track(self, module: ModuleType) -> bool:
+        """
+        Watches a module, unless it has no source file or belongs to the
+        standard library, an installed package or writableopenapi. Returns
+        whether the module is watched.
+        """
+        path = module_source(module)
+        if path is None:
+            return False
+        self._paths[module.__name__] = path
+        self._stats[module.__name__] = _stat(path)
+        self._imports[module.__name__] = _imports(module, path)
+        return True
+
+    def track_new(self, names: Iterable[str]) -> None:
+        """Watches the given modules of `sys.modules` not watched yet."""
+        for name in names:
+            module = sys.modules.get(name)
+            if module is not None and name not in self._paths:
+                self.track(module)
+
+    def changed(self) -> Set[str]:
+        """Returns the watched modules whose source changed since tracked."""
+        return {
+            name
+            for name, path in self._paths.items()
+            if _stat(path) != self._stats[name]
+        }
+
+    def affected(self, names: Iterable[str]) -> List[str]:
+        """
+        Returns the given modules and the watched modules importing them,
+        directly or not, with the modules before the ones importing them.
+        """
+        dependents: Dict[str, Set[str]] = {name: set() for name in self._paths}
+        for name, imported in self._imports.items():
+            for dependency in imported:
+                if dependency in dependents and dependency != name:
+                    dependents[dependency].add(name)
+
+        affected = set()
+        stack = [name for name in names if name in dependents]
+        while stack:
+            name = stack.pop()
+            if name not in affected:
+                affected.add(name)
+                stack.extend(dependents[name])
+
+        # Depth-first post-order over the imports: dependencies come first.
+        ordered: List[str] = []
+        done: Set[str] = set()
+        for root in sorted(affected):
+            stack = [(root, False)]
+            while stack:
+                name, expanded = stack.pop()
+                if expanded:
+                    ordered.append(name)
+                    continue
+                if name in done:
+                    continue
+                done.add(name)
+                stack.append((name, True))
+                stack.extend(
+                    (dependency, False)
+                    for dependency in sorted(self._imports[name], reverse=True)
+                    if dependency in affected and dependency not in done
+                )
+        return ordered
+
+    def poll(self) -> List[str]:
+        """
+        Reloads the modules that changed and their dependents, and returns
+        their names in the order they were reloaded. The modules they import
+        for the first time are watched too.
+
+        When a module fails to reload, the error is raised once the modules
+        are watched again, so the next change is picked up.
+        """
+        changed = self.changed()
+        if not changed:
+            return []
+
+        reloaded = self.affected(changed)
+        before = set(sys.modules)
+        try:
+            for name in reloaded:
+                importlib.reload(sys.modules[name])
+        finally:
+            for name in reloaded:
+                self.track(sys.modules[name])
+            self.track_new(set(sys.modules) - before)
+        return reloaded
@@ -0,0 +1,110 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import json
+from benchmarks import compare, suite
+
+
+def results(best, runs=None, peak=2**20, shapes=("small",)):
+    phase = {"best": best, "runs": runs or [best] * 3, "peak_bytes": peak}
+    return {
+        "format": suite.FORMAT,
+        "python": "3.11.0",
+        "implementation": "CPython",
+        "machine": "x86_64",
+        "shapes": {
+            name: {"shape": {"paths": 20}, "phases": {"dump": dict(phase)}}
+            for name in shapes
+        },
+    }
+
+
+def write(path, value):
+    path.write_text(json.dumps(value))
+    return str(path)
+
+
+def test_compare_within_tolerance(tmp_path, capsys):
+    baseline = write(tmp_path / "baseline.json", results(0.100))
+    current = write(tmp_path / "current.json", results(0.105, peak=2**20 + 1))
+    assert compare.main([baseline, current]) == 0
+
+    comparisons = compare.compare(results(0.100), results(0.105))
+    assert [(c.metric, c.status) for c in comparisons] == [
+        ("time", compare.UNCHANGED),
+        ("memory", compare.UNCHANGED),
+    ]
+    assert "regressions" not in capsys.readouterr().out
+
+
+def test_compare_regression(tmp_path, capsys):
+    baseline = write(tmp_path / "baseline.json", results(0.100))
+    current = write(tmp_path / "current.json", results(0.150))
+    assert compare.main([baseline, current]) == 1
+    assert "1 regressions" in capsys.readouterr().out
+
+    comparisons = compare.compare(results(0.100), results(0.150))
+    assert comparisons[0].status == compare.REGRESSED
+    assert round(comparisons[0].change, 6) == 0.5
+    # A higher threshold lets the change through.
+    comparisons = compare.compare(results(0.100), results(0.150), 0.6)
+    assert comparisons[0].status == compare.UNCHANGED
+    comparisons = compare.compare(results(0.150), results(0.100))
+    assert comparisons[0].status == compare.IMPROVED
+
+
+def test_compare_noisy_runs_widen_the_tolerance():
+    noisy = [0.100, 0.130, 0.160, 0.190, 0.220]
+    comparisons = compare.compare(results(0.100), results(0.150, noisy))
+    assert comparisons[0].tolerance > 0.5
+    assert comparisons[0].status == compare.UNCHANGED
+
+
+def test_compare_memory_threshold():
+    current = results(0.100, peak=2**20 * 2)
+    comparisons = compare.compare(results(0.100), current)
+    assert [(c.metric, c.status) for c in comparisons] == [
+        ("time", compare.UNCHANGED),
+        ("memory", compare.REGRESSED),
+    ]
+    comparisons = compare.compare(results(0.100), current, memory_threshold=2)
+    assert comparisons[1].status == compare.UNCHANGED
+
+
+def test_compare_missing_benchmarks(tmp_path, capsys):
+    before = results(0.100, shapes=("small", "deep"))
+    after = results(0.100)
+    del after["shapes"]["small"]["phases"]["dump"]
+    after["shapes"]["small"]["phases"]["into_json"] = {
+        "best": 0.5,
+        "runs": [0.5],
+        "peak_bytes": 2**20,
+    }
+    assert compare.compare(before, after) == []
+
+    baseline = write(tmp_path / "baseline.json", before)
+    current = write(tmp_path / "current.json", results(0.100))
+    assert compare.main([baseline, current]) == 0
+    assert "deep is missing" in capsys.readouterr().out
+
+
+def test_compare_missing_baseline(tmp_path, capsys):
+    current = write(tmp_path / "current.json", results(0.100))
+    missing = str(tmp_path / "missing.json")
+    assert compare.main([missing, current]) == 2
+    assert f"cannot read {missing}" in capsys.readouterr().out
+    assert suite.main(["--baseline", missing]) == 2
+
+
+def test_suite_never_overwrites_the_baseline(tmp_path, capsys):
+    baseline = write(tmp_path / "baseline.json", results(0.100))
+    content = (tmp_path / "baseline.json").read_text()
+    assert suite.main(["--baseline", baseline, "--output", baseline]) == 2
+    assert "would be overwritten" in capsys.readouterr().out
+    assert (tmp_path / "baseline.json").read_text() == content
+
+    old = results(0.100)
+    old["format"] = suite.FORMAT + 1
+    other = write(tmp_path / "old.json", old)
+    assert suite.main(["--baseline", other]) == 2
@@ -0,0 +1,258 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import copy
+import dataclasses
+import inspect
+import pickle
+import pytest
+import weakref
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.stream import iter_json
+
+
+def build() -> OpenAPI:
+    pet = Schema(
+        type="object",
+        properties={
+            "id": Schema(type="integer"),
+            "name": Schema(type="string"),
+        },
+    )
+    return OpenAPI(
+        info=Info(title="Dump", version="1.0.0", extensions={"x-a": 1}),
+        paths={
+            "/pets": PathItem(
+                get=Operation(
+                    responses={
+                        "200": Response(
+                            description="A pet",
+                            content={"application/json": MediaType(schema=pet)},
+                        ),
+                    },
+                ),
+            ),
+            "/stores": PathItem(summary="Stores"),
+        },
+        components=Components(schemas={"Pet": pet}),
+    )
+
+
+def test_dump_does_not_mutate_extensions():
+    api = build()
+    api.dump()
+    assert api.info.extensions == {"x-a": 1}
+
+
+def test_dump_writes_the_extensions_first():
+    schema = Schema(type="string", extensions={"x-a": True, "type": "any"})
+    assert list(schema.dump().items()) == [("x-a", True), ("type", "string")]
+    ref = Reference(ref="#/components/schemas/Pet", extensions={"x-b": 1})
+    assert list(ref.dump()) == ["x-b", "$ref"]
+    parent = Schema(properties={"id": schema}, extensions={"x-c": 1})
+    dumped = parent.dump()
+    assert list(dumped) == ["x-c", "properties"]
+    assert dumped["properties"]["id"] == schema.dump()
+
+
+def members_dump(value):
+    if isinstance(value, SpecificationExtension):
+        data = dict(value.extensions)
+        data.update((k, members_dump(v)) for k, v in value.members())
+        return data
+    if isinstance(value, list):
+        return [members_dump(v) for v in value]
+    if isinstance(value, dict):
+        return {k: members_dump(v) for k, v in value.items()}
+    return value
+
+
+def test_dumps_follow_the_members():
+    classes = [
+        cls
+        for cls in SpecificationExtension.__subclasses__()
+        if cls.__module__ == SpecificationExtension.__module__
+    ]
+    names = [cls.__name__ for cls in classes] + ["Self"]
+    for cls in classes:
+        node = cls()
+        assert list(node.dump().items()) == list(members_dump(node).items())
+        # Fields are assigned, rather than passed to the constructor, so they
+        # are all set despite the checks of `__post_init__`.
+        for f in dataclasses.fields(cls)[1:]:
+            hint = str(f.type)
+            if any(name in hint for name in names):
+                value = Reference(ref=f"#/{f.name}")
+            else:
+                value = f.name
+            if hint.startswith(("typing.Dict", "typing.Optional[typing.Dict")):
+                value = {"a": value}
+            setattr(node, f.name, value)
+        dumped = node.dump()
+        assert list(dumped.items()) == list(members_dump(node).items())
+
+
+def test_dump_is_cached():
+    api = build()
+    assert api.cached_dump() is api.cached_dump()
+    assert api.dump() == api.cached_dump()
+
+
+def test_dump_belongs_to_the_caller():
+    api = build()
+    api.cached_dump()
+    first = api.dump()
+    assert first is not api.dump()
+    first["info"]["title"] = "Changed"
+    first["paths"].clear()
+    assert api.dump() == api.cached_dump() == build().dump()
+
+
+def test_field_assignment_invalidates_ancestors():
+    api = build()
+    first = api.cached_dump()
+    stores = first["paths"]["/stores"]
+
+    pet = api.components.schemas["Pet"]
+    pet.properties["name"].description = "The name"
+
+    second = api.cached_dump()
+    assert second is not first
+    pets = second["paths"]["/pets"]["get"]["responses"]["200"]["content"]
+    name = pets["application/json"]["schema"]["properties"]["name"]
+    assert name == {"type": "string", "description": "The name"}
+    assert second["components"]["schemas"]["Pet"]["properties"]["name"] is name
+    # Untouched branches are reused as is.
+    assert second["paths"]["/stores"] is stores
+    assert second["info"] is first["info"]
+
+
+def test_invalidate_after_in_place_modification():
+    api = build()
+    api.cached_dump()
+    api.paths["/users"] = PathItem(summary="Users")
+    assert api.dump()["paths"]["/users"] == {"summary": "Users"}
+    assert "/users" not in api.cached_dump()["paths"]
+    api.invalidate()
+    assert api.cached_dump()["paths"]["/users"] == {"summary": "Users"}
+
+
+def test_copies_do_not_share_the_cache():
+    api = build()
+    api.cached_dump()
+    for clone in (copy.deepcopy(api), pickle.loads(pickle.dumps(api))):
+        clone.info.title = "Clone"
+        assert clone.cached_dump()["info"]["title"] == "Clone"
+        assert api.cached_dump()["info"]["title"] == "Dump"
+
+
+def test_objects_are_slotted():
+    schema = Schema(type="string")
+    assert not hasattr(schema, "__dict__")
+    assert Schema("string") == Schema(extensions="string")
+    assert "_dump_cache" not in repr(schema)
+    info = Info(title="Pets", version="1.0.0")
+    info.dump()
+    assert [f.name for f in dataclasses.fields(info)][:2] == [
+        "extensions",
+        "title",
+    ]
+    assert "_dump_cache" not in dataclasses.asdict(info)
+
+
+def test_constructors_keep_the_type_hints():
+    assert inspect.signature(Reference).parameters["ref"].annotation is str
+    title = inspect.signature(Schema).parameters["title"]
+    assert title.annotation == Optional[str]
+    assert title.default is None
+
+
+def test_sparse_objects():
+    schema = Schema(format="uuid")
+    schema.title = "Id"
+    schema.type = "string"
+    assert list(schema.dump()) == ["title", "type", "format"]
+    schema.title = None
+    assert list(schema.members()) == [("type", "string"), ("format", "uuid")]
+    assert schema.title is None
+    assert schema == Schema(type="string", format="uuid")
+    assert Operation(responses=None).dump() == {"responses": None}
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_sparse_dataclass_subclasses(slots):
+    @dataclasses.dataclass(slots=slots)
+    class Named(Schema):
+        name: str = ""
+
+    @dataclasses.dataclass(slots=slots)
+    class Owned(Operation):
+        owner: str = ""
+
+    schema = Named(type="string", name="id")
+    assert schema.name == "id"
+    assert schema.dump() == {"type": "string"}
+    schema.title = "Id"
+    assert schema.dump() == {"title": "Id", "type": "string"}
+    operation = Owned(operation_id="get", responses={}, owner="pets")
+    assert operation.dump() == {"operationId": "get", "responses": {}}
+    assert copy.copy(operation) == operation
+
+
+def test_dump_deep_schema():
+    schema = Schema(type="string")
+    for _ in range(5000):
+        schema = Schema(items=schema, all_of=[Schema(nullable=True)])
+    assert "".join(iter_json(schema.dump())) == "".join(schema.iter_json())
+
+
+def test_dump_failure_keeps_objects_dirty():
+    callback = Callback(paths=["/pets"])
+    api = OpenAPI(components=Components(callbacks={"pets": callback}))
+    with pytest.raises(AttributeError):
+        api.cached_dump()
+    callback.paths = {"/pets": PathItem(summary="Pets")}
+    dumped = api.cached_dump()["components"]["callbacks"]["pets"]
+    assert dumped == {"/pets": {"summary": "Pets"}}
+
+
+def test_schema_read_only_and_write_only():
+    schema = Schema(read_only=False, write_only=False)
+    assert schema.dump() == {"readOnly": False, "writeOnly": False}
+    assert Schema(read_only=True, write_only=False).read_only
+    with pytest.raises(ValueError):
+        Schema(read_only=True, write_only=True)
+
+
+def test_walk():
+    api = build()
+    paths = [path for path, node in api.walk()]
+    assert paths[:3] == [(), ("info",), ("paths", "/pets")]
+    assert ("paths", "/pets", "get", "responses", "200") in paths
+    assert paths[-1] == ("components", "schemas", "Pet", "properties", "name")
+
+
+def test_parent_reusing_the_identity_of_a_collected_one():
+    name = Schema(type="string")
+    first = Schema(properties={"name": name})
+    first.cached_dump()
+    del first
+    # A new parent reusing the identity of the collected one, as CPython
+    # often does, finds its dead reference.
+    dead = Schema()
+    ref = weakref.ref(dead)
+    del dead
+    second = Schema(properties={"name": name})
+    name._parents[id(second)] = ref
+    second.cached_dump()
+    name.description = "The name"
+    dumped = second.cached_dump()
+    assert dumped["properties"]["name"]["description"] == "The name"
+
+
+def test_tuples_are_dumped_like_lists():
+    schema = Schema(all_of=(Schema(type="string"),))
+    assert schema.dump() == {"allOf": [{"type": "string"}]}
+    assert "".join(iter_json(schema.dump())) == "".join(schema.iter_json())
+    assert [path for path, _ in schema.walk()] == [(), ("allOf", 0)]
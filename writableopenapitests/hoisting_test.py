@@ -0,0 +1,174 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import json
+from writableopenapi.hoisting import hoist_components
+from writableopenapi.macros import types
+from writableopenapi.macros.interning import interning
+from writableopenapi.openapi.v3_1 import *
+
+
+def pet() -> Schema:
+    return Schema(
+        type="object",
+        title="Pet",
+        required=["id", "name"],
+        properties={
+            "id": Schema(type="integer", format="int64"),
+            "name": Schema(type="string"),
+        },
+    )
+
+
+def content(schema: Schema) -> Dict[str, MediaType]:
+    return {"application/json": MediaType(schema=schema)}
+
+
+def build() -> OpenAPI:
+    return OpenAPI(
+        info=Info(title="Hoisting", version="1.0.0"),
+        paths={
+            "/pets": PathItem(
+                get=Operation(
+                    responses={
+                        "200": Response(
+                            description="Pets",
+                            content=content(Schema(type="array", items=pet())),
+                        ),
+                    },
+                ),
+                post=Operation(
+                    request_body=RequestBody(content=content(pet())),
+                    responses={"201": Response(description="Created")},
+                ),
+            ),
+        },
+    )
+
+
+def test_duplicates_are_hoisted():
+    api = build()
+    before = json.dumps(api.dump())
+    report = hoist_components(api)
+    assert report.hoisted == ["#/components/schemas/Pet"]
+    assert report.replaced == 2
+    assert report.size_before == len(before)
+    assert report.size_after == len(json.dumps(api.dump()))
+    assert report.saved > 0
+
+    dumped = api.dump()
+    assert dumped["components"]["schemas"]["Pet"] == pet().dump()
+    get = dumped["paths"]["/pets"]["get"]["responses"]["200"]["content"]
+    items = get["application/json"]["schema"]["items"]
+    assert items == {"$ref": "#/components/schemas/Pet"}
+
+
+def test_small_duplicates_stay_inline():
+    api = build()
+    hoist_components(api)
+    pet = api.dump()["components"]["schemas"]["Pet"]
+    assert pet["properties"]["name"] == {"type": "string"}
+
+
+def test_existing_components_are_referenced():
+    api = build()
+    api.components = Components(schemas={"Animal": pet()})
+    report = hoist_components(api)
+    assert report.hoisted == []
+    assert report.replaced == 2
+    assert list(api.dump()["components"]["schemas"]) == ["Animal"]
+
+
+def test_nothing_to_hoist():
+    api = OpenAPI(paths={"/": PathItem(get=Operation())})
+    report = hoist_components(api)
+    assert report.replaced == 0
+    assert report.saved == 0
+    assert api.components is None
+
+
+def test_frozen_objects_are_not_modified():
+    with interning():
+        pets = types.array(
+            items=types.object(
+                {"id": types.int64(), "name": types.string()}, title="Pet"
+            )
+        )
+        pet = pets.items
+        frozen = hash(pets)
+    api = OpenAPI(
+        info=Info(title="Hoisting", version="1.0.0"),
+        paths={
+            "/pets": PathItem(
+                get=Operation(
+                    responses={
+                        "200": Response(
+                            description="Pets", content=content(pets)
+                        )
+                    },
+                ),
+                post=Operation(
+                    request_body=RequestBody(content=content(pet)),
+                    responses={
+                        "201": Response(
+                            description="Created", content=content(pet)
+                        )
+                    },
+                ),
+            ),
+        },
+    )
+    report = hoist_components(api)
+    assert report.hoisted == ["#/components/schemas/Pet"]
+    assert report.replaced == 2
+    assert pets.items is pet
+    assert hash(pets) == frozen
+    assert api.components.schemas["Pet"] is pet
+
+
+def test_duplicates_inside_repeated_inline_objects_are_counted():
+    # The arrays are repeated, but too small to be hoisted, so the pets they
+    # hold count along with the other ones.
+    def pet() -> Schema:
+        return Schema(title="Pet", properties={"id": Schema(type="integer")})
+
+    def pets() -> Schema:
+        return Schema(type="array", items=pet())
+
+    def response(schema: Schema) -> Dict[str, Response]:
+        return {"200": Response(description="Pets", content=content(schema))}
+
+    api = OpenAPI(
+        info=Info(title="Hoisting", version="1.0.0"),
+        paths={
+            "/pets": PathItem(
+                get=Operation(responses=response(pets())),
+                post=Operation(
+                    request_body=RequestBody(content=content(pet())),
+                    responses=response(pet()),
+                ),
+            ),
+            "/owners": PathItem(get=Operation(responses=response(pets()))),
+        },
+    )
+    report = hoist_components(api, [Schema])
+    assert report.hoisted == ["#/components/schemas/Pet"]
+    assert report.replaced == 4
+    dumped = api.dump()["paths"]["/owners"]["get"]["responses"]["200"]
+    schema = dumped["content"]["application/json"]["schema"]
+    assert schema == {
+        "type": "array",
+        "items": {"$ref": "#/components/schemas/Pet"},
+    }
+
+
+def test_hoisting_leaves_the_cached_dumps_alone():
+    api = build()
+    hoist_components(api)
+    assert all(node._dump_cache is None for _, node in api.walk())
+
+    api = build()
+    info = api.info.cached_dump()
+    hoist_components(api)
+    assert api.info.cached_dump() is info
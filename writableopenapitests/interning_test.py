@@ -0,0 +1,51 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import pytest
+from dataclasses import FrozenInstanceError
+from writableopenapi.macros import types
+from writableopenapi.macros.interning import interning
+from writableopenapi.openapi.v3_1 import *
+
+
+def test_macros_are_not_interned_by_default():
+    assert types.uuid() is not types.uuid()
+    assert types.uuid() == types.uuid()
+
+
+def test_interning():
+    with interning():
+        assert types.int32() is types.int32()
+        assert types.int32(description=None) is types.int32()
+        pet = types.object(properties={"id": types.uuid()}, required=["id"])
+        assert pet is types.object({"id": types.uuid()}, required=["id"])
+        assert pet.properties["id"] is types.uuid()
+    assert types.int32() is not types.int32()
+
+
+def test_interning_tells_types_apart():
+    with interning():
+        assert types.integer(example=True) is not types.integer(example=1)
+        assert types.integer(example=True).example is True
+        assert types.integer(example=1).example == 1
+        assert type(types.number(default=1.0).default) is float
+        assert type(types.number(default=1).default) is int
+
+
+def test_interned_objects_are_frozen():
+    with interning():
+        schema = types.string()
+    with pytest.raises(FrozenInstanceError):
+        schema.format = "email"
+    assert hash(schema) == hash(types.string().freeze())
+
+
+def test_structural_hash():
+    a = Schema(properties={"a": Schema(type="string"), "b": Schema()})
+    b = Schema(properties={"b": Schema(), "a": Schema(type="string")})
+    with pytest.raises(TypeError):
+        hash(a)
+    assert hash(a.freeze()) == hash(b.freeze())
+    assert a == b
+    assert a != Schema(properties={"a": Schema()}).freeze()
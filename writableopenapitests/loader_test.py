@@ -0,0 +1,181 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import io
+import json
+import pytest
+from writableopenapi.loader import LoadError, from_dict, load_json, load_yaml
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.utils import into_json, into_yaml
+
+
+def build(paths: int) -> OpenAPI:
+    """Builds a specification with `paths` resources sharing a schema."""
+    model = Reference(ref="#/components/schemas/Model0")
+    items = {}
+    for i in range(paths):
+        items[f"/resources{i}/{{id}}"] = PathItem(
+            parameters=[
+                Parameter(
+                    name="id",
+                    in_="path",
+                    required=True,
+                    schema=Schema(type="integer", format="int64"),
+                    example="1",
+                )
+            ],
+            get=Operation(
+                operation_id=f"get{i}",
+                responses={
+                    "200": Response(
+                        description="The resource",
+                        content={"application/json": MediaType(schema=model)},
+                        extensions={"x-cache": i % 2 == 0},
+                    )
+                },
+            ),
+            put=Operation(
+                request_body=RequestBody(
+                    content={
+                        "application/json": MediaType(
+                            schema=Schema(
+                                type="array",
+                                items=model,
+                                extensions={"x-index": i},
+                            )
+                        )
+                    }
+                ),
+                responses={"204": Response(description="Updated")},
+            ),
+        )
+    return OpenAPI(
+        info=Info(title="Resources", version="1.0.0"),
+        paths=items,
+        components=Components(
+            schemas={
+                "Model0": Schema(
+                    type="object",
+                    required=["id"],
+                    properties={
+                        "id": Schema(type="integer"),
+                        "name": Schema(type="string", max_length=100),
+                    },
+                )
+            }
+        ),
+    )
+
+
+def test_loader_loads_dumps_back():
+    api = build(10)
+    api.paths["/resources0/{id}"].extensions = {"x-internal": True}
+    api.components.schemas["Tree"] = Schema(
+        items=[Reference(ref="#/components/schemas/Model0")],
+        additional_properties=False,
+        type=["object", "null"],
+    )
+    loaded = load_json(io.StringIO(into_json(api)))
+    assert loaded == api
+    assert into_json(loaded) == into_json(api)
+    assert load_yaml(io.StringIO(into_yaml(api))) == api
+
+    item = loaded.paths["/resources0/{id}"]
+    assert item.extensions == {"x-internal": True}
+    assert isinstance(item.get, Operation) and isinstance(item.put, Operation)
+    assert isinstance(item.parameters[0], Parameter)
+    assert isinstance(loaded.components.schemas["Tree"].items[0], Reference)
+
+
+def test_loader_loads_inline_fields_and_unknown_members():
+    callback = from_dict(
+        {"{$url}": {"summary": "Hook"}, "x-hook": 1}, cls=Callback
+    )
+    assert callback.paths == {"{$url}": PathItem(summary="Hook")}
+    assert callback.extensions == {"x-hook": 1}
+    info = from_dict({"title": "Pets", "version": "1", "logo": "a"}, Info)
+    assert info.extensions == {"logo": "a"}
+    assert info.dump() == {"title": "Pets", "version": "1", "logo": "a"}
+
+
+def test_loader_reports_where_documents_are_invalid():
+    document = {
+        "info": {"title": "Pets", "version": "1.0.0"},
+        "paths": {"/pets": {"get": {"parameters": [{"name": "a"}, 3]}}},
+    }
+    with pytest.raises(LoadError) as error:
+        from_dict(document)
+    assert error.value.path == ("paths", "/pets", "get", "parameters", 1)
+    assert str(error.value).startswith("#/paths/~1pets/get/parameters/1: ")
+
+    document["paths"] = {"/pets": {"get": {"responses": []}}}
+    with pytest.raises(LoadError, match="mapping"):
+        from_dict(json.loads(json.dumps(document)))
+    with pytest.raises(LoadError, match="both"):
+        from_dict({"example": "1", "examples": {}}, MediaType)
+
+
+def test_loader_loads_examples_as_they_are():
+    document = {"example": '{"id": 1}', "schema": {"type": "object"}}
+    assert from_dict(document, MediaType).dump() == document
+    for example in ({"id": 1, "ok": True}, 1, ["a"], False):
+        loaded = from_dict({"example": example}, MediaType)
+        assert loaded.example == Verbatim(example)
+        assert loaded.dump() == {"example": example}
+    document = {"summary": "A pet", "value": {"id": 1}}
+    loaded = from_dict(document, Example)
+    assert loaded.dump() == document
+    assert "".join(loaded.iter_json()) == json.dumps(document, indent=2)
+    assert Example(value=1).dump() == {"value": "1"}
+
+
+def test_loader_loads_keys_as_strings():
+    document = """
+openapi: 3.1.0
+info: {title: Pets, version: 1.0.0}
+paths:
+  /pets:
+    get:
+      responses:
+        200: {description: A pet}
+        default: {description: An error}
+      x-codes: {404: missing}
+"""
+    for lazy in (False, True):
+        api = load_yaml(io.StringIO(document), lazy=lazy)
+        responses = api.paths["/pets"].get.responses
+        assert list(responses) == ["200", "default"]
+        dumped = json.loads(into_json(api))
+        assert dumped["paths"]["/pets"]["get"]["x-codes"] == {"404": "missing"}
+        assert load_yaml(io.StringIO(into_yaml(api))) == api
+    data = {"responses": {200: {"description": "A pet"}}}
+    assert list(from_dict(data, Operation).responses) == ["200"]
+
+
+def test_loader_loads_path_items_and_components_lazily():
+    api = build(10)
+    data = json.loads(into_json(api))
+    data["paths"]["/broken"] = {"get": []}
+    lazy = from_dict(data, lazy=True)
+    assert isinstance(lazy.paths, LazyDict)
+    assert lazy.paths.pending == 11
+    assert lazy.components.schemas.pending == 1
+
+    dumped = lazy.dump()
+    assert dumped["paths"]["/broken"] is data["paths"]["/broken"]
+    assert into_json(lazy) == json.dumps(dumped, indent=2, sort_keys=True)
+
+    item = lazy.paths["/resources0/{id}"]
+    assert isinstance(item, PathItem)
+    assert lazy.paths.pending == 10
+    item.summary = "Changed"
+    assert lazy.dump()["paths"]["/resources0/{id}"]["summary"] == "Changed"
+    assert '"summary": "Changed"' in into_json(lazy)
+
+    del lazy.paths["/broken"]
+    item.summary = None
+    assert lazy == api
+    assert lazy.paths.pending == 0
+    with pytest.raises(LoadError, match="mapping"):
+        from_dict(data, lazy=True).paths.get("/broken")
@@ -0,0 +1,106 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import json
+import sys
+import textwrap
+from writableopenapi.__main__ import PHASES, load_module_name, main
+
+SOURCE = textwrap.dedent(
+    """
+    from writableopenapi.openapi.v3_1 import *
+
+    def build(title):
+        return OpenAPI(
+            info=Info(title=title, version="1.0.0"),
+            paths={"/pets": PathItem(summary="Pets")},
+        )
+
+    public = build("Public")
+    admin = build("Admin")
+    """
+)
+
+
+def write_source(tmp_path, monkeypatch, name, text=SOURCE):
+    """
+    Writes a specification file, whose module and directory are removed from
+    `sys.modules` and `sys.path` after the test.
+    """
+    source = tmp_path / name
+    source.write_text(text)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    module = load_module_name(str(source))
+    monkeypatch.setitem(sys.modules, module, None)
+    monkeypatch.delitem(sys.modules, module)
+    return source
+
+
+def test_main_writes_every_specification(tmp_path, monkeypatch, capsys):
+    source = write_source(tmp_path, monkeypatch, "specs.py")
+    output = tmp_path / "{name}.json"
+    assert main([str(source), "--json", str(output), "--yaml", "-"]) == 0
+
+    for name, title in (("public", "Public"), ("admin", "Admin")):
+        written = json.loads((tmp_path / f"{name}.json").read_text())
+        assert written["info"]["title"] == title
+    out, err = capsys.readouterr()
+    assert out.count("openapi: 3.1.0") == 2
+    for phase in PHASES:
+        assert phase in err
+
+
+def test_main_selects_a_specification(tmp_path, monkeypatch, capsys):
+    source = write_source(tmp_path, monkeypatch, "specs.py")
+    assert main([f"{source}:admin", "--compact-json", "-"]) == 0
+    out, _ = capsys.readouterr()
+    assert json.loads(out)["info"]["title"] == "Admin"
+    assert main([str(source), "--json", str(tmp_path / "api.json")]) == 2
+
+
+def test_main_times_the_target_function_as_the_build(
+    tmp_path, monkeypatch, capsys
+):
+    text = SOURCE + textwrap.dedent(
+        """
+        import time
+
+        def slow():
+            time.sleep(0.05)
+            return build("Slow")
+        """
+    )
+    source = write_source(tmp_path, monkeypatch, "specs.py", text)
+    assert main([f"{source}:slow", "--json", "-"]) == 0
+    _, err = capsys.readouterr()
+    spent = dict(line.split() for line in err.splitlines())
+    assert float(spent["build"].removesuffix("ms")) >= 50
+
+
+def test_main_reuses_cached_builds(tmp_path, monkeypatch, capsys):
+    source = write_source(tmp_path, monkeypatch, "cached.py")
+    cache = str(tmp_path / "cache")
+    output = tmp_path / "{name}.json"
+    argv = [str(source), "--json", str(output), "--cache", cache]
+    assert main(argv) == 0
+    assert "cache hit" not in capsys.readouterr().err
+    (tmp_path / "public.json").unlink()
+
+    assert main(argv) == 0
+    assert "cache hit" in capsys.readouterr().err
+    written = json.loads((tmp_path / "public.json").read_text())
+    assert written["info"]["title"] == "Public"
+
+    source.write_text(SOURCE.replace('"Pets"', '"All the pets"'))
+    assert main(argv) == 0
+    assert "cache hit" not in capsys.readouterr().err
+    written = json.loads((tmp_path / "admin.json").read_text())
+    assert written["paths"]["/pets"]["summary"] == "All the pets"
+
+
+def test_main_does_not_shadow_modules(tmp_path, monkeypatch, capsys):
+    source = write_source(tmp_path, monkeypatch, "json.py")
+    assert main([str(source), "--compact-json", "-"]) == 0
+    assert sys.modules["json"] is json
+    assert sys.path[-1] == str(tmp_path)
@@ -0,0 +1,70 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import io
+import json
+import multiprocessing
+from writableopenapi import parallel
+from writableopenapi.loader import from_dict
+from writableopenapi.openapi.v3_1 import *
+
+
+def build(share: bool) -> OpenAPI:
+    pet = Schema(type="object", properties={"id": Schema(type="integer")})
+    paths = {}
+    for i in range(10):
+        schema = pet if share else Schema(title=f"Pets{i}")
+        paths[f"/pets{i}"] = PathItem(
+            get=Operation(
+                operation_id=f"getPets{i}",
+                responses={
+                    "200": Response(
+                        description="Pets",
+                        content={"application/json": MediaType(schema=schema)},
+                    )
+                },
+            ),
+        )
+    return OpenAPI(
+        info=Info(title="Pets", version="1.0.0"),
+        paths=paths,
+        components=Components(
+            schemas={"Pet": pet, "Id": Schema(type="integer")},
+            parameters={"limit": Parameter(name="limit", in_="query")},
+        ),
+    )
+
+
+def test_iter_json_matches_serial_encoding():
+    for share in (False, True):
+        api = build(share)
+        expected = "".join(api.iter_json())
+        for workers in (1, 2, 3):
+            encoded = parallel.iter_json(api, max_workers=workers)
+            assert "".join(encoded) == expected
+
+
+def test_iter_json_sends_the_entries_with_their_shards():
+    api = build(share=True)
+    spawn = multiprocessing.get_context("spawn")
+    encoded = parallel.iter_json(api, max_workers=2, mp_context=spawn)
+    assert "".join(encoded) == "".join(api.iter_json())
+
+
+def test_iter_json_leaves_the_raw_entries_to_the_calling_process():
+    api = build(share=False)
+    lazy = from_dict(api.dump(), lazy=True)
+    lazy.paths["/pets0"].summary = "Pets"
+    lazy.paths["/pets1"].summary = "Pets"
+    assert len(parallel._entries(lazy)) == 2
+    encoded = parallel.iter_json(lazy, max_workers=2)
+    assert "".join(encoded) == "".join(lazy.iter_json())
+    assert lazy.paths.pending == 8
+
+
+def test_write_json_compact():
+    api = build(share=True)
+    fp = io.StringIO()
+    parallel.write_json(api, fp, indent=None, max_workers=2)
+    assert fp.getvalue() == json.dumps(api.dump(), sort_keys=True)
@@ -0,0 +1,75 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import io
+import json
+import pstats
+import sys
+from writableopenapi.__main__ import load_module_name, main
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.profiling import DumpProfiler, profile_dump
+
+
+def test_profile_dump_counts_classes_and_paths():
+    schema = Schema(type="string")
+    api = OpenAPI(
+        info=Info(title="Pets", version="1.0.0"),
+        paths={
+            "/pets": PathItem(
+                get=Operation(
+                    responses={
+                        "200": Response(
+                            description="Pets",
+                            content={
+                                "application/json": MediaType(schema=schema)
+                            },
+                        )
+                    }
+                )
+            ),
+            "/owners": PathItem(summary="Owners"),
+        },
+    )
+    expected = api.dump()
+
+    profile = profile_dump(api)
+    assert api._dump_cache is None
+    assert profile.classes["PathItem"].calls == 2
+    assert profile.classes["Schema"].calls == 1
+    assert profile.classes["Schema"].members == 1
+    assert profile.classes["Schema"].size == len('{"type":"string"}')
+    # The dumps of the objects held are counted in their own class.
+    size = len(json.dumps(expected, separators=(",", ":")))
+    assert sum(stats.size for stats in profile.classes.values()) == size
+    assert list(profile.paths) == ["/pets", "/owners"]
+    assert profile.paths["/owners"].size == len('{"summary":"Owners"}')
+    fp = io.StringIO()
+    profile.report(fp)
+    assert "Operation" in fp.getvalue()
+
+    api.cached_dump()
+    with DumpProfiler() as profiler:
+        assert api.cached_dump() == expected
+    assert profiler.profile.classes == {}
+    with DumpProfiler() as profiler:
+        assert api.dump() == expected
+    assert profiler.profile.classes["Schema"].calls == 1
+    assert profiler.profile.classes["OpenAPI"].calls == 1
+    assert PathItem._dump_fields.__name__ != "instrumented"
+
+
+def test_main_writes_profiles(tmp_path, monkeypatch, capsys):
+    source = tmp_path / "profiled.py"
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    module = load_module_name(str(source))
+    monkeypatch.setitem(sys.modules, module, None)
+    monkeypatch.delitem(sys.modules, module)
+    source.write_text(
+        "from writableopenapi.openapi.v3_1 import *\n"
+        "api = OpenAPI(info=Info(title='Pets', version='1.0.0'))\n"
+    )
+    output = tmp_path / "build.prof"
+    assert main([str(source), "--json", "-", "--profile", str(output)]) == 0
+    assert pstats.Stats(str(output)).total_calls > 0
+    assert "OpenAPI" in capsys.readouterr().err
@@ -0,0 +1,83 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import json
+import pytest
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.reader import MappedSpecification
+
+
+def build():
+    return OpenAPI(
+        info=Info(title='Pets {"[', version="1.0.0"),
+        paths={
+            "/pets/{id}": PathItem(
+                get=Operation(
+                    summary='A "pet" \\ }]',
+                    responses={
+                        "200": Response(
+                            description="A pet",
+                            content={
+                                "application/json": MediaType(
+                                    schema=Reference(
+                                        ref="#/components/schemas/Pet"
+                                    )
+                                )
+                            },
+                        )
+                    },
+                ),
+            ),
+            "/ünicode": PathItem(summary="€"),
+        },
+        components=Components(
+            schemas={
+                "Pet": Schema(
+                    type="object",
+                    properties={
+                        "tags": Schema(type="array", items=Schema(enum=[[]]))
+                    },
+                )
+            },
+            responses={},
+        ),
+    )
+
+
+@pytest.mark.parametrize("indent", [2, None])
+def test_mapped_specification_reads_by_pointer(tmp_path, indent):
+    api = build()
+    path = tmp_path / "openapi.json"
+    path.write_text(
+        json.dumps(api.dump(), indent=indent, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+    with MappedSpecification(str(path)) as spec:
+        assert spec.keys("#/paths") == ["/pets/{id}", "/ünicode"]
+        assert spec.keys("#/components") == ["schemas", "responses"]
+        assert spec.keys("#") == ["openapi", "info", "paths", "components"]
+        assert spec.keys("#/components/schemas") == ["Pet"]
+        assert spec.keys("#/components/responses") == []
+        assert spec.keys("#/info") == []
+        assert "#/components/schemas/Pet" in spec.index
+        assert spec.get("#/info/title") == 'Pets {"['
+        assert spec.get("#/paths/~1ünicode/summary") == "€"
+        operation = spec.load("#/paths/~1pets~1{id}/get", Operation)
+        assert operation == api.paths["/pets/{id}"].get
+        schema = spec.load("#/components/schemas/Pet", Schema)
+        assert schema == api.components.schemas["Pet"]
+        assert spec.get("#/components/schemas/Pet/properties/tags/type") == (
+            "array"
+        )
+        assert spec.get("#") == json.loads(path.read_bytes())
+        with pytest.raises(KeyError):
+            spec.get("#/paths/~1cats")
+
+
+def test_mapped_specification_rejects_invalid_json(tmp_path):
+    path = tmp_path / "openapi.json"
+    path.write_text('{"paths": {"/pets": {"summary": "Pets}}}')
+    with pytest.raises(ValueError, match="invalid JSON"):
+        MappedSpecification(str(path))
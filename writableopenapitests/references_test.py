@@ -0,0 +1,83 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import pytest
+from writableopenapi.macros.shared import ReferencableSchema
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.references import Resolver, pointer
+
+PET = ReferencableSchema("Pet", Schema(type="object"))
+
+
+def build():
+    return OpenAPI(
+        info=Info(title="Pets", version="1.0.0"),
+        paths={
+            "/pets": PathItem(
+                get=Operation(
+                    responses={
+                        "200": Response(
+                            description="Pets",
+                            content={
+                                "application/json": MediaType(
+                                    schema=Schema(type="array", items=PET.ref())
+                                )
+                            },
+                        ),
+                        "404": Reference(ref="#/components/responses/NotFound"),
+                    }
+                )
+            )
+        },
+        components=Components(
+            schemas={
+                "Pet": PET.schema,
+                "Animal": PET.ref(),
+                "Loop": Reference(ref="#/components/schemas/Loop"),
+                "Owner": Schema(
+                    properties={
+                        "id": Reference(ref="#/components/schemas/Id/format")
+                    }
+                ),
+            }
+        ),
+    )
+
+
+def test_resolver_resolves_references():
+    api = build()
+    resolver = Resolver(api)
+    assert resolver.resolve(PET.ref()) is PET.schema
+    assert resolver.resolve("#/components/schemas/Animal") is PET.schema
+    assert resolver.lookup("#/components/schemas/Animal") == PET.ref()
+    assert resolver.resolve("#/paths/~1pets/get/responses/200/description") == (
+        "Pets"
+    )
+    assert resolver.resolve("#/components/schemas/Pet/type") == "object"
+    with pytest.raises(KeyError):
+        resolver.resolve("#/components/schemas/Cat")
+    with pytest.raises(KeyError):
+        resolver.resolve("other.yaml#/components/schemas/Pet")
+    with pytest.raises(ValueError):
+        resolver.resolve("#/components/schemas/Loop")
+
+
+def test_resolver_checks_references():
+    report = Resolver(build()).check()
+    assert report.dangling == [
+        (
+            ("components", "schemas", "Owner", "properties", "id"),
+            "#/components/schemas/Id/format",
+        ),
+        (
+            ("paths", "/pets", "get", "responses", "404"),
+            "#/components/responses/NotFound",
+        ),
+    ]
+    assert not report.ok
+    assert report.unused == [
+        "#/components/schemas/Animal",
+        "#/components/schemas/Owner",
+    ]
+    assert pointer(("paths", "/a~b", 0)) == "#/paths/~1a~0b/0"
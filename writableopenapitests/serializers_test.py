@@ -0,0 +1,41 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import json
+import pytest
+from writableopenapi import serializers
+from writableopenapi.openapi.v3_1 import *
+
+api = OpenAPI(
+    info=Info(title="Serializers", version="1.0.0", description="Café"),
+    components=Components(
+        schemas={
+            "Id": Schema(type="integer", minimum=1.0, maximum=1e21),
+            "Ratio": Schema(type="number", multiple_of=0.0000001),
+        }
+    ),
+)
+
+
+def test_back_ends_of_a_format_agree():
+    for format in serializers.formats():
+        outputs = {s.serialize(api) for s in serializers.serializers(format)}
+        assert len(outputs) == 1
+
+
+def test_default_is_the_fastest():
+    for format in serializers.formats():
+        ranks = [s.rank for s in serializers.serializers(format)]
+        assert serializers.get(format).rank == min(ranks)
+    with pytest.raises(ValueError):
+        serializers.get("json", "missing")
+
+
+def test_canonical_json():
+    value = {"b": [1.0, 1e-7, 1e21, 0.5], "a": "é", "\U0001f600": 1, "ﬁ": 2}
+    encoded = serializers.serialize(value, "json-canonical")
+    assert encoded == '{"a":"é","b":[1,1e-7,1e+21,0.5],"😀":1,"ﬁ":2}'
+    assert json.loads(
+        serializers.serialize(api, "json-canonical")
+    ) == json.loads(serializers.serialize(api, "json"))
@@ -0,0 +1,216 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import io
+import json
+import pytest
+import yaml
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.stream import (
+    encode_events,
+    iter_events,
+    iter_json,
+    write_formats,
+    write_json,
+    write_yaml,
+)
+
+
+api = OpenAPI(
+    info=Info(title="Stream", version="1.0.0"),
+    paths={
+        "/pets": PathItem(
+            get=Operation(
+                operation_id="listPets",
+                tags=["pets"],
+                parameters=[
+                    Parameter(name="limit", in_="query", example=10),
+                ],
+                responses={
+                    "200": Response(
+                        description="A list of pets",
+                        content={
+                            "application/json": MediaType(
+                                schema=Schema(
+                                    type="array",
+                                    items=Reference(
+                                        ref="#/components/schemas/Pet"
+                                    ),
+                                ),
+                            ),
+                        },
+                    ),
+                },
+            ),
+        ),
+    },
+    components=Components(
+        schemas={
+            "Pet": Schema(
+                type="object",
+                required=["id"],
+                properties={
+                    "id": Schema(type="integer", format="int64"),
+                    "name": Schema(type="string", description="Café"),
+                },
+                additional_properties=False,
+            ),
+        },
+    ),
+    security=[SecurityRequirement(security_requirement={"api_key": []})],
+    extensions={"x-foo": "bar"},
+)
+
+
+def test_iter_json_matches_json_dumps():
+    expected = json.dumps(api.dump(), indent=2, sort_keys=True)
+    assert "".join(api.iter_json()) == expected
+
+
+def test_iter_json_compact():
+    expected = json.dumps(api.dump(), sort_keys=True)
+    assert "".join(api.iter_json(indent=None)) == expected
+
+
+def test_iter_json_inline_lazy_dict():
+    loads = []
+
+    def load(value):
+        loads.append(value)
+        return PathItem(**value)
+
+    callback = Callback(paths=LazyDict({"{$url}": {"summary": "Hook"}}, load))
+    streamed = "".join(callback.iter_json())
+    assert loads == []
+    assert streamed == json.dumps(callback.dump(), indent=2, sort_keys=True)
+
+
+def test_encode_events_uses_the_fragments():
+    item = api.paths["/pets"]
+    events = iter_events(api, seen={id(item)})
+    # Fragments are encoded at the top level.
+    fragments = {id(item): '{\n  "summary": "Pets"\n}'}
+    dumped = api.dump()
+    dumped["paths"]["/pets"] = {"summary": "Pets"}
+    expected = json.dumps(dumped, indent=2, sort_keys=True)
+    assert "".join(encode_events(events, 2, True, fragments)) == expected
+
+
+def test_iter_json_values():
+    for value in [{}, [], {"a": []}, [{}], {"b": {}, "a": [1, 2.5, None]}]:
+        expected = json.dumps(value, indent=2, sort_keys=True)
+        assert "".join(iter_json(value)) == expected
+
+
+def test_write_json():
+    fp = io.StringIO()
+    write_json(api, fp)
+    assert json.loads(fp.getvalue()) == api.dump()
+
+
+def test_iter_json_deep_schema():
+    schema = Schema(type="string")
+    for _ in range(5000):
+        schema = Schema(items=schema)
+    encoded = "".join(schema.iter_json(indent=None))
+    assert encoded.count("{") == encoded.count("}") == 5001
+
+
+def test_write_yaml_matches_yaml_dump():
+    fp = io.StringIO()
+    api.write_yaml(fp)
+    assert fp.getvalue() == yaml.dump(api.dump(), indent=2, sort_keys=True)
+
+
+def test_write_yaml_scalars():
+    value = {"a": [1, 2.5, None, True, "yes", "1.0", "", "é"], "b": {}}
+    fp = io.StringIO()
+    write_yaml(value, fp)
+    assert fp.getvalue() == yaml.dump(value, indent=2, sort_keys=True)
+
+
+def test_write_yaml_shared_objects_are_not_aliased():
+    docs = ExternalDocumentation(url="http://example.com")
+    tags = [
+        Tag(name="a", external_docs=docs),
+        Tag(name="b", external_docs=docs),
+    ]
+    fp = io.StringIO()
+    write_yaml(OpenAPI(tags=tags, external_docs=docs), fp)
+    assert "&" not in fp.getvalue()
+
+
+def test_objects_repeated_at_different_depths():
+    pet = Schema(
+        type="object",
+        properties={"tags": Schema(type="array", items=Schema(type="string"))},
+    )
+    tree = OpenAPI(
+        info=Info(title="Repeated", version="1.0.0"),
+        paths={
+            "/pets": PathItem(
+                get=Operation(
+                    responses={
+                        "200": Response(
+                            description="Pets",
+                            content={
+                                "application/json": MediaType(
+                                    schema=Schema(type="array", items=pet)
+                                )
+                            },
+                        )
+                    }
+                )
+            )
+        },
+        components=Components(
+            schemas={
+                "Pet": pet,
+                "Owner": Schema(properties={"pets": Schema(all_of=[pet])}),
+            }
+        ),
+    )
+    dumped = tree.dump()
+    assert "".join(tree.iter_json()) == json.dumps(
+        dumped, indent=2, sort_keys=True
+    )
+    assert "".join(tree.iter_json(indent=None)) == json.dumps(
+        dumped, sort_keys=True
+    )
+    fp = io.StringIO()
+    tree.write_yaml(fp)
+    assert fp.getvalue() == yaml.dump(dumped, indent=2, sort_keys=True)
+
+
+def test_write_formats_matches_each_writer():
+    shared = Schema(type="string", format="uuid")
+    tree = OpenAPI(
+        info=Info(title="Formats", version="1.0.0"),
+        components=Components(schemas={"Id": shared, "Other": shared}),
+    )
+    outputs = [(name, io.StringIO()) for name in ("json", "json-compact")]
+    outputs.append(("yaml", io.StringIO()))
+    write_formats(tree, outputs, max_workers=2)
+
+    dumped = tree.dump()
+    compact = json.dumps(dumped, sort_keys=True, separators=(",", ":"))
+    assert outputs[0][1].getvalue() == json.dumps(
+        dumped, indent=2, sort_keys=True
+    )
+    assert outputs[1][1].getvalue() == compact
+    fp = io.StringIO()
+    write_yaml(tree, fp)
+    assert outputs[2][1].getvalue() == fp.getvalue()
+
+
+def test_write_formats_raises_the_errors_of_the_writers():
+    class Failing(io.StringIO):
+        def write(self, chunk):
+            raise OSError("disk full")
+
+    # More events than the queues of the threads hold.
+    values = list(range(100000))
+    outputs = [("json", Failing()), ("yaml", io.StringIO())]
+    with pytest.raises(OSError, match="disk full"):
+        write_formats(values, outputs, max_workers=2)
@@ -0,0 +1,67 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import json
+import os
+import types
+import writableopenapi.utils
+from writableopenapi.utils import module_source, write_file, write_files
+
+
+def test_write_files_skips_unchanged_files(tmp_path):
+    same = tmp_path / "same.json"
+    same.write_text("{}")
+    os.utime(same, ns=(0, 0))
+    changed = tmp_path / "changed.json"
+    changed.write_text("{}")
+    changed.chmod(0o640)
+
+    report = write_files(
+        {
+            str(same): "{}",
+            str(changed): '{"a": "é"}',
+            str(tmp_path / "new.yaml"): "a: b\n",
+        },
+        max_workers=3,
+    )
+    assert report.unchanged == [str(same)]
+    assert report.changed == [str(changed), str(tmp_path / "new.yaml")]
+    assert os.stat(same).st_mtime_ns == 0
+    assert changed.read_text(encoding="utf-8") == '{"a": "é"}'
+    assert changed.stat().st_mode & 0o777 == 0o640
+    assert sorted(os.listdir(tmp_path)) == [
+        "changed.json",
+        "new.yaml",
+        "same.json",
+    ]
+
+
+def test_write_file(tmp_path):
+    path = str(tmp_path / "openapi.json")
+    assert write_file("{}", path)
+    assert not write_file("{}", path)
+    assert write_file("[]", path)
+
+
+def test_write_files_creates_files_with_the_umask(tmp_path):
+    previous = os.umask(0o027)
+    try:
+        names = [str(tmp_path / f"{i}.json") for i in range(8)]
+        write_files({name: "{}" for name in names}, max_workers=4)
+        assert os.umask(0o027) == 0o027
+    finally:
+        os.umask(previous)
+    for name in names:
+        assert os.stat(name).st_mode & 0o777 == 0o640
+
+
+def test_module_source(tmp_path):
+    module = types.ModuleType("specs")
+    module.__file__ = str(tmp_path / "specs.py")
+    assert module_source(module) == str(tmp_path / "specs.py")
+    module.__file__ = str(tmp_path / "specs.pyc")
+    assert module_source(module) is None
+    assert module_source(types.ModuleType("builtin")) is None
+    assert module_source(json) is None
+    assert module_source(writableopenapi.utils) is None
@@ -0,0 +1,93 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import multiprocessing
+import pytest
+from writableopenapi.openapi.v3_1 import *
+from writableopenapi.validation import Validator, validate
+
+
+def build():
+    pet_id = Parameter(name="id", in_="path", required=True)
+    return OpenAPI(
+        info=Info(title="Pets", version="1.0.0"),
+        paths={
+            "/pets/{id}": PathItem(
+                parameters=[Reference(ref="#/components/parameters/Id")],
+                get=Operation(
+                    operation_id="getPet",
+                    security=[{"key": []}],
+                    responses={"200": Response(description="Pet")},
+                ),
+                put=Operation(
+                    operation_id="getPet",
+                    parameters=[pet_id, pet_id],
+                    security=[{"token": []}],
+                ),
+            ),
+            "/owners/{owner}": PathItem(
+                get=Operation(
+                    parameters=[Parameter(name="id", in_="path")],
+                    responses={"404": Reference(ref="#/components/x/y")},
+                ),
+            ),
+        },
+        components=Components(
+            parameters={"Id": pet_id},
+            security_schemes={
+                "key": SecurityScheme(type="apiKey", name="k", in_="header")
+            },
+        ),
+        security=[SecurityRequirement(security_requirement={"oauth": []})],
+    )
+
+
+def test_validate_finds_problems():
+    found = [(problem.path, problem.rule) for problem in validate(build())]
+    assert found == [
+        (("paths", "/owners/{owner}", "get"), "path-parameters"),
+        (
+            ("paths", "/owners/{owner}", "get", "parameters", 0),
+            "path-parameters",
+        ),
+        (
+            ("paths", "/owners/{owner}", "get", "parameters", 0, "required"),
+            "path-parameters",
+        ),
+        (
+            ("paths", "/owners/{owner}", "get", "responses", "404", "$ref"),
+            "references",
+        ),
+        (("paths", "/pets/{id}", "get", "operationId"), "operation-ids"),
+        (("paths", "/pets/{id}", "put", "operationId"), "operation-ids"),
+        (("paths", "/pets/{id}", "put", "parameters", 1), "unique-parameters"),
+        (("paths", "/pets/{id}", "put", "responses"), "responses"),
+        (("paths", "/pets/{id}", "put", "security", 0, "token"), "security"),
+        (("security", 0, "oauth"), "security"),
+    ]
+    assert str(validate(build())[-1]) == (
+        "#/security/0/oauth: security scheme 'oauth' is not defined (security)"
+    )
+    only = Validator(["responses"]).validate(build())
+    assert [problem.rule for problem in only] == ["responses"]
+    with pytest.raises(ValueError):
+        Validator(["spelling"])
+
+
+def test_validate_on_a_pool_finds_the_same_problems():
+    api = build()
+    # An identifier shared with an operation of another shard, and a
+    # parameter referred to out of the components.
+    owner = "#/paths/~1owners~1{owner}/get/parameters/0"
+    api.paths["/stores"] = PathItem(
+        get=Operation(
+            operation_id="getPet",
+            parameters=[Reference(ref=owner)],
+            responses={"200": Response(description="Store")},
+        ),
+    )
+    problems = validate(api)
+    assert len(problems) == 12
+    for context in (None, multiprocessing.get_context("spawn")):
+        assert validate(api, max_workers=2, mp_context=context) == problems
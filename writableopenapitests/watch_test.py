@@ -0,0 +1,43 @@
+# Copyright (c) 2023 Nicolas Paul All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+import importlib
+import os
+import sys
+from writableopenapi.watch import Watcher
+
+
+def _write(path, source):
+    # Moves the modification time forward, whatever the file system's
+    # resolution.
+    stat = os.stat(path) if path.exists() else None
+    path.write_text(source)
+    if stat is not None:
+        mtime = stat.st_mtime_ns + 1_000_000_000
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_poll_reloads_changed_modules_and_dependents(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    package = tmp_path / "watched"
+    package.mkdir()
+    _write(package / "__init__.py", "")
+    _write(package / "shared.py", "VALUE = 1\n")
+    _write(package / "spec.py", "from .shared import VALUE\nSPEC = VALUE\n")
+    _write(package / "other.py", "OTHER = 1\n")
+    names = ("watched.shared", "watched.spec", "watched.other")
+    for name in ("watched",) + names:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    watcher = Watcher(importlib.import_module(name) for name in names)
+    spec = sys.modules["watched.spec"]
+    assert watcher.poll() == []
+
+    _write(package / "shared.py", "VALUE = 2\n")
+    assert watcher.poll() == ["watched.shared", "watched.spec"]
+    assert spec.SPEC == 2
+    assert watcher.poll() == []
+
+    _write(package / "spec.py", "from .shared import VALUE\nSPEC = -VALUE\n")
+    assert watcher.poll() == ["watched.spec"]
+    assert spec.SPEC == -2